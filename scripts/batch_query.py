@@ -0,0 +1,134 @@
+"""
+Offline batch runner: answers a file of queries through RAGService concurrently and writes JSONL.
+
+Input is JSONL ({"query": ..., "mode": "rag", "read_screen": false, "id": ...}), CSV with the same
+columns, or plain text with one query per line. Each output line carries the answer, citations,
+per-stage timings (ocr/retrieval/generation/total ms) and the completion-cache / coalescing flags.
+Lines are written as queries finish; `index` gives the input position.
+
+    python scripts/batch_query.py --input nightly.jsonl --output results.jsonl --concurrency 8
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.services.admission import PRIORITY_BACKGROUND, LLMOverloadedError  # noqa: E402
+from src.services.backend_pool import LLMUnavailableError  # noqa: E402
+from src.services.rag_service import get_rag_service  # noqa: E402
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+
+
+def _flag(value) -> bool:
+    return value if isinstance(value, bool) else str(value or '').strip().lower() in TRUE_VALUES
+
+
+def load_jobs(path: Path, default_mode: str) -> list[dict]:
+    if path.suffix == '.jsonl':
+        with path.open(encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    elif path.suffix == '.csv':
+        with path.open(newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+    else:
+        rows = [{'query': line.strip()} for line in path.read_text(encoding='utf-8').splitlines() if line.strip()]
+
+    return [
+        {
+            'index': i,
+            'id': row.get('id'),
+            'query': (row.get('query') or '').strip(),
+            'mode': row.get('mode') or default_mode,
+            'read_screen': _flag(row.get('read_screen')),
+        }
+        for i, row in enumerate(rows)
+    ]
+
+
+def run_job(service, job: dict, retries: int) -> dict:
+    result = {**job}
+    if not job['query']:
+        result.update(answer=None, citations=[], model=None, error="row has no 'query'", attempts=0, timings={},
+                      resolved_mode=None, completion_cache_hit=None, coalesced=None)
+        return result
+    for attempt in range(retries + 1):
+        trace = {}
+        try:
+            # Background priority: interactive voice and text requests are admitted ahead of the batch.
+            response = service.ask_question(
+                job['query'], mode=job['mode'], read_screen=job['read_screen'], priority=PRIORITY_BACKGROUND,
+                trace=trace,
+            )
+            result.update(answer=response.answer, citations=response.citations, model=response.model, error=None)
+            break
+        except (LLMOverloadedError, LLMUnavailableError) as e:
+            result.update(answer=None, citations=[], model=None, error=str(e))
+            if attempt < retries:
+                time.sleep(e.retry_after)
+        except Exception as e:
+            result.update(answer=None, citations=[], model=None, error=str(e))
+            break
+    result['attempts'] = attempt + 1
+    result['timings'] = {k: v for k, v in trace.items() if k.endswith('_ms')}
+    result['resolved_mode'] = trace.get('mode')
+    result['completion_cache_hit'] = trace.get('completion_cache_hit')
+    result['coalesced'] = trace.get('coalesced')
+    return result
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Run a file of queries through the VoxVeritas RAG pipeline')
+    parser.add_argument('--input', type=Path, required=True, help='.jsonl, .csv or .txt file of queries')
+    parser.add_argument('--output', type=Path, required=True, help='JSONL file to write results to')
+    parser.add_argument('--concurrency', type=int, default=4, help='Queries in flight at once')
+    parser.add_argument('--mode', default='rag', choices=['rag', 'chat', 'auto'], help='Mode for rows without one')
+    parser.add_argument('--retries', type=int, default=2, help='Retries for queries shed by the LLM queue (429/503)')
+    args = parser.parse_args()
+
+    jobs = load_jobs(args.input, args.mode)
+    if not jobs:
+        print(f'ERROR: no queries in {args.input}', file=sys.stderr)
+        return 1
+
+    service = get_rag_service()
+    started = time.perf_counter()
+    totals, errors, cache_hits, done = [], 0, 0, 0
+    with args.output.open('w', encoding='utf-8') as out, ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [pool.submit(run_job, service, job, args.retries) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            out.write(json.dumps(result, ensure_ascii=False) + '\n')
+            out.flush()
+            done += 1
+            errors += result['error'] is not None
+            cache_hits += bool(result['completion_cache_hit'])
+            if 'total_ms' in result['timings']:
+                totals.append(result['timings']['total_ms'])
+            if done % 50 == 0 or done == len(jobs):
+                print(f'{done}/{len(jobs)} done, {errors} errors')
+
+    wall = time.perf_counter() - started
+    print()
+    print(f'Queries:          {len(jobs)} in {wall:.1f}s ({len(jobs) / wall:.2f} q/s, concurrency {args.concurrency})')
+    print(f'Errors:           {errors}')
+    print(f'Cache hits:       {cache_hits}')
+    print(f'Latency p50/p95:  {_percentile(totals, 50):.0f} / {_percentile(totals, 95):.0f} ms')
+    print(f'Results written:  {args.output}')
+    return 0 if errors == 0 else 2
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
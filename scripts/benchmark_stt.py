@@ -0,0 +1,155 @@
+"""
+Compares STT backends on the same audio: real-time factor (processing time / audio duration) and
+word error rate, both against the reference transcripts and against the baseline backend's output.
+
+Audio comes from --audio-dir (pairs of <name>.wav and <name>.txt), or is synthesized once with
+Kokoro from the bundled sentences in evaluations/stt_samples.txt and cached under .data/stt_bench.
+
+    python scripts/benchmark_stt.py
+    python scripts/benchmark_stt.py --backends openai-whisper,faster-whisper --model-size small --language en
+    python scripts/benchmark_stt.py --audio-dir recordings/ --output stt_bench.json
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+import soundfile as sf
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.services.stt_backends import STT_BACKENDS, STT_MODEL_SIZE, create_stt_backend  # noqa: E402
+
+DEFAULT_SAMPLES = ROOT / 'evaluations' / 'stt_samples.txt'
+SYNTH_DIR = ROOT / '.data' / 'stt_bench'
+
+
+def normalize(text: str) -> list[str]:
+    return re.findall(r"[\w']+", text.lower())
+
+
+def word_errors(hypothesis: str, reference: str) -> tuple[int, int]:
+    """Returns (substitutions + deletions + insertions, reference word count)."""
+    hyp, ref = normalize(hypothesis), normalize(reference)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def wer(hypotheses: list[str], references: list[str]) -> float:
+    errors = total = 0
+    for hyp, ref in zip(hypotheses, references):
+        e, n = word_errors(hyp, ref)
+        errors += e
+        total += n
+    return errors / total if total else 0.0
+
+
+def load_samples(audio_dir: Path | None, samples_file: Path) -> list[tuple[Path, str]]:
+    if audio_dir:
+        return [
+            (wav, wav.with_suffix('.txt').read_text(encoding='utf-8').strip())
+            for wav in sorted(audio_dir.glob('*.wav'))
+            if wav.with_suffix('.txt').exists()
+        ]
+
+    sentences = [line.strip() for line in samples_file.read_text(encoding='utf-8').splitlines() if line.strip()]
+    SYNTH_DIR.mkdir(parents=True, exist_ok=True)
+    samples = []
+    tts = None
+    for i, sentence in enumerate(sentences):
+        wav = SYNTH_DIR / f'sample_{i:02d}.wav'
+        if not wav.exists() or wav.with_suffix('.txt').read_text(encoding='utf-8').strip() != sentence:
+            if tts is None:
+                from src.services.tts_service import TTS_SAMPLE_RATE, get_tts_service
+                tts = get_tts_service()
+            sf.write(str(wav), tts.synthesize(sentence), TTS_SAMPLE_RATE)
+            wav.with_suffix('.txt').write_text(sentence + '\n', encoding='utf-8')
+        samples.append((wav, sentence))
+    return samples
+
+
+def run_backend(name: str, model_size: str, device: str, samples: list[tuple[Path, str]], language: str | None) -> dict:
+    started = time.perf_counter()
+    backend = create_stt_backend(name, model_size, device)
+    load_s = time.perf_counter() - started
+    backend.transcribe(str(samples[0][0]), language=language)  # warm-up, not timed
+
+    hypotheses, processing_s, audio_s = [], 0.0, 0.0
+    for wav, _ in samples:
+        audio_s += sf.info(str(wav)).duration
+        started = time.perf_counter()
+        text, _ = backend.transcribe(str(wav), language=language)
+        processing_s += time.perf_counter() - started
+        hypotheses.append(text)
+
+    return {
+        'backend': name,
+        'compute_type': backend.compute_type,
+        'load_s': round(load_s, 2),
+        'audio_s': round(audio_s, 2),
+        'processing_s': round(processing_s, 2),
+        'rtf': round(processing_s / audio_s, 4) if audio_s else None,
+        'wer': round(wer(hypotheses, [ref for _, ref in samples]), 4),
+        'hypotheses': hypotheses,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark STT backends (RTF and WER) on the same audio')
+    parser.add_argument('--backends', default=','.join(STT_BACKENDS), help='Comma-separated; the first is the baseline')
+    parser.add_argument('--model-size', default=STT_MODEL_SIZE)
+    parser.add_argument('--device', default=None, help='cpu or cuda (default: cuda if available)')
+    parser.add_argument('--language', default=None, help='Force a language (default: auto-detect)')
+    parser.add_argument('--audio-dir', type=Path, help='Directory of <name>.wav + <name>.txt pairs')
+    parser.add_argument('--samples', type=Path, default=DEFAULT_SAMPLES, help='Sentences to synthesize when no --audio-dir')
+    parser.add_argument('--output', type=Path, help='Write the full report (including transcripts) as JSON')
+    args = parser.parse_args()
+
+    device = args.device
+    if device is None:
+        import torch
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+
+    samples = load_samples(args.audio_dir, args.samples)
+    if not samples:
+        print('ERROR: no audio samples found', file=sys.stderr)
+        return 1
+
+    backends = [b.strip() for b in args.backends.split(',') if b.strip()]
+    results = []
+    for name in backends:
+        print(f'Running {name} ({args.model_size}, {device}) on {len(samples)} samples ...')
+        try:
+            results.append(run_backend(name, args.model_size, device, samples, args.language))
+        except Exception as e:
+            print(f'  skipped: {e}', file=sys.stderr)
+
+    if not results:
+        return 1
+    baseline = results[0]
+    for result in results:
+        result['wer_vs_baseline'] = round(wer(result['hypotheses'], baseline['hypotheses']), 4)
+
+    print()
+    print(f"{'backend':<16} {'compute':<8} {'load s':>7} {'RTF':>7} {'speedup':>8} {'WER':>7} {'vs base':>8}")
+    for r in results:
+        speedup = baseline['processing_s'] / r['processing_s'] if r['processing_s'] else 0.0
+        print(
+            f"{r['backend']:<16} {r['compute_type']:<8} {r['load_s']:>7.1f} {r['rtf']:>7.3f} {speedup:>7.2f}x "
+            f"{r['wer'] * 100:>6.1f}% {r['wer_vs_baseline'] * 100:>7.1f}%"
+        )
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding='utf-8')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
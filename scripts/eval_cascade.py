@@ -0,0 +1,124 @@
+"""
+Offline harness for the cascade router.
+
+Runs every query through both the small (rag) and the large (chat) model, then reports how much
+latency the router's choice saves against always using the large model, and how often the routed
+answer agrees with the large model's answer (token-overlap F1 >= --agreement).
+Needs KoboldCpp backends for both modes and an indexed vector store, like the API server.
+
+    python scripts/eval_cascade.py --queries queries.txt --output cascade_eval.jsonl
+    python scripts/eval_cascade.py --queries evaluations/safety_tests.csv --max-distance 0.8
+"""
+import argparse
+import csv
+import json
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.services.cascade_router import (  # noqa: E402
+    CASCADE_MAX_CONTEXT_CHARS,
+    CASCADE_MAX_DISTANCE,
+    CASCADE_MAX_QUERY_WORDS,
+    LARGE_MODE,
+    SMALL_MODE,
+    CascadeRouter,
+)
+from src.services.rag_service import get_rag_service  # noqa: E402
+
+
+def load_queries(path: Path) -> list[str]:
+    if path.suffix == '.csv':
+        with path.open(newline='', encoding='utf-8') as f:
+            return [row.get('query') or row['prompt'] for row in csv.DictReader(f)]
+    if path.suffix == '.jsonl':
+        with path.open(encoding='utf-8') as f:
+            return [json.loads(line)['query'] for line in f if line.strip()]
+    return [line.strip() for line in path.read_text(encoding='utf-8').splitlines() if line.strip()]
+
+
+def token_f1(prediction: str, reference: str) -> float:
+    pred = re.findall(r'\w+', prediction.lower())
+    ref = re.findall(r'\w+', reference.lower())
+    if not pred or not ref:
+        return float(pred == ref)
+    common = sum((Counter(pred) & Counter(ref)).values())
+    if common == 0:
+        return 0.0
+    precision, recall = common / len(pred), common / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def timed_answer(service, query: str, mode: str) -> tuple[str, float]:
+    started = time.perf_counter()
+    answer = service.ask_question(query, mode=mode).answer
+    return answer, (time.perf_counter() - started) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Measure latency saved vs. answer agreement of the cascade router')
+    parser.add_argument('--queries', type=Path, required=True, help='.txt (one per line), .csv (query/prompt column) or .jsonl')
+    parser.add_argument('--output', type=Path, help='Optional JSONL file with per-query results')
+    parser.add_argument('--agreement', type=float, default=0.5, help='Token F1 at which two answers agree')
+    parser.add_argument('--max-distance', type=float, default=CASCADE_MAX_DISTANCE)
+    parser.add_argument('--max-context-chars', type=int, default=CASCADE_MAX_CONTEXT_CHARS)
+    parser.add_argument('--max-query-words', type=int, default=CASCADE_MAX_QUERY_WORDS)
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    if not queries:
+        print(f'ERROR: no queries in {args.queries}', file=sys.stderr)
+        return 1
+
+    service = get_rag_service()
+    router = CascadeRouter(args.max_distance, args.max_context_chars, args.max_query_words)
+    rows = []
+    for i, query in enumerate(queries, 1):
+        features = router.features(query, service._retrieve_context_items(query))
+        routed, reason = router.route(features)
+        small_answer, small_ms = timed_answer(service, query, SMALL_MODE)
+        large_answer, large_ms = timed_answer(service, query, LARGE_MODE)
+        routed_answer = small_answer if routed == SMALL_MODE else large_answer
+        f1 = token_f1(routed_answer, large_answer)
+        rows.append({
+            'query': query,
+            'routed': routed,
+            'reason': reason,
+            'features': features,
+            'small_ms': round(small_ms, 1),
+            'large_ms': round(large_ms, 1),
+            'routed_ms': round(small_ms if routed == SMALL_MODE else large_ms, 1),
+            'f1_vs_large': round(f1, 3),
+            'agrees': f1 >= args.agreement,
+            'small_answer': small_answer,
+            'large_answer': large_answer,
+        })
+        print(f'[{i}/{len(queries)}] {routed:<4} ({reason}) f1={f1:.2f} {query[:60]}')
+
+    if args.output:
+        with args.output.open('w', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+    large_total = sum(r['large_ms'] for r in rows)
+    cascade_total = sum(r['routed_ms'] for r in rows)
+    small_rows = [r for r in rows if r['routed'] == SMALL_MODE]
+    print()
+    print(f'Queries:              {len(rows)}')
+    print(f'Routed to small:      {len(small_rows)} ({len(small_rows) / len(rows):.0%})')
+    print(f'Latency large-only:   {large_total / 1000:.1f}s')
+    print(f'Latency cascade:      {cascade_total / 1000:.1f}s')
+    print(f'Latency saved:        {(large_total - cascade_total) / 1000:.1f}s ({1 - cascade_total / large_total:.0%})' if large_total else '')
+    print(f'Agreement (all):      {sum(r["agrees"] for r in rows) / len(rows):.0%}')
+    if small_rows:
+        print(f'Agreement (routed):   {sum(r["agrees"] for r in small_rows) / len(small_rows):.0%} of small-model answers')
+    print(f'Reasons:              {dict(Counter(r["reason"] for r in rows))}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
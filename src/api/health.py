@@ -1,8 +1,11 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional
 from loguru import logger
 import torch
+from src.services.stt_backends import STT_BACKEND, STT_MODEL_SIZE
 
 class ModelsStatus(BaseModel):
     llm: str
@@ -14,6 +17,7 @@ class ModelsStatus(BaseModel):
     tts_loaded: bool
     embedder: str
     embedder_loaded: bool
+    memory_mb: dict[str, float] = {}  # approximate resident memory per loaded model (see /health/models)
 
 class VectorStoreStatus(BaseModel):
     connected: bool
@@ -32,6 +36,21 @@ class HealthResponse(BaseModel):
     vector_store: VectorStoreStatus
     gpu: GpuStatus
 
+class LLMStatsResponse(BaseModel):
+    model: dict
+    generation: dict
+    backends: dict
+    coalescing: dict
+    admission: dict
+    prompt_cache: dict
+    completion_cache: dict
+    routing: dict
+
+class STTStatsResponse(BaseModel):
+    model: str
+    loaded: bool
+    batching: dict
+
 router = APIRouter()
 
 @router.get("/health", response_model=HealthResponse, summary="Check system health")
@@ -42,10 +61,10 @@ async def check_health() -> HealthResponse:
     try:
         from src.services.llm_service import _instance as _llm_instance
         from src.services.stt_service import STTService
-        from src.services.tts_service import TTSService
+        from src.services.model_lifecycle import get_model_manager
 
         _stt_instance = getattr(STTService, "_instance", None)
-        _tts_instance = getattr(TTSService, "_instance", None)
+        lifecycle = get_model_manager().snapshot()["models"]
 
         llm_loaded = _llm_instance is not None and bool(getattr(_llm_instance, "connected", False))
         llm_info = _llm_instance.get_current_model_info() if _llm_instance is not None else {}
@@ -56,19 +75,20 @@ async def check_health() -> HealthResponse:
             llm=active_llm_name,
             llm_loaded=llm_loaded,
             llm_backend=active_llm_backend,
-            stt="openai/whisper-base",
-            stt_loaded=_stt_instance is not None and getattr(_stt_instance, "model", None) is not None,
+            stt=_stt_instance.model_label if _stt_instance is not None else f"{STT_BACKEND}/whisper-{STT_MODEL_SIZE}",
+            stt_loaded=lifecycle.get("stt", {}).get("loaded", False),
             tts="kokoro-tts",
-            tts_loaded=_tts_instance is not None and getattr(_tts_instance, "pipeline", None) is not None,
+            tts_loaded=lifecycle.get("tts", {}).get("loaded", False),
             embedder="all-MiniLM-L6-v2",
-            embedder_loaded=True,  # loaded at module level in vector_store
+            embedder_loaded=lifecycle.get("embedder", {}).get("loaded", False),
+            memory_mb={name: model["memory_mb"] for name, model in lifecycle.items() if model["loaded"]},
         )
     except Exception as e:
         logger.warning(f"Models health check failed: {e}")
         models = ModelsStatus(
             llm="bartowski/sarvam-1-GGUF", llm_loaded=False,
             llm_backend="koboldcpp",
-            stt="openai/whisper-base", stt_loaded=False,
+            stt=f"{STT_BACKEND}/whisper-{STT_MODEL_SIZE}", stt_loaded=False,
             tts="kokoro-tts", tts_loaded=False,
             embedder="all-MiniLM-L6-v2", embedder_loaded=False,
         )
@@ -118,3 +138,111 @@ async def check_health() -> HealthResponse:
         vector_store=vs,
         gpu=gpu,
     )
+
+@router.get("/health/ready", summary="Readiness probe")
+async def readiness():
+    """
+    200 once every model in WARMUP_MODELS has been loaded and run a dummy inference, 503 before that
+    (or if a warm-up failed), with per-model state and warm-up time. Point load balancer readiness here.
+    """
+    from src.services.warmup import get_warmup
+
+    warmup = get_warmup()
+    if warmup is None:
+        return JSONResponse(status_code=503, content={"ready": False, "models": {}, "detail": "Warm-up has not started"})
+    status = warmup.snapshot()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@router.get("/health/llm", response_model=LLMStatsResponse, summary="LLM backend and generation statistics")
+async def llm_stats() -> LLMStatsResponse:
+    """
+    Returns the active LLM model info, cumulative generation counters (e.g. tokens saved by early stop),
+    per-backend health, queue depth and latency for each mode, in-flight request coalescing counters,
+    admission queue depth, wait times and shed counts, prompt-prefix (KV cache) reuse with prefill times,
+    persistent completion cache hits and size, and cascade routing decisions for mode="auto" queries.
+    """
+    from src.services.llm_service import _instance as _llm_instance
+    from src.services.rag_service import _rag_instance
+
+    routing = _rag_instance.router.snapshot() if _rag_instance is not None else {}
+
+    if _llm_instance is None:
+        return LLMStatsResponse(
+            model={"name": "None", "mode": "none", "connected": False}, generation={}, backends={}, coalescing={},
+            admission={}, prompt_cache={}, completion_cache={}, routing=routing,
+        )
+    return LLMStatsResponse(
+        model=_llm_instance.get_current_model_info(),
+        generation=_llm_instance.get_generation_stats(),
+        backends=_llm_instance.get_backend_stats(),
+        coalescing=_llm_instance.get_coalescing_stats(),
+        admission=_llm_instance.get_admission_stats(),
+        prompt_cache=_llm_instance.get_prompt_cache_stats(),
+        completion_cache=_llm_instance.get_completion_cache_stats(),
+        routing=routing,
+    )
+
+@router.get("/health/stt", response_model=STTStatsResponse, summary="Speech-to-text batching statistics")
+async def stt_stats() -> STTStatsResponse:
+    """
+    Returns the active STT backend and the transcription batcher's counters: requests, batches,
+    batch-size histogram and average size, queue depth, and queue wait / batch decode times.
+    With STT_WORKER_PROCESSES, `batching` holds one such set per worker process.
+    """
+    from src.services.model_workers import STT_WORKER_PROCESSES, ModelWorkerError, STTWorkerClient, get_running_pool
+    from src.services.stt_service import STTService
+
+    not_loaded = STTStatsResponse(model=f"{STT_BACKEND}/whisper-{STT_MODEL_SIZE}", loaded=False, batching={})
+    if STT_WORKER_PROCESSES > 0:
+        pool = get_running_pool("stt")
+        if pool is None or not pool.ready:
+            return not_loaded
+        client = STTWorkerClient(pool)
+        try:
+            batching = await run_in_threadpool(client.get_batching_stats)
+        except ModelWorkerError as e:
+            logger.warning(f"Could not read STT worker stats: {e}")
+            return not_loaded
+        return STTStatsResponse(model=client.model_label, loaded=True, batching=batching)
+
+    _stt_instance = getattr(STTService, "_instance", None)
+    if _stt_instance is None:
+        return not_loaded
+    return STTStatsResponse(
+        model=_stt_instance.model_label,
+        loaded=_stt_instance.model is not None,
+        batching=_stt_instance.get_batching_stats(),
+    )
+
+@router.get("/health/tts", summary="TTS pipeline and phrase cache statistics")
+async def tts_stats() -> dict:
+    """
+    Returns the loaded Kokoro language pipelines (seconds since last use, memory, loads and evictions) and
+    the TTS phrase cache counters: hits, misses, hit rate, stores, evictions, entry count and stored bytes
+    against TTS_CACHE_MAX_MB. Both are empty until Kokoro is loaded in-process.
+    """
+    from src.services.tts_service import TTSService
+
+    _tts_instance = getattr(TTSService, "_instance", None)
+    if _tts_instance is None:
+        return {"pipelines": {}, "cache": {"enabled": False}}
+    return {"pipelines": _tts_instance.get_pipeline_stats(), "cache": _tts_instance.get_cache_stats()}
+
+@router.get("/health/models", summary="Resident model memory and lifecycle")
+async def model_stats() -> dict:
+    """
+    Returns each managed model (stt, tts, embedder, ocr) with load state, requests in flight, seconds
+    since last use, approximate memory (RSS growth at load and weight size), load/unload counts and
+    last load time, plus the process RSS and the MODEL_MEMORY_BUDGET_MB / MODEL_IDLE_TTL_SECONDS limits.
+    """
+    from src.services.model_lifecycle import get_model_manager
+    return get_model_manager().snapshot()
+
+@router.get("/health/workers", summary="STT/TTS worker process status")
+async def worker_stats() -> dict:
+    """
+    Returns each model worker pool (STT_WORKER_PROCESSES / TTS_WORKER_PROCESSES) with per-process
+    pid, liveness, readiness, request count, restart count and last failure. Empty when models run in-process.
+    """
+    from src.services.model_workers import get_worker_stats
+    return get_worker_stats()
@@ -1,8 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
+import anyio
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 from src.services.rag_service import RAGService, get_rag_service, RAGResponse
+from src.services.backend_pool import LLMUnavailableError
+from src.services.admission import LLMOverloadedError
+from src.services.session_memory import UnknownSessionError
 from loguru import logger
-from typing import List
+from typing import AsyncIterator, Iterator, List
+import json
+import uuid
 
 class ChatRequest(BaseModel):
     prompt: str
@@ -10,33 +18,115 @@ class ChatRequest(BaseModel):
     temperature: float = 0.2
     read_screen: bool = False
     screen_context: str | None = None
+    deadline_seconds: float | None = None
+    session_id: str | None = None
 
 class ChatResponse(BaseModel):
     response: str
     model: str
     citations: List[str]
+    session_id: str | None = None
 
 class QARequest(BaseModel):
     query: str
     mode: str = "rag"
     read_screen: bool = False
     screen_context: str | None = None
+    deadline_seconds: float | None = None
+    session_id: str | None = None
+
+class SessionResponse(BaseModel):
+    session_id: str
 
 router = APIRouter()
 
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _sse_lines(events: Iterator) -> Iterator[str]:
+    """Formats RAGService.stream_question events as Server-Sent Events."""
+    try:
+        for kind, value in events:
+            if kind == "token":
+                yield _sse_event("token", {"token": value})
+            elif kind == "done":
+                yield _sse_event("done", value.model_dump())
+    except UnknownSessionError as e:
+        yield _sse_event("error", {"detail": str(e), "status": 404})
+    except LLMUnavailableError as e:
+        logger.warning(f"Streaming endpoint unavailable: {e}")
+        yield _sse_event("error", {"detail": str(e), "status": 503, "retry_after": e.retry_after})
+    except LLMOverloadedError as e:
+        logger.warning(f"Streaming endpoint overloaded: {e}")
+        yield _sse_event("error", {"detail": str(e), "status": 429, "retry_after": e.retry_after})
+    except Exception as e:
+        logger.error(f"Streaming endpoint error: {e}")
+        yield _sse_event("error", {"detail": str(e)})
+    finally:
+        events.close()
+
+def _stop_stream(service: RAGService, genkey: str, lines: Iterator[str]):
+    if service.llm_service.abort_stream(genkey):
+        logger.info(f"Client disconnected; aborted generation {genkey}")
+    lines.close()
+
+async def _sse_stream(http_request: Request, service: RAGService, events: Iterator, genkey: str) -> AsyncIterator[str]:
+    """
+    Pulls the events off the event loop. When the client goes away the upstream generation is aborted
+    and the events closed, so the LLM slot is freed instead of generating for nobody.
+    """
+    lines = _sse_lines(events)
+    try:
+        async for line in iterate_in_threadpool(lines):
+            if await http_request.is_disconnected():
+                break
+            yield line
+    finally:
+        with anyio.CancelScope(shield=True):
+            await run_in_threadpool(_stop_stream, service, genkey, lines)
+
+def _sse_response(http_request: Request, service: RAGService, events: Iterator, genkey: str) -> StreamingResponse:
+    return StreamingResponse(
+        _sse_stream(http_request, service, events, genkey),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _require_session(service: RAGService, session_id: str | None):
+    # Checked up front: once streaming starts, the 200 status has already been sent.
+    if session_id and service.sessions.find(session_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")
+
 @router.post("/chat", response_model=ChatResponse, summary="Direct chat with the LLM")
 async def chat(request: ChatRequest, service: RAGService = Depends(get_rag_service)) -> ChatResponse:
     """
     Direct chat mode using the chat model, while still attaching retrieved document citations.
     """
     try:
-        rag_result = service.ask_question(
+        # Off the event loop: the request may wait in the LLM admission queue.
+        rag_result = await run_in_threadpool(
+            service.ask_question,
             query=request.prompt,
             mode="chat",
             read_screen=request.read_screen,
             screen_context_override=request.screen_context,
+            deadline_s=request.deadline_seconds,
+            session_id=request.session_id,
+        )
+        return ChatResponse(
+            response=rag_result.answer,
+            model=rag_result.model,
+            citations=rag_result.citations,
+            session_id=rag_result.session_id,
         )
-        return ChatResponse(response=rag_result.answer, model=rag_result.model, citations=rag_result.citations)
+    except UnknownSessionError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except LLMUnavailableError as e:
+        logger.warning(f"Chat endpoint unavailable: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except LLMOverloadedError as e:
+        logger.warning(f"Chat endpoint overloaded: {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         logger.error(f"Chat endpoint error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -47,12 +137,92 @@ async def ask(request: QARequest, service: RAGService = Depends(get_rag_service)
     Performs grounded QA using retrieved document context.
     """
     try:
-        return service.ask_question(
+        return await run_in_threadpool(
+            service.ask_question,
             query=request.query,
             mode=request.mode,
             read_screen=request.read_screen,
             screen_context_override=request.screen_context,
+            deadline_s=request.deadline_seconds,
+            session_id=request.session_id,
         )
+    except UnknownSessionError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except LLMUnavailableError as e:
+        logger.warning(f"QA endpoint unavailable: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except LLMOverloadedError as e:
+        logger.warning(f"QA endpoint overloaded: {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         logger.error(f"QA endpoint error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/chat/stream", summary="Direct chat with the LLM, streamed as Server-Sent Events")
+async def chat_stream(
+    request: ChatRequest, http_request: Request, service: RAGService = Depends(get_rag_service)
+) -> StreamingResponse:
+    """
+    Streaming variant of /chat. Emits `token` events as the model generates,
+    then a final `done` event with the cleaned answer, citations and model.
+    """
+    _require_session(service, request.session_id)
+    genkey = f"VOX{uuid.uuid4().hex[:12]}"
+    events = service.stream_question(
+        query=request.prompt,
+        mode="chat",
+        read_screen=request.read_screen,
+        screen_context_override=request.screen_context,
+        deadline_s=request.deadline_seconds,
+        session_id=request.session_id,
+        genkey=genkey,
+    )
+    return _sse_response(http_request, service, events, genkey)
+
+@router.post("/ask/stream", summary="Grounded QA using RAG, streamed as Server-Sent Events")
+async def ask_stream(
+    request: QARequest, http_request: Request, service: RAGService = Depends(get_rag_service)
+) -> StreamingResponse:
+    """
+    Streaming variant of /ask. Emits `token` events as the model generates,
+    then a final `done` event with the cleaned answer, citations and model.
+    """
+    _require_session(service, request.session_id)
+    genkey = f"VOX{uuid.uuid4().hex[:12]}"
+    events = service.stream_question(
+        query=request.query,
+        mode=request.mode,
+        read_screen=request.read_screen,
+        screen_context_override=request.screen_context,
+        deadline_s=request.deadline_seconds,
+        session_id=request.session_id,
+        genkey=genkey,
+    )
+    return _sse_response(http_request, service, events, genkey)
+
+@router.post("/sessions", response_model=SessionResponse, summary="Start a conversation session")
+async def create_session(service: RAGService = Depends(get_rag_service)) -> SessionResponse:
+    """
+    Creates a server-side session. Pass its `session_id` to /chat, /ask, their streaming variants
+    or /ask_voice to keep conversation history within a fixed token budget.
+    """
+    return SessionResponse(session_id=service.sessions.create().session_id)
+
+@router.get("/sessions", summary="Conversation session statistics")
+async def session_stats(service: RAGService = Depends(get_rag_service)) -> dict:
+    """Returns active sessions, history token usage against the budget and summarisation counters."""
+    return service.sessions.snapshot()
+
+@router.get("/sessions/{session_id}", summary="Inspect a conversation session")
+async def get_session(session_id: str, service: RAGService = Depends(get_rag_service)) -> dict:
+    """Returns the session's running summary, verbatim and pending turns and token usage."""
+    session = service.sessions.find(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")
+    return session.snapshot()
+
+@router.delete("/sessions/{session_id}", summary="End a conversation session")
+async def delete_session(session_id: str, service: RAGService = Depends(get_rag_service)) -> dict:
+    if not service.sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")
+    return {"deleted": session_id}
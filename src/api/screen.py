@@ -1,9 +1,8 @@
-import os
-import shutil
 from fastapi import APIRouter, HTTPException, UploadFile, File
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
-from src.services.screen_reader import get_screen_reader_service
+from src.services.screen_reader import ImageDecodeError, decode_image, get_screen_reader_service
 
 router = APIRouter()
 
@@ -15,14 +14,10 @@ class ScreenOCRResponse(BaseModel):
     chars: int
 
 
-TEMP_UPLOAD_DIR = ".data/temp_image"
-os.makedirs(TEMP_UPLOAD_DIR, exist_ok=True)
-
-
 @router.get("/screen/ocr", response_model=ScreenOCRResponse, summary="Capture current screen and run OCR")
 async def screen_ocr() -> ScreenOCRResponse:
     service = get_screen_reader_service()
-    text = service.capture_and_read_screen()
+    text = await run_in_threadpool(service.capture_and_read_screen)
     engine = service.get_engine_name()
 
     if not text:
@@ -48,30 +43,25 @@ async def screen_ocr_upload(file: UploadFile = File(...)) -> ScreenOCRResponse:
     service = get_screen_reader_service()
     engine = service.get_engine_name()
 
-    temp_path = os.path.join(TEMP_UPLOAD_DIR, f"uploaded_{file.filename or 'screen.png'}")
+    # Decoded straight from the upload stream; the image never touches the disk.
     try:
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        text = service.read_image_file(temp_path)
-        if not text:
-            raise HTTPException(
-                status_code=503,
-                detail=f"OCR returned no text from uploaded screenshot. Active engine: {engine}.",
-            )
-
-        return ScreenOCRResponse(
-            status="success",
-            engine=engine,
-            text=text,
-            chars=len(text),
+        image = await run_in_threadpool(decode_image, file.file)
+    except ImageDecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    text = await run_in_threadpool(service.read_image, image)
+    if not text:
+        raise HTTPException(
+            status_code=503,
+            detail=f"OCR returned no text from uploaded screenshot. Active engine: {engine}.",
         )
-    finally:
-        if os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-            except Exception:
-                pass
+
+    return ScreenOCRResponse(
+        status="success",
+        engine=engine,
+        text=text,
+        chars=len(text),
+    )
 
 
 @router.post("/screen/ocr", response_model=ScreenOCRResponse, summary="(Legacy) Run OCR on an uploaded screenshot")
@@ -1,23 +1,40 @@
-import os
-import shutil
-import tempfile
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
-from fastapi import Form
+import json
+import time
+import asyncio
+import struct
+import threading
+import uuid
+import numpy as np
+from fastapi import APIRouter, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi import Form, Header
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from loguru import logger
 from src.services.stt_service import get_stt_service
-from src.services.tts_service import get_tts_service
+from src.services.tts_service import TTS_SAMPLE_RATE, get_tts_service
 from src.services.rag_service import get_rag_service
+from src.services.backend_pool import LLMUnavailableError
+from src.services.admission import LLMOverloadedError, PRIORITY_VOICE
+from src.services.session_memory import UnknownSessionError
+from src.services.streaming_stt import UtteranceSegmenter, pcm16_to_float32
+from src.services.sentence_segmenter import SentenceAccumulator
+from src.services.audio_decode import AudioDecodeError, decode_audio
+from src.services.audio_encode import accepts, audio_extension, encode_audio, negotiate_audio_format
 
 router = APIRouter()
 
 class SynthesizeRequest(BaseModel):
     text: str
+    language: str | None = None  # Whisper language code, e.g. "hi"; picks the Kokoro pipeline and voice
 
-# Directory for storing temporary audio
-TEMP_AUDIO_DIR = ".data/temp_audio"
-os.makedirs(TEMP_AUDIO_DIR, exist_ok=True)
+async def _read_upload_audio(file: UploadFile):
+    """Decodes an uploaded audio file straight from the request body to 16 kHz float32 samples."""
+    data = await file.read()
+    try:
+        return await run_in_threadpool(decode_audio, data, file.filename)
+    except AudioDecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/transcribe", summary="Transcribe Audio to Text")
 async def transcribe_audio(file: UploadFile = File(...)):
@@ -29,14 +46,11 @@ async def transcribe_audio(file: UploadFile = File(...)):
 
     logger.info(f"Received audio file for transcription: {file.filename}")
     
-    # Save uploaded file temporarily
-    temp_file_path = os.path.join(TEMP_AUDIO_DIR, file.filename)
+    audio = await _read_upload_audio(file)
     try:
-        with open(temp_file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
         stt_service = get_stt_service()
-        transcription = stt_service.transcribe_audio(temp_file_path)
+        # Off the event loop, so concurrent uploads reach the STT batcher together.
+        transcription = await run_in_threadpool(stt_service.transcribe_audio, audio)
         
         return {
             "status": "success",
@@ -45,97 +59,438 @@ async def transcribe_audio(file: UploadFile = File(...)):
     except Exception as e:
         logger.error(f"Error processing audio upload: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.websocket("/ws/transcribe")
+async def transcribe_stream(websocket: WebSocket, language: str | None = None, sample_rate: int = 16000):
+    """
+    Streaming speech-to-text.
+    The client sends binary frames of mono little-endian PCM16 at `sample_rate` (query parameter,
+    default 16000) and may send {"type": "end"} to flush and close. The server replies with JSON:
+    {"type": "speech_start"}, {"type": "partial", "text"} while the user speaks, and
+    {"type": "final", "text", "latency_ms"} once voice activity detection sees the utterance end.
+    latency_ms is measured from the end of speech (including the VAD silence window).
+    """
+    await websocket.accept()
+    stt_service = get_stt_service()
+    segmenter = UtteranceSegmenter()
+    finals: asyncio.Queue = asyncio.Queue()
+    state = {"utterance": 0, "open": None, "partial": None}
+
+    async def send_partial(utterance: int, audio):
+        text = await run_in_threadpool(stt_service.transcribe_array, audio, language, True)
+        # Drop the hypothesis if the utterance was finalised while it was being decoded.
+        if text and state["open"] == utterance:
+            await websocket.send_json({"type": "partial", "utterance": utterance, "text": text})
+
+    async def send_finals():
+        while True:
+            item = await finals.get()
+            if item is None:
+                return
+            utterance, audio, ended_at = item
+            text = await run_in_threadpool(stt_service.transcribe_array, audio, language)
+            latency_ms = segmenter.end_silence_ms + (time.perf_counter() - ended_at) * 1000
+            await websocket.send_json(
+                {"type": "final", "utterance": utterance, "text": text, "latency_ms": round(latency_ms, 1)}
+            )
+
+    async def handle(events):
+        for kind, audio in events:
+            if kind == "start":
+                state["utterance"] += 1
+                state["open"] = state["utterance"]
+                await websocket.send_json({"type": "speech_start", "utterance": state["utterance"]})
+            elif kind == "partial":
+                # At most one partial decode in flight; a busy model skips interim hypotheses, never finals.
+                if state["partial"] is None or state["partial"].done():
+                    state["partial"] = asyncio.create_task(send_partial(state["utterance"], audio))
+            elif kind == "end":
+                state["open"] = None
+                finals.put_nowait((state["utterance"], audio, time.perf_counter()))
+
+    finals_task = asyncio.create_task(send_finals())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                await handle(segmenter.feed(pcm16_to_float32(message["bytes"], sample_rate)))
+            elif message.get("text"):
+                control = json.loads(message["text"])
+                if control.get("type") == "end":
+                    await handle(segmenter.flush())
+                    finals.put_nowait(None)
+                    await finals_task
+                    await websocket.send_json({"type": "done"})
+                    await websocket.close()
+                    return
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Streaming transcription error: {e}")
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1011)
     finally:
-        # Cleanup
-        if os.path.exists(temp_file_path):
-            try:
-                os.remove(temp_file_path)
-            except Exception as cleanup_err:
-                logger.warning(f"Failed to remove temp file {temp_file_path}: {cleanup_err}")
+        finals_task.cancel()
+        if state["partial"] is not None:
+            state["partial"].cancel()
 
 @router.post("/synthesize", summary="Synthesize Text to Audio")
-async def synthesize_audio(request: SynthesizeRequest):
+async def synthesize_audio(request: SynthesizeRequest, accept: str | None = Header(None)):
     """
-    Receives text, generates synthetic speech using Kokoro, and returns a .wav file.
+    Receives text, generates synthetic speech using Kokoro, and returns it encoded in memory in the
+    codec chosen by the Accept header: audio/ogg (Opus), audio/flac, audio/mpeg or audio/wav (default).
     """
     if not request.text.strip():
         raise HTTPException(status_code=400, detail="Text cannot be empty")
         
     logger.info(f"Received text for synthesis: {request.text[:50]}...")
+    media_type = negotiate_audio_format(accept)
     
     try:
         tts_service = get_tts_service()
-        # Generate a unique filename using hash or just override a temp one for demo
-        # For multi-tenant we'd use UUID, here we just use output.wav
-        output_path = tts_service.generate_audio(request.text, output_filename="response.wav")
+        audio = await run_in_threadpool(tts_service.synthesize, request.text, None, request.language)
+        content = await run_in_threadpool(encode_audio, audio, TTS_SAMPLE_RATE, media_type)
         
-        return FileResponse(
-            path=output_path,
-            media_type="audio/wav",
-            filename="response.wav"
+        return Response(
+            content=content,
+            media_type=media_type,
+            headers={
+                "Content-Disposition": f'attachment; filename="response.{audio_extension(media_type)}"',
+                "Vary": "Accept",
+            },
         )
     except Exception as e:
         logger.error(f"Error synthesizing audio: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _multipart_response(metadata: dict, audio: bytes, media_type: str) -> Response:
+    """multipart/mixed body: a JSON part with the answer, then the audio as a binary part."""
+    boundary = uuid.uuid4().hex
+    body = b"".join([
+        f"--{boundary}\r\nContent-Type: application/json\r\n\r\n".encode(),
+        json.dumps(metadata, ensure_ascii=False).encode("utf-8"),
+        f"\r\n--{boundary}\r\nContent-Type: {media_type}\r\n"
+        f'Content-Disposition: attachment; filename="answer.{audio_extension(media_type)}"\r\n\r\n'.encode(),
+        audio,
+        f"\r\n--{boundary}--\r\n".encode(),
+    ])
+    return Response(content=body, media_type=f"multipart/mixed; boundary={boundary}", headers={"Vary": "Accept"})
+
+def _wav_stream_header(sample_rate: int) -> bytes:
+    """Mono PCM16 WAV header with unknown (maximum) length, for audio streamed as it is generated."""
+    unknown = 0xFFFFFFFF
+    return (
+        b"RIFF" + struct.pack("<I", unknown) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+        + b"data" + struct.pack("<I", unknown)
+    )
+
+def _pcm16(audio: np.ndarray) -> bytes:
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+@router.post("/synthesize/stream", summary="Stream synthesized speech sentence by sentence")
+async def synthesize_audio_stream(request: SynthesizeRequest):
+    """
+    Like /synthesize, but the text is synthesized one sentence at a time and each segment's audio is
+    sent as soon as it is ready: a streamed 24 kHz 16-bit mono WAV, so playback can start after the
+    first sentence instead of after the whole answer.
+    """
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="Text cannot be empty")
+
+    logger.info(f"Received text for streamed synthesis: {request.text[:50]}...")
+    tts_service = get_tts_service()
+
+    def audio_chunks():
+        yield _wav_stream_header(TTS_SAMPLE_RATE)
+        started = time.perf_counter()
+        try:
+            for i, audio in enumerate(tts_service.synthesize_stream(request.text, None, request.language)):
+                if i == 0:
+                    logger.debug(f"First synthesized segment after {(time.perf_counter() - started) * 1000:.0f} ms")
+                yield _pcm16(audio)
+        except Exception as e:
+            # Headers are already sent; ending the stream early is all that is left to do.
+            logger.error(f"Error streaming synthesized audio: {str(e)}")
+
+    return StreamingResponse(audio_chunks(), media_type="audio/wav")
+
 @router.post("/ask_voice", summary="End-to-End Voice RAG Pipeline")
-async def ask_voice(file: UploadFile = File(...), read_screen: bool = Form(False), chat_mode: bool = Form(False)):
+async def ask_voice(
+    file: UploadFile = File(...),
+    read_screen: bool = Form(False),
+    chat_mode: bool = Form(False),
+    session_id: str | None = Form(None),
+    accept: str | None = Header(None),
+):
     """
     Receives an audio file containing a spoken question.
-    Optional: read_screen boolean parameter.
+    Optional: read_screen boolean parameter, session_id to keep conversation history (see POST /sessions).
     1. Transcribes it into text using Whisper.
     2. (Optional) Captures user's screen using Windows Native OCR and injects as context.
     3. Runs the RAG pipeline to get a cited answer.
     4. Synthesizes the answer text into audio using Kokoro.
-    5. Returns a JSON payload with data and audio b64.
+    5. Returns a JSON payload with data and audio b64, or with `Accept: multipart/mixed` a JSON part
+       followed by a binary audio part. Any audio/* type in Accept picks the codec (default WAV).
     """
     import base64
 
     if not file.filename.endswith(('.wav', '.mp3', '.m4a', '.ogg', '.flac')):
          raise HTTPException(status_code=400, detail="Unsupported audio format")
 
-    temp_file_path = os.path.join(TEMP_AUDIO_DIR, file.filename)
+    if session_id and get_rag_service().sessions.find(session_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")  # before paying for STT
+    media_type = negotiate_audio_format(accept)
+    audio = await _read_upload_audio(file)
     try:
-        # Save temp file
-        with open(temp_file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
         logger.info(f"Step 1: Transcribing ...")
         stt_service = get_stt_service()
-        transcription = stt_service.transcribe_audio(temp_file_path)
-        logger.info(f"Transcription: {transcription}")
+        transcription, language = await run_in_threadpool(stt_service.transcribe_with_language, audio)
+        logger.info(f"Transcription ({language}): {transcription}")
         
         logger.info(f"Step 2: Generation RAG Answer ...")
         rag_service = get_rag_service()
 
         mode_str = "chat" if chat_mode else "rag"
-        rag_response = rag_service.ask_question(transcription, mode=mode_str, read_screen=read_screen)
+        # Voice turns jump ahead of queued text chat in the LLM admission queue.
+        rag_response = await run_in_threadpool(
+            rag_service.ask_question,
+            transcription, mode=mode_str, read_screen=read_screen, priority=PRIORITY_VOICE, session_id=session_id,
+        )
         
         logger.info(f"Step 3: Synthesizing TTS ...")
         tts_service = get_tts_service()
-        output_path = tts_service.generate_audio(rag_response.answer, output_filename="pipelined_response.wav")
+        # Answer in the voice of the language the question was asked in.
+        audio = await run_in_threadpool(tts_service.synthesize, rag_response.answer, None, language)
+        audio_bytes = await run_in_threadpool(encode_audio, audio, TTS_SAMPLE_RATE, media_type)
         
         # Citations are already a list of source filenames.
         citation_texts = rag_response.citations
-        
-        # Read the generated TTS file and convert to base64
-        with open(output_path, "rb") as f:
-            audio_b64 = base64.b64encode(f.read()).decode('utf-8')
-            
-        return JSONResponse(status_code=200, content={
+        metadata = {
             "transcription": transcription,
+            "language": language,
             "answer": rag_response.answer,
             "citations": citation_texts,
-            "audio_base64": audio_b64,
+            "audio_media_type": media_type,
             "model": rag_response.model,
-        })
+            "session_id": rag_response.session_id,
+        }
+        if accepts(accept, "multipart/mixed"):
+            return _multipart_response(metadata, audio_bytes, media_type)
+        return JSONResponse(status_code=200, content={
+            **metadata, "audio_base64": base64.b64encode(audio_bytes).decode('utf-8'),
+        }, headers={"Vary": "Accept"})
 
+    except UnknownSessionError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except LLMUnavailableError as e:
+        logger.warning(f"Voice RAG pipeline unavailable: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except LLMOverloadedError as e:
+        logger.warning(f"Voice RAG pipeline overloaded: {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         logger.error(f"Error in Voice RAG pipeline: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if os.path.exists(temp_file_path):
+
+@router.websocket("/ws/voice")
+async def voice_turn_stream(
+    websocket: WebSocket,
+    language: str | None = None,
+    sample_rate: int = 16000,
+    chat_mode: bool = False,
+    read_screen: bool = False,
+    session_id: str | None = None,
+    barge_in: bool = True,
+):
+    """
+    Full-duplex voice turns: STT, the LLM stream and TTS run as a pipeline.
+    The client streams mono PCM16 microphone audio as binary frames (as for /ws/transcribe). When voice
+    activity detection sees the end of an utterance, the server transcribes it, streams the answer and
+    synthesizes each sentence while the LLM is still generating the next. Server messages:
+      {"type": "speech_start", "turn"}
+      {"type": "transcript", "turn", "text", "language", "stt_ms"}   language also picks the TTS voice
+      {"type": "token", "turn", "text"}
+      {"type": "audio", "turn", "segment", "text", "sample_rate"}, followed by one binary PCM16 frame
+      {"type": "answer", "turn", "answer", "citations", "model", "session_id"}
+      {"type": "turn_done", "turn", "metrics"}   metrics.time_to_first_audio_ms is measured from the end of speech
+      {"type": "turn_cancelled", "turn"}         the user spoke over the answer (barge_in=true)
+      {"type": "error", "turn", "detail", "status"}
+    {"type": "end"} from the client finishes pending turns, sends {"type": "done"} and closes.
+    An unknown session_id gets {"type": "error", "detail", "status": 404} and the socket is closed.
+    """
+    await websocket.accept()
+    rag_service = get_rag_service()
+    if session_id and rag_service.sessions.find(session_id) is None:
+        await websocket.send_json({"type": "error", "detail": f"Unknown session: {session_id}", "status": 404})
+        await websocket.close(code=1008)
+        return
+    stt_service = get_stt_service()
+    tts_service = get_tts_service()
+    segmenter = UtteranceSegmenter()
+    mode = "chat" if chat_mode else "rag"
+    utterances: asyncio.Queue = asyncio.Queue()
+    send_lock = asyncio.Lock()  # keeps each audio header adjacent to its binary frame
+    state = {"turn": 0, "active": None}
+
+    def elapsed_ms(ended_at: float, silence_ms: float) -> float:
+        return round(silence_ms + (time.perf_counter() - ended_at) * 1000, 1)
+
+    async def send_json(message: dict):
+        async with send_lock:
+            await websocket.send_json(message)
+
+    async def speak(turn: int, sentences: asyncio.Queue, control: dict, metrics: dict, ended_at: float,
+                    silence_ms: float, spoken_language: str):
+        segment = 0
+        while True:
+            sentence = await sentences.get()
+            if sentence is None or control["cancelled"]:
+                return
+            audio = await run_in_threadpool(tts_service.synthesize, sentence, None, spoken_language)
+            if control["cancelled"]:
+                return
+            async with send_lock:
+                await websocket.send_json(
+                    {"type": "audio", "turn": turn, "segment": segment, "text": sentence, "sample_rate": TTS_SAMPLE_RATE}
+                )
+                await websocket.send_bytes(_pcm16(audio))
+            if segment == 0:
+                metrics["time_to_first_audio_ms"] = elapsed_ms(ended_at, silence_ms)
+            segment += 1
+            metrics["segments"] = segment
+
+    async def run_turn(turn: int, audio, ended_at: float, silence_ms: float, control: dict):
+        metrics = {"segments": 0}
+        started = time.perf_counter()
+        text, spoken_language = await run_in_threadpool(stt_service.transcribe_with_language, audio, language)
+        metrics["stt_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        await send_json({
+            "type": "transcript", "turn": turn, "text": text, "language": spoken_language, "stt_ms": metrics["stt_ms"],
+        })
+        if not text.strip():
+            await send_json({"type": "turn_done", "turn": turn, "metrics": metrics})
+            return
+
+        sentences: asyncio.Queue = asyncio.Queue()
+        speaker = asyncio.create_task(speak(turn, sentences, control, metrics, ended_at, silence_ms, spoken_language))
+        accumulator = SentenceAccumulator()
+        response = None
+        genkey = f"VOX{uuid.uuid4().hex[:12]}"
+        events = rag_service.stream_question(
+            text, mode=mode, read_screen=read_screen, priority=PRIORITY_VOICE, session_id=session_id, genkey=genkey
+        )
+        # A generator can't be closed while another thread is inside next(); the lock makes close() wait.
+        events_lock = threading.Lock()
+
+        def next_event():
+            with events_lock:
+                return next(events, None)
+
+        def close_events():
+            with events_lock:
+                events.close()
+
+        try:
+            while not control["cancelled"]:
+                event = await run_in_threadpool(next_event)
+                if event is None:
+                    break
+                kind, value = event
+                if kind == "token":
+                    metrics.setdefault("time_to_first_token_ms", elapsed_ms(ended_at, silence_ms))
+                    await send_json({"type": "token", "turn": turn, "text": value})
+                    for sentence in accumulator.feed(value):
+                        sentences.put_nowait(sentence)
+                elif kind == "done":
+                    response = value
+            if not control["cancelled"]:
+                for sentence in accumulator.flush():
+                    sentences.put_nowait(sentence)
+        finally:
+            sentences.put_nowait(None)
+            if response is None:
+                # Cut short (barge-in, disconnect or error): stop the generation so the backend is freed
+                # now; this also ends an in-flight next() that is waiting for the next token.
+                await run_in_threadpool(rag_service.llm_service.abort_stream, genkey)
+            await run_in_threadpool(close_events)
+        await speaker
+
+        if control["cancelled"]:
+            await send_json({"type": "turn_cancelled", "turn": turn})
+            return
+        if response is not None:
+            await send_json({
+                "type": "answer", "turn": turn, "answer": response.answer, "citations": response.citations,
+                "model": response.model, "session_id": response.session_id,
+            })
+        metrics["total_ms"] = elapsed_ms(ended_at, silence_ms)
+        logger.info(
+            f"Voice turn {turn}: first audio after {metrics.get('time_to_first_audio_ms')} ms "
+            f"(STT {metrics['stt_ms']} ms, first token {metrics.get('time_to_first_token_ms')} ms)"
+        )
+        await send_json({"type": "turn_done", "turn": turn, "metrics": metrics})
+
+    async def run_turns():
+        while True:
+            item = await utterances.get()
+            if item is None:
+                return
+            turn, audio, ended_at, silence_ms = item
+            control = {"cancelled": False}
+            state["active"] = (turn, control)
             try:
-                os.remove(temp_file_path)
+                await run_turn(turn, audio, ended_at, silence_ms, control)
+            except UnknownSessionError as e:
+                await send_json({"type": "error", "turn": turn, "detail": str(e), "status": 404})
+            except LLMUnavailableError as e:
+                await send_json({"type": "error", "turn": turn, "detail": str(e), "status": 503, "retry_after": e.retry_after})
+            except LLMOverloadedError as e:
+                await send_json({"type": "error", "turn": turn, "detail": str(e), "status": 429, "retry_after": e.retry_after})
+            except WebSocketDisconnect:
+                return
             except Exception as e:
-                pass
+                logger.error(f"Voice turn {turn} failed: {e}")
+                await send_json({"type": "error", "turn": turn, "detail": str(e), "status": 500})
+            finally:
+                state["active"] = None
+
+    async def handle(events, silence_ms: float):
+        for kind, audio in events:
+            if kind == "start":
+                state["turn"] += 1
+                if barge_in and state["active"] is not None:
+                    state["active"][1]["cancelled"] = True
+                await send_json({"type": "speech_start", "turn": state["turn"]})
+            elif kind == "end":
+                utterances.put_nowait((state["turn"], audio, time.perf_counter(), silence_ms))
+
+    turns_task = asyncio.create_task(run_turns())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                await handle(segmenter.feed(pcm16_to_float32(message["bytes"], sample_rate)), segmenter.end_silence_ms)
+            elif message.get("text"):
+                control = json.loads(message["text"])
+                if control.get("type") == "end":
+                    await handle(segmenter.flush(), 0)
+                    utterances.put_nowait(None)
+                    await turns_task
+                    await send_json({"type": "done"})
+                    await websocket.close()
+                    return
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Voice stream error: {e}")
+        await send_json({"type": "error", "detail": str(e), "status": 500})
+        await websocket.close(code=1011)
+    finally:
+        turns_task.cancel()
+        # Let a cut-short turn finish its cleanup (abort the generation, close the stream) before returning.
+        await asyncio.gather(turns_task, return_exceptions=True)
@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
+from starlette.concurrency import run_in_threadpool
 
 from src.core.logging import setup_logging
 from src.api import health, document, qa, voice, safety, screen
@@ -36,8 +37,21 @@ def create_app() -> FastAPI:
 
     @app.on_event("startup")
     async def startup_event():
+        # Build the LLM service (and its background health monitor) before the first request arrives.
+        # Its constructor probes the backends over HTTP, so it runs in the threadpool, off the event loop.
+        from src.services.llm_service import get_llm_service
+        await run_in_threadpool(get_llm_service)
+        # Loads and exercises the WARMUP_MODELS, then precomputes the canned TTS phrases, in background
+        # threads; GET /health/ready reports when the models are warm.
+        from src.services.warmup import start_warmup
+        start_warmup()
         logger.info("VoxVeritas Application successfully started.")
 
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        from src.services.model_workers import close_worker_pools
+        close_worker_pools()
+
     # Mount static files at the root (MUST be last so API routes take priority)
     import os
     os.makedirs("src/static", exist_ok=True)
@@ -0,0 +1,143 @@
+import bisect
+import itertools
+import math
+import threading
+import time
+from loguru import logger
+
+# Lower value = served first.
+PRIORITY_VOICE = 0
+PRIORITY_TEXT = 1
+PRIORITY_BACKGROUND = 2
+
+EWMA_ALPHA = 0.3
+
+
+class LLMOverloadedError(RuntimeError):
+    """Raised when a generation is shed because the queue is full or it would miss its deadline."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    def __init__(self, queue: "AdmissionQueue", enqueued_at: float):
+        self.queue = queue
+        self.enqueued_at = enqueued_at
+        self.admitted_at = None
+
+    def __enter__(self) -> "_Ticket":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.queue.release(self)
+        return False
+
+
+class AdmissionQueue:
+    """
+    Bounded priority queue in front of one mode's generations.
+    At most max_concurrency generations run at once; the rest wait ordered by (priority, arrival).
+    A request is rejected up front if the queue is full, or if its estimated queue wait plus a
+    typical generation time would exceed its deadline; it is also dropped if the deadline passes
+    while it is still queued.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting: list[tuple[int, int, _Ticket]] = []
+        self._seq = itertools.count()
+        self.ewma_service_s = None
+        self.ewma_wait_s = None
+        self.stats = {"admitted": 0, "rejected_queue_full": 0, "shed_deadline": 0, "max_wait_ms": 0.0}
+
+    def _estimated_wait(self, ahead: int) -> float:
+        """Seconds until a request with `ahead` queued requests in front of it would start."""
+        if self._active < self.max_concurrency and ahead == 0:
+            return 0.0
+        if self.ewma_service_s is None:
+            return 0.0
+        return (ahead // self.max_concurrency + 1) * self.ewma_service_s
+
+    def acquire(self, priority: int, deadline_s: float) -> _Ticket:
+        now = time.monotonic()
+        ticket = _Ticket(self, now)
+        with self._cond:
+            if self._active < self.max_concurrency and not self._waiting:
+                return self._admit(ticket)
+
+            if len(self._waiting) >= self.max_queue:
+                self.stats["rejected_queue_full"] += 1
+                retry_after = math.ceil(self._estimated_wait(len(self._waiting)) or 1)
+                raise LLMOverloadedError(
+                    f"LLM queue for '{self.name}' is full ({self.max_queue} waiting). Try again shortly.",
+                    retry_after=retry_after,
+                )
+
+            ahead = sum(1 for p, _, _ in self._waiting if p <= priority)
+            estimate = self._estimated_wait(ahead) + (self.ewma_service_s or 0.0)
+            if estimate > deadline_s:
+                self.stats["shed_deadline"] += 1
+                raise LLMOverloadedError(
+                    f"Estimated completion in {estimate:.1f}s exceeds the {deadline_s:.1f}s deadline.",
+                    retry_after=max(1, math.ceil(estimate - deadline_s)),
+                )
+
+            entry = (priority, next(self._seq), ticket)
+            bisect.insort(self._waiting, entry)
+            deadline_at = now + deadline_s
+            while not (self._waiting[0] is entry and self._active < self.max_concurrency):
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(entry)
+                    self.stats["shed_deadline"] += 1
+                    self._cond.notify_all()
+                    raise LLMOverloadedError(
+                        f"Deadline of {deadline_s:.1f}s passed while queued for '{self.name}'.",
+                        retry_after=max(1, math.ceil(self.ewma_service_s or 1)),
+                    )
+                self._cond.wait(timeout=remaining)
+            self._waiting.pop(0)
+            return self._admit(ticket)
+
+    def _admit(self, ticket: _Ticket) -> _Ticket:
+        ticket.admitted_at = time.monotonic()
+        wait_s = ticket.admitted_at - ticket.enqueued_at
+        self._active += 1
+        self.stats["admitted"] += 1
+        self.stats["max_wait_ms"] = max(self.stats["max_wait_ms"], wait_s * 1000)
+        self.ewma_wait_s = wait_s if self.ewma_wait_s is None else self.ewma_wait_s + EWMA_ALPHA * (wait_s - self.ewma_wait_s)
+        if wait_s > 1:
+            logger.debug(f"LLM request for '{self.name}' waited {wait_s:.2f}s in queue")
+        # Let the next waiter re-check whether it is now at the head with a free slot.
+        self._cond.notify_all()
+        return ticket
+
+    def release(self, ticket: _Ticket):
+        with self._cond:
+            self._active -= 1
+            service_s = time.monotonic() - ticket.admitted_at
+            if self.ewma_service_s is None:
+                self.ewma_service_s = service_s
+            else:
+                self.ewma_service_s += EWMA_ALPHA * (service_s - self.ewma_service_s)
+            self._cond.notify_all()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            stats = dict(self.stats)
+            stats["max_wait_ms"] = round(stats["max_wait_ms"], 1)
+            stats.update({
+                "active": self._active,
+                "queued": len(self._waiting),
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "avg_wait_ms": round(self.ewma_wait_s * 1000, 1) if self.ewma_wait_s is not None else None,
+                "avg_service_ms": round(self.ewma_service_s * 1000, 1) if self.ewma_service_s is not None else None,
+            })
+            return stats
@@ -0,0 +1,71 @@
+import io
+import os
+import subprocess
+import numpy as np
+import soundfile as sf
+from loguru import logger
+from src.services.streaming_stt import SAMPLE_RATE
+
+# Containers libsndfile decodes in-process; everything else (mp3, m4a, webm, ...) is piped through ffmpeg.
+SOUNDFILE_EXTENSIONS = {".wav", ".flac", ".ogg"}
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+FFMPEG_TIMEOUT_SECONDS = float(os.getenv("FFMPEG_TIMEOUT_SECONDS", "30"))
+RESAMPLE_TAPS = 64
+
+
+class AudioDecodeError(ValueError):
+    pass
+
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Resamples mono float32 audio; when downsampling, a windowed-sinc low-pass prevents aliasing."""
+    if from_rate == to_rate or not len(samples):
+        return samples.astype(np.float32, copy=False)
+    if to_rate < from_rate:
+        cutoff = 0.9 * to_rate / from_rate  # fraction of the source Nyquist frequency
+        n = np.arange(RESAMPLE_TAPS + 1) - RESAMPLE_TAPS / 2
+        taps = cutoff * np.sinc(cutoff * n) * np.hamming(RESAMPLE_TAPS + 1)
+        samples = np.convolve(samples, taps / taps.sum(), mode="same")
+    n_out = int(round(len(samples) * to_rate / from_rate))
+    positions = np.linspace(0, len(samples) - 1, n_out)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def _decode_soundfile(data: bytes) -> np.ndarray:
+    samples, rate = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+    return resample(samples.mean(axis=1), rate)
+
+
+def _decode_ffmpeg(data: bytes) -> np.ndarray:
+    command = [
+        FFMPEG_BINARY, "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+        "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1",
+    ]
+    try:
+        result = subprocess.run(command, input=data, capture_output=True, timeout=FFMPEG_TIMEOUT_SECONDS)
+    except FileNotFoundError as e:
+        raise AudioDecodeError(f"'{FFMPEG_BINARY}' is required to decode this audio format but was not found") from e
+    except subprocess.TimeoutExpired as e:
+        raise AudioDecodeError("ffmpeg timed out decoding audio") from e
+    if result.returncode != 0:
+        raise AudioDecodeError(f"ffmpeg could not decode audio: {result.stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(result.stdout, dtype=np.float32).copy()
+
+
+def decode_audio(data: bytes, filename: str = "") -> np.ndarray:
+    """
+    Decodes an encoded audio file held in memory to 16 kHz mono float32 samples, ready for Whisper.
+    WAV/FLAC/OGG are decoded in-process; other formats (or files libsndfile rejects) go through an
+    ffmpeg pipe, so nothing touches the disk either way.
+    """
+    if not data:
+        raise AudioDecodeError("Audio file is empty")
+
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in SOUNDFILE_EXTENSIONS:
+        try:
+            return _decode_soundfile(data)
+        except RuntimeError as e:  # soundfile.LibsndfileError
+            # e.g. Opus-in-OGG with an older libsndfile; let ffmpeg try before giving up.
+            logger.debug(f"libsndfile could not decode {filename!r} ({e}); falling back to ffmpeg")
+    return _decode_ffmpeg(data)
@@ -0,0 +1,67 @@
+import io
+import os
+import numpy as np
+import soundfile as sf
+
+# Synthesized speech is encoded in memory in the codec the client asks for via its Accept header.
+# media type -> (libsndfile format, subtype, file extension)
+AUDIO_FORMATS = {
+    "audio/wav": ("WAV", "PCM_16", "wav"),
+    "audio/flac": ("FLAC", "PCM_16", "flac"),
+    "audio/ogg": ("OGG", "OPUS", "ogg"),
+    "audio/mpeg": ("MP3", "MPEG_LAYER_III", "mp3"),
+}
+AUDIO_ALIASES = {
+    "audio/x-wav": "audio/wav",
+    "audio/wave": "audio/wav",
+    "audio/x-flac": "audio/flac",
+    "audio/opus": "audio/ogg",
+    "audio/mp3": "audio/mpeg",
+}
+# Used when the client accepts any audio (or sends no audio type); WAV keeps older clients working.
+TTS_DEFAULT_AUDIO_FORMAT = os.getenv("TTS_DEFAULT_AUDIO_FORMAT", "audio/wav")
+
+
+def parse_accept(header: str | None) -> list[tuple[str, float]]:
+    """Media ranges from an Accept header, highest quality first (ties keep header order)."""
+    ranges = []
+    for item in (header or "").split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        if not media_type:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges.append((media_type.lower(), q))
+    return sorted(ranges, key=lambda r: -r[1])
+
+
+def accepts(header: str | None, media_type: str) -> bool:
+    return any(candidate == media_type and q > 0 for candidate, q in parse_accept(header))
+
+
+def negotiate_audio_format(header: str | None) -> str:
+    """Picks the preferred supported audio media type from an Accept header."""
+    for candidate, q in parse_accept(header):
+        if q <= 0:
+            continue
+        candidate = AUDIO_ALIASES.get(candidate, candidate)
+        if candidate in AUDIO_FORMATS:
+            return candidate
+    return TTS_DEFAULT_AUDIO_FORMAT
+
+
+def encode_audio(audio: np.ndarray, sample_rate: int, media_type: str) -> bytes:
+    fmt, subtype, _ = AUDIO_FORMATS[media_type]
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, sample_rate, format=fmt, subtype=subtype)
+    return buffer.getvalue()
+
+
+def audio_extension(media_type: str) -> str:
+    return AUDIO_FORMATS[media_type][2]
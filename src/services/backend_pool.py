@@ -0,0 +1,190 @@
+import math
+import os
+import threading
+import time
+import requests
+from loguru import logger
+
+KOBOLDCPP_EJECT_AFTER_FAILURES = int(os.getenv("KOBOLDCPP_EJECT_AFTER_FAILURES", "3"))
+KOBOLDCPP_EJECT_SECONDS = float(os.getenv("KOBOLDCPP_EJECT_SECONDS", "30"))
+LATENCY_EWMA_ALPHA = 0.3
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class LLMUnavailableError(RuntimeError):
+    """Raised without any network call when no backend of a mode can take requests."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_backend_urls(value: str) -> list[str]:
+    """Splits a comma-separated list of KoboldCpp base URLs."""
+    return [url.strip().rstrip("/") for url in value.split(",") if url.strip()]
+
+
+def is_backend_failure(exc: BaseException) -> bool:
+    """Connection errors, timeouts and 5xx responses count against a backend; 4xx do not."""
+    if isinstance(exc, requests.HTTPError):
+        response = exc.response
+        return response is None or response.status_code >= 500
+    return isinstance(exc, requests.RequestException)
+
+
+class Backend:
+    """
+    One KoboldCpp instance with load tracking and a circuit breaker.
+    closed: takes traffic. open: fails fast until the cooldown ends or a health probe succeeds.
+    half_open: cooldown ended and a single trial request is in flight.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.state = CLOSED
+        self.open_until = 0.0
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ewma_latency_ms = None
+        self.last_latency_ms = None
+        self.last_probe_ok = None
+        # Model reported by /api/v1/model; None until a probe reads it (reset when a probe fails).
+        self.model_id = None
+        # Prompt most recently sent here; KoboldCpp reuses its KV cache for the prefix shared with it.
+        self.last_prompt = None
+
+    def snapshot(self, now: float) -> dict:
+        return {
+            "url": self.url,
+            "state": self.state,
+            "healthy": self.state == CLOSED,
+            "last_probe_ok": self.last_probe_ok,
+            "model_id": self.model_id,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "open_for_s": round(max(self.open_until - now, 0.0), 1) if self.state == OPEN else 0.0,
+            "ewma_latency_ms": round(self.ewma_latency_ms, 1) if self.ewma_latency_ms is not None else None,
+            "last_latency_ms": round(self.last_latency_ms, 1) if self.last_latency_ms is not None else None,
+        }
+
+
+class _Lease:
+    """Context manager holding one outstanding request slot on a backend."""
+
+    def __init__(self, pool: "BackendPool", backend: Backend):
+        self.pool = pool
+        self.backend = backend
+        self.started = time.monotonic()
+
+    def __enter__(self) -> Backend:
+        return self.backend
+
+    def __exit__(self, exc_type, exc, tb):
+        failed = exc is not None and isinstance(exc, Exception) and is_backend_failure(exc)
+        # A stream the consumer stopped early says nothing about the backend's latency.
+        elapsed_s = None if exc_type is GeneratorExit else time.monotonic() - self.started
+        self.pool.release(self.backend, elapsed_s, failed)
+        return False
+
+
+class BackendPool:
+    """
+    Routes requests across KoboldCpp backends by least outstanding requests.
+    A backend's circuit opens after KOBOLDCPP_EJECT_AFTER_FAILURES consecutive request failures
+    or a failed health probe, and stays open for KOBOLDCPP_EJECT_SECONDS. After that one trial
+    request is let through (half-open); its outcome closes or re-opens the circuit.
+    When every circuit is open, acquire() raises LLMUnavailableError immediately.
+    """
+
+    def __init__(self, backends: list[Backend], lock: threading.Lock):
+        if not backends:
+            raise ValueError("BackendPool needs at least one backend")
+        self.backends = backends
+        self._lock = lock
+
+    def _open(self, backend: Backend, reason: str):
+        backend.state = OPEN
+        backend.open_until = time.monotonic() + KOBOLDCPP_EJECT_SECONDS
+        logger.warning(
+            f"KoboldCpp backend {backend.url} taken out of rotation for {KOBOLDCPP_EJECT_SECONDS:.0f}s: {reason}"
+        )
+
+    def _close(self, backend: Backend):
+        if backend.state != CLOSED:
+            logger.info(f"KoboldCpp backend {backend.url} recovered and re-admitted.")
+        backend.state = CLOSED
+        backend.consecutive_failures = 0
+
+    def has_available_backend(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            return any(b.state == CLOSED or (b.state == OPEN and now >= b.open_until) for b in self.backends)
+
+    def acquire(self) -> _Lease:
+        with self._lock:
+            now = time.monotonic()
+            candidates = [b for b in self.backends if b.state == CLOSED]
+            if not candidates:
+                recoverable = [b for b in self.backends if b.state == OPEN and now >= b.open_until]
+                if not recoverable:
+                    waits = [b.open_until - now for b in self.backends if b.state == OPEN]
+                    retry_after = max(1, math.ceil(min(waits))) if waits else 1
+                    raise LLMUnavailableError(
+                        "All KoboldCpp backends are unavailable. "
+                        "Launch KoboldCpp with your GPU-enabled settings and try again.",
+                        retry_after=retry_after,
+                    )
+                candidates = recoverable[:1]
+                candidates[0].state = HALF_OPEN
+            backend = min(
+                candidates,
+                key=lambda b: (b.outstanding, b.ewma_latency_ms if b.ewma_latency_ms is not None else 0.0),
+            )
+            backend.outstanding += 1
+            backend.requests += 1
+        return _Lease(self, backend)
+
+    def release(self, backend: Backend, elapsed_s: float | None, failed: bool):
+        with self._lock:
+            backend.outstanding -= 1
+            if failed:
+                backend.failures += 1
+                backend.consecutive_failures += 1
+                if backend.state == HALF_OPEN:
+                    self._open(backend, "trial request failed")
+                elif backend.state == CLOSED and backend.consecutive_failures >= KOBOLDCPP_EJECT_AFTER_FAILURES:
+                    self._open(backend, f"{backend.consecutive_failures} consecutive failures")
+                return
+
+            self._close(backend)
+            if elapsed_s is None:
+                return
+            latency_ms = elapsed_s * 1000
+            backend.last_latency_ms = latency_ms
+            if backend.ewma_latency_ms is None:
+                backend.ewma_latency_ms = latency_ms
+            else:
+                backend.ewma_latency_ms += LATENCY_EWMA_ALPHA * (latency_ms - backend.ewma_latency_ms)
+
+    def record_probe(self, backend: Backend, ok: bool):
+        """Applies a background health probe result to the backend's circuit."""
+        with self._lock:
+            backend.last_probe_ok = ok
+            if not ok:
+                backend.model_id = None
+            if ok and backend.state == OPEN:
+                self._close(backend)
+            elif not ok and backend.state == CLOSED:
+                self._open(backend, "health probe failed")
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            now = time.monotonic()
+            return [b.snapshot(now) for b in self.backends]
@@ -0,0 +1,85 @@
+import os
+import re
+import threading
+from collections import Counter
+from loguru import logger
+
+# Thresholds for keeping a query on the small model; everything else escalates.
+CASCADE_MAX_DISTANCE = float(os.getenv("CASCADE_MAX_DISTANCE", "1.0"))
+CASCADE_MAX_CONTEXT_CHARS = int(os.getenv("CASCADE_MAX_CONTEXT_CHARS", "1800"))
+CASCADE_MAX_QUERY_WORDS = int(os.getenv("CASCADE_MAX_QUERY_WORDS", "24"))
+
+SMALL_MODE = "rag"    # Sarvam-1 2B
+LARGE_MODE = "chat"   # Qwen2.5 3B
+
+OPEN_ENDED_HINTS = (
+    "why", "explain", "compare", "describe", "summarize", "summarise", "discuss", "analyze", "analyse",
+    "difference between", "pros and cons", "what do you think", "opinion", "write", "suggest", "how does",
+    "how do", "how can", "how should",
+)
+
+
+class CascadeRouter:
+    """
+    Picks the cheapest model that should answer a query well.
+    Well-grounded, short, factual questions (close retrieval match, small context) stay on the
+    small RAG model; low-confidence, long or open-ended prompts escalate to the larger chat model.
+    """
+
+    def __init__(
+        self,
+        max_distance: float = CASCADE_MAX_DISTANCE,
+        max_context_chars: int = CASCADE_MAX_CONTEXT_CHARS,
+        max_query_words: int = CASCADE_MAX_QUERY_WORDS,
+    ):
+        self.max_distance = max_distance
+        self.max_context_chars = max_context_chars
+        self.max_query_words = max_query_words
+        self._lock = threading.Lock()
+        self.decisions = Counter()
+        self.reasons = Counter()
+
+    @staticmethod
+    def features(query: str, context_items: list[dict], ocr_context: str = "") -> dict:
+        distances = [item["distance"] for item in context_items if item.get("distance") is not None]
+        q = query.lower()
+        return {
+            "documents": len(context_items),
+            "best_distance": round(min(distances), 4) if distances else None,
+            "context_chars": sum(len(item["text"]) for item in context_items) + len(ocr_context or ""),
+            "query_words": len(query.split()),
+            "open_ended": any(re.search(rf"\b{re.escape(hint)}\b", q) for hint in OPEN_ENDED_HINTS),
+        }
+
+    def route(self, features: dict) -> tuple[str, str]:
+        """Returns (mode, reason) for a feature dict produced by features()."""
+        if features["open_ended"]:
+            mode, reason = LARGE_MODE, "open_ended"
+        elif features["documents"] == 0 or features["best_distance"] is None:
+            mode, reason = LARGE_MODE, "no_grounding"
+        elif features["best_distance"] > self.max_distance:
+            mode, reason = LARGE_MODE, "low_retrieval_confidence"
+        elif features["context_chars"] > self.max_context_chars:
+            mode, reason = LARGE_MODE, "long_context"
+        elif features["query_words"] > self.max_query_words:
+            mode, reason = LARGE_MODE, "long_query"
+        else:
+            mode, reason = SMALL_MODE, "grounded_simple"
+
+        with self._lock:
+            self.decisions[mode] += 1
+            self.reasons[reason] += 1
+        logger.info(f"Cascade routed query to '{mode}' ({reason}): {features}")
+        return mode, reason
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "decisions": dict(self.decisions),
+                "reasons": dict(self.reasons),
+                "thresholds": {
+                    "max_distance": self.max_distance,
+                    "max_context_chars": self.max_context_chars,
+                    "max_query_words": self.max_query_words,
+                },
+            }
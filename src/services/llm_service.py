@@ -1,31 +1,136 @@
 import os
+import json
+import uuid
+import time
+import hashlib
+import threading
 import requests
+from typing import Callable, Iterator
 from loguru import logger
+from src.services.backend_pool import Backend, BackendPool, parse_backend_urls
+from src.services.single_flight import SingleFlight
+from src.services.admission import AdmissionQueue, PRIORITY_TEXT
+from src.services.prompt_templates import PROMPT_TEMPLATES
+from src.services.completion_cache import CompletionCache
 
 KOBOLDCPP_BASE_URL = os.getenv("KOBOLDCPP_BASE_URL", "http://127.0.0.1:5001").rstrip("/")
 KOBOLDCPP_TIMEOUT_SECONDS = int(os.getenv("KOBOLDCPP_TIMEOUT_SECONDS", "240"))
 KOBOLDCPP_CONTEXT_LENGTH = int(os.getenv("KOBOLDCPP_CONTEXT_LENGTH", "4096"))
+# Background liveness probing; 0 disables the monitor thread (circuits then rely on request outcomes only).
+KOBOLDCPP_HEALTH_INTERVAL_SECONDS = float(os.getenv("KOBOLDCPP_HEALTH_INTERVAL_SECONDS", "5"))
+KOBOLDCPP_HEALTH_TIMEOUT_SECONDS = float(os.getenv("KOBOLDCPP_HEALTH_TIMEOUT_SECONDS", "2"))
+# Admission control: concurrent generations per mode (default: one per backend, as KoboldCpp runs
+# requests serially), how many may wait, and the deadline assumed when a caller gives none.
+KOBOLDCPP_MAX_CONCURRENCY_PER_MODE = int(os.getenv("KOBOLDCPP_MAX_CONCURRENCY_PER_MODE", "0"))
+KOBOLDCPP_MAX_QUEUE_PER_MODE = int(os.getenv("KOBOLDCPP_MAX_QUEUE_PER_MODE", "16"))
+KOBOLDCPP_DEFAULT_DEADLINE_SECONDS = float(
+    os.getenv("KOBOLDCPP_DEFAULT_DEADLINE_SECONDS", str(KOBOLDCPP_TIMEOUT_SECONDS))
+)
+# Opt-in persistent completion cache: set a SQLite path to enable it. Only generations at or below
+# the temperature cap are cached, since higher temperatures are meant to vary between calls.
+LLM_COMPLETION_CACHE_PATH = os.getenv("LLM_COMPLETION_CACHE_PATH", "")
+LLM_COMPLETION_CACHE_MAX_MB = float(os.getenv("LLM_COMPLETION_CACHE_MAX_MB", "64"))
+LLM_COMPLETION_CACHE_MAX_TEMPERATURE = float(os.getenv("LLM_COMPLETION_CACHE_MAX_TEMPERATURE", "0.3"))
 
+# Each logical mode maps to its own group of KoboldCpp backends (comma-separated URLs),
+# e.g. Sarvam instances for "rag" and Qwen instances for "chat". Both default to KOBOLDCPP_BASE_URL.
 MODEL_CONFIGS = {
     "rag": {
-        "name": os.getenv("KOBOLDCPP_RAG_MODEL_NAME", "Sarvam-1 2B (RAG Mode)")
+        "name": os.getenv("KOBOLDCPP_RAG_MODEL_NAME", "Sarvam-1 2B (RAG Mode)"),
+        "backends": parse_backend_urls(os.getenv("KOBOLDCPP_RAG_URLS", KOBOLDCPP_BASE_URL)),
     },
     "chat": {
-        "name": os.getenv("KOBOLDCPP_CHAT_MODEL_NAME", "Qwen2.5 3B Instruct (Chat Mode)")
+        "name": os.getenv("KOBOLDCPP_CHAT_MODEL_NAME", "Qwen2.5 3B Instruct (Chat Mode)"),
+        "backends": parse_backend_urls(os.getenv("KOBOLDCPP_CHAT_URLS", KOBOLDCPP_BASE_URL)),
     }
 }
 
 class LLMService:
-    """Service for interacting with an external KoboldCpp server via HTTP."""
+    """
+    Service for interacting with external KoboldCpp servers via HTTP.
+    Requests are load-balanced across the backend group of the requested mode.
+    Backend liveness is tracked by a background health monitor plus per-backend circuit breakers,
+    so the request path never spends a round trip on health checks.
+    Passing base_url pins every mode to that single server.
+    """
 
-    def __init__(self, default_mode: str = "rag"):
+    def __init__(
+        self,
+        default_mode: str = "rag",
+        base_url: str | None = None,
+        health_interval: float = KOBOLDCPP_HEALTH_INTERVAL_SECONDS,
+        completion_cache_path: str | None = LLM_COMPLETION_CACHE_PATH,
+    ):
         self.current_mode = None
         self.compute_backend = "koboldcpp"
-        self.connected = False
         self.session = requests.Session()
+        self._pool_lock = threading.Lock()
+        self.backends: dict[str, Backend] = {}
+        self.pools: dict[str, BackendPool] = {}
+        for mode, config in MODEL_CONFIGS.items():
+            urls = [base_url.rstrip("/")] if base_url else config["backends"]
+            # Backends are shared between modes that point at the same server so load is counted once.
+            members = [self.backends.setdefault(url, Backend(url)) for url in urls]
+            self.pools[mode] = BackendPool(members, self._pool_lock)
+        self.admission: dict[str, AdmissionQueue] = {
+            mode: AdmissionQueue(
+                mode,
+                max_concurrency=KOBOLDCPP_MAX_CONCURRENCY_PER_MODE or len(pool.backends),
+                max_queue=KOBOLDCPP_MAX_QUEUE_PER_MODE,
+            )
+            for mode, pool in self.pools.items()
+        }
+        # Identical concurrent generations (same payload + mode) share one upstream request.
+        self._inflight = SingleFlight()
+        self.completion_cache = None
+        if completion_cache_path:
+            self.completion_cache = CompletionCache(
+                completion_cache_path, max_bytes=int(LLM_COMPLETION_CACHE_MAX_MB * 1024 * 1024)
+            )
+            logger.info(f"LLM completion cache enabled at {completion_cache_path}")
+        self._stats_lock = threading.Lock()
+        self._streams: dict[str, str] = {}  # genkey -> backend URL of each running streamed generation
+        self._aborted_streams: set[str] = set()  # genkeys stopped by abort_stream, counted as stopped early
+        self.generation_stats = {
+            "streamed_generations": 0,
+            "early_stopped": 0,
+            "tokens_generated": 0,
+            "tokens_saved": 0,
+        }
+        self.prompt_stats = {
+            mode: {
+                "requests": 0,
+                "prefix_hits": 0,
+                "prompt_chars": 0,
+                "reused_chars": 0,
+                "prefill_ms_total_hit": 0.0,
+                "prefill_samples_hit": 0,
+                "prefill_ms_total_miss": 0.0,
+                "prefill_samples_miss": 0,
+            }
+            for mode in MODEL_CONFIGS
+        }
         self.load_model(default_mode)
 
-    def _ping_server(self) -> bool:
+        # Initial probe happens once here (service construction), never per request.
+        self._probe_backends()
+        self._log_connection_state()
+        self._stop_monitor = threading.Event()
+        self._monitor_thread = None
+        if health_interval > 0:
+            self._monitor_thread = threading.Thread(
+                target=self._health_monitor_loop, args=(health_interval,), name="llm-health-monitor", daemon=True
+            )
+            self._monitor_thread.start()
+
+    @property
+    def connected(self) -> bool:
+        """True while at least one backend of the current mode can take requests."""
+        if not self.current_mode:
+            return False
+        return self.pools[self.current_mode].has_available_backend()
+
+    def _ping_backend(self, base_url: str) -> bool:
         health_paths = [
             "/api/extra/version",
             "/api/v1/model",
@@ -34,7 +139,7 @@ class LLMService:
         for path in health_paths:
             try:
                 response = self.session.get(
-                    f"{KOBOLDCPP_BASE_URL}{path}", timeout=min(10, KOBOLDCPP_TIMEOUT_SECONDS)
+                    f"{base_url}{path}", timeout=min(KOBOLDCPP_HEALTH_TIMEOUT_SECONDS, KOBOLDCPP_TIMEOUT_SECONDS)
                 )
                 if response.ok:
                     return True
@@ -42,62 +147,181 @@ class LLMService:
                 continue
         return False
 
-    def load_model(self, mode: str):
-        """Selects logical mode; actual model should be loaded in KoboldCpp server."""
-        if mode not in MODEL_CONFIGS:
-            raise ValueError(f"Unknown model mode: {mode}")
+    def _fetch_model_id(self, base_url: str) -> str | None:
+        try:
+            response = self.session.get(f"{base_url}/api/v1/model", timeout=KOBOLDCPP_HEALTH_TIMEOUT_SECONDS)
+            if response.ok:
+                return response.json().get("result")
+        except Exception:
+            pass
+        return None
 
-        config = MODEL_CONFIGS[mode]
-        self.current_mode = mode
-        self.connected = self._ping_server()
+    def _probe_backends(self):
+        """Probes every configured backend once and feeds the results into their circuit breakers."""
+        for pool in self.pools.values():
+            for backend in pool.backends:
+                ok = self._ping_backend(backend.url)
+                pool.record_probe(backend, ok)
+                if ok and backend.model_id is None:
+                    backend.model_id = self._fetch_model_id(backend.url)
+
+    def _health_monitor_loop(self, interval: float):
+        while not self._stop_monitor.wait(interval):
+            was_connected = self.connected
+            try:
+                self._probe_backends()
+            except Exception as e:
+                logger.warning(f"LLM health monitor probe round failed: {e}")
+            if self.connected != was_connected:
+                self._log_connection_state()
+
+    def _log_connection_state(self):
+        mode = self.current_mode
+        urls = ", ".join(backend.url for backend in self.pools[mode].backends)
         if self.connected:
-            logger.success(f"KoboldCpp reachable at {KOBOLDCPP_BASE_URL} (mode={mode}, model={config['name']})")
+            logger.success(f"KoboldCpp reachable at {urls} (mode={mode}, model={MODEL_CONFIGS[mode]['name']})")
         else:
             logger.warning(
-                f"KoboldCpp not reachable at {KOBOLDCPP_BASE_URL}. "
+                f"KoboldCpp not reachable at {urls}. "
                 "Start KoboldCpp server before querying /chat or /ask."
             )
 
+    def close(self):
+        """Stops the background health monitor and closes the completion cache."""
+        self._stop_monitor.set()
+        if self._monitor_thread:
+            self._monitor_thread.join(timeout=5)
+        if self.completion_cache is not None:
+            self.completion_cache.close()
+
+    def load_model(self, mode: str):
+        """Selects logical mode; actual model should be loaded in KoboldCpp server."""
+        if mode not in MODEL_CONFIGS:
+            raise ValueError(f"Unknown model mode: {mode}")
+        if mode != self.current_mode:
+            logger.debug(f"Switching LLM mode to {mode} ({MODEL_CONFIGS[mode]['name']})")
+        self.current_mode = mode
+
     def get_current_model_info(self) -> dict:
         """Returns metadata about the active model."""
         if self.current_mode:
-            info = dict(MODEL_CONFIGS[self.current_mode])
+            info = {"name": MODEL_CONFIGS[self.current_mode]["name"]}
             info["mode"] = self.current_mode
             info["compute_backend"] = self.compute_backend
             info["connected"] = self.connected
             return info
         return {"name": "None", "mode": "none", "compute_backend": "koboldcpp", "connected": False}
 
-    def generate_response(self, prompt: str, mode: str = "rag", max_tokens: int = 512, temperature: float = 0.7) -> str:
-        """Generate a completion via KoboldCpp /api/v1/generate."""
-        if mode != self.current_mode:
-            self.load_model(mode)
+    @staticmethod
+    def _build_payload(prompt: str, max_tokens: int, temperature: float) -> dict:
+        return {
+            "prompt": prompt,
+            "max_context_length": KOBOLDCPP_CONTEXT_LENGTH,
+            "max_length": max_tokens,
+            "temperature": temperature,
+            "top_p": 0.92,
+            "top_k": 40,
+            "rep_pen": 1.1,
+            "stop_sequence": ["<|im_end|>", "<|endoftext|>", "<|eot_id|>"],
+        }
 
-        if not self.connected and not self._ping_server():
-            raise RuntimeError(
-                f"KoboldCpp server is not reachable at {KOBOLDCPP_BASE_URL}. "
-                "Launch KoboldCpp with your GPU-enabled settings and try again."
-            )
-        self.connected = True
+    def generate_response(
+        self,
+        prompt: str,
+        mode: str = "rag",
+        max_tokens: int = 512,
+        temperature: float = 0.7,
+        stop_condition: Callable[[str], bool] | None = None,
+        priority: int = PRIORITY_TEXT,
+        deadline_s: float | None = None,
+        trace: dict | None = None,
+    ) -> str:
+        """
+        Generate a completion via KoboldCpp /api/v1/generate.
+        If stop_condition is given, the completion is streamed instead and generation is aborted
+        server-side as soon as stop_condition(text_so_far) returns True.
+        Concurrent calls with an identical payload are coalesced into a single upstream generation.
+        Generations wait in the mode's admission queue (voice before text); LLMOverloadedError is
+        raised when the queue is full or the request would miss deadline_s.
+        With the completion cache enabled, low-temperature results are reused across restarts.
+        A trace dict, if given, records `completion_cache_hit` (None when not eligible) and `coalesced`.
+        """
+        trace = trace if trace is not None else {}
+        trace["completion_cache_hit"] = None
+        trace["coalesced"] = False
+        key = self._payload_key(prompt, mode, max_tokens, temperature, stop_condition)
+        model_id = self._model_identity(mode) if temperature <= LLM_COMPLETION_CACHE_MAX_TEMPERATURE else None
+        cache_key = None
+        if self.completion_cache is not None and model_id:
+            cache_key = hashlib.sha256(f"{model_id}\n{key}".encode("utf-8")).hexdigest()
+            cached = self.completion_cache.get(cache_key)
+            trace["completion_cache_hit"] = cached is not None
+            if cached is not None:
+                logger.debug(f"Completion cache hit for {mode} generation ({model_id})")
+                return cached
 
-        try:
-            payload = {
+        executed = []
+
+        def generate() -> str:
+            executed.append(True)
+            text = self._generate_once(prompt, mode, max_tokens, temperature, stop_condition, priority, deadline_s)
+            if cache_key is not None and text:
+                self.completion_cache.put(cache_key, model_id, text)
+            return text
+
+        text = self._inflight.do(key, generate)
+        trace["coalesced"] = not executed
+        return text
+
+    def _model_identity(self, mode: str) -> str | None:
+        """Models served by a mode's backends as reported by KoboldCpp; None if none has been read yet."""
+        models = sorted({b.model_id for b in self.pools[mode].backends if b.model_id})
+        return "|".join(models) or None
+
+    @staticmethod
+    def _payload_key(
+        prompt: str, mode: str, max_tokens: int, temperature: float, stop_condition: Callable[[str], bool] | None
+    ) -> str:
+        material = json.dumps(
+            {
                 "prompt": prompt,
-                "max_context_length": KOBOLDCPP_CONTEXT_LENGTH,
-                "max_length": max_tokens,
+                "mode": mode,
+                "max_tokens": max_tokens,
                 "temperature": temperature,
-                "top_p": 0.92,
-                "top_k": 40,
-                "rep_pen": 1.1,
-                "stop_sequence": ["<|im_end|>", "<|endoftext|>", "<|eot_id|>"],
-            }
-            response = self.session.post(
-                f"{KOBOLDCPP_BASE_URL}/api/v1/generate",
-                json=payload,
-                timeout=KOBOLDCPP_TIMEOUT_SECONDS,
+                "stop_condition": getattr(stop_condition, "__qualname__", None),
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _generate_once(
+        self,
+        prompt: str,
+        mode: str,
+        max_tokens: int,
+        temperature: float,
+        stop_condition: Callable[[str], bool] | None,
+        priority: int,
+        deadline_s: float | None,
+    ) -> str:
+        if stop_condition is not None:
+            return self._generate_until(
+                prompt, mode, max_tokens, temperature, stop_condition, priority, deadline_s
             )
-            response.raise_for_status()
-            data = response.json()
+
+        self.load_model(mode)
+
+        try:
+            payload = self._build_payload(prompt, max_tokens, temperature)
+            with self._admit(mode, priority, deadline_s), self.pools[mode].acquire() as backend:
+                self._note_prompt(mode, backend, prompt)
+                response = self.session.post(
+                    f"{backend.url}/api/v1/generate",
+                    json=payload,
+                    timeout=KOBOLDCPP_TIMEOUT_SECONDS,
+                )
+                response.raise_for_status()
+                data = response.json()
 
             if isinstance(data, dict):
                 if "results" in data and data["results"]:
@@ -110,6 +334,197 @@ class LLMService:
             logger.error(f"Error during KoboldCpp generation: {e}")
             raise
 
+    def _admit(self, mode: str, priority: int, deadline_s: float | None):
+        if deadline_s is None:
+            deadline_s = KOBOLDCPP_DEFAULT_DEADLINE_SECONDS
+        return self.admission[mode].acquire(priority, deadline_s)
+
+    def _generate_until(
+        self,
+        prompt: str,
+        mode: str,
+        max_tokens: int,
+        temperature: float,
+        stop_condition: Callable[[str], bool],
+        priority: int,
+        deadline_s: float | None,
+    ) -> str:
+        text = ""
+        stream = self.stream_response(
+            prompt, mode=mode, max_tokens=max_tokens, temperature=temperature, priority=priority, deadline_s=deadline_s
+        )
+        try:
+            for token in stream:
+                text += token
+                if stop_condition(text):
+                    break
+        finally:
+            stream.close()
+        return text.strip()
+
+    def stream_response(
+        self,
+        prompt: str,
+        mode: str = "rag",
+        max_tokens: int = 512,
+        temperature: float = 0.7,
+        priority: int = PRIORITY_TEXT,
+        deadline_s: float | None = None,
+        genkey: str | None = None,
+    ) -> Iterator[str]:
+        """
+        Stream a completion token by token via KoboldCpp /api/extra/generate/stream.
+        KoboldCpp answers with Server-Sent Events whose data lines carry {"token": "..."}.
+        Closing the generator early aborts the generation on the server; so does abort_stream(genkey)
+        from another thread, which also ends a read blocked waiting for the next token.
+        """
+        self.load_model(mode)
+
+        payload = self._build_payload(prompt, max_tokens, temperature)
+        payload["genkey"] = genkey or f"VOX{uuid.uuid4().hex[:12]}"
+        with self._admit(mode, priority, deadline_s):
+            tokens_generated = 0
+            stopped_early = False
+            lease = self.pools[mode].acquire()
+            with self._stats_lock:
+                self._streams[payload["genkey"]] = lease.backend.url
+            prefix_hit = self._note_prompt(mode, lease.backend, prompt)
+            sent_at = time.monotonic()
+            try:
+                with lease as backend, self.session.post(
+                    f"{backend.url}/api/extra/generate/stream",
+                    json=payload,
+                    timeout=KOBOLDCPP_TIMEOUT_SECONDS,
+                    stream=True,
+                ) as response:
+                    response.raise_for_status()
+                    for raw_line in response.iter_lines():
+                        if not raw_line:
+                            continue
+                        line = raw_line.decode("utf-8", errors="replace")
+                        if not line.startswith("data:"):
+                            continue
+                        try:
+                            data = json.loads(line[len("data:"):].strip())
+                        except ValueError:
+                            logger.warning(f"Skipping malformed KoboldCpp stream line: {line[:200]}")
+                            continue
+                        token = data.get("token") if isinstance(data, dict) else None
+                        if token:
+                            if tokens_generated == 0:
+                                # Time to first token ~ prompt processing (prefill) time on the backend.
+                                self._record_prefill(mode, prefix_hit, time.monotonic() - sent_at)
+                            tokens_generated += 1
+                            yield token
+            except GeneratorExit:
+                stopped_early = True
+                with self._stats_lock:
+                    already_aborted = payload["genkey"] not in self._streams
+                if not already_aborted:
+                    self._abort_generation(lease.backend.url, payload["genkey"])
+                raise
+            except Exception as e:
+                logger.error(f"Error during KoboldCpp streaming generation: {e}")
+                raise
+            finally:
+                with self._stats_lock:
+                    self._streams.pop(payload["genkey"], None)
+                    if payload["genkey"] in self._aborted_streams:
+                        self._aborted_streams.discard(payload["genkey"])
+                        stopped_early = True
+                self._record_generation(tokens_generated, max_tokens, stopped_early)
+
+    def abort_stream(self, genkey: str) -> bool:
+        """Aborts the running streamed generation with this genkey; False if none is running."""
+        with self._stats_lock:
+            base_url = self._streams.pop(genkey, None)
+            if base_url is None:
+                return False
+            self._aborted_streams.add(genkey)
+        self._abort_generation(base_url, genkey)
+        return True
+
+    def _abort_generation(self, base_url: str, genkey: str):
+        """Ask KoboldCpp to stop a running generation so it frees the GPU/CPU immediately."""
+        try:
+            self.session.post(f"{base_url}/api/extra/abort", json={"genkey": genkey}, timeout=5)
+        except Exception as e:
+            logger.warning(f"Failed to abort KoboldCpp generation {genkey}: {e}")
+
+    def _record_generation(self, tokens_generated: int, max_tokens: int, stopped_early: bool):
+        with self._stats_lock:
+            self.generation_stats["streamed_generations"] += 1
+            self.generation_stats["tokens_generated"] += tokens_generated
+            if stopped_early:
+                # Upper bound: the model might have emitted a stop sequence before max_tokens anyway.
+                saved = max(max_tokens - tokens_generated, 0)
+                self.generation_stats["early_stopped"] += 1
+                self.generation_stats["tokens_saved"] += saved
+                logger.info(f"Generation stopped early after {tokens_generated} tokens (up to {saved} saved).")
+
+    def _note_prompt(self, mode: str, backend: Backend, prompt: str) -> bool:
+        """
+        Records how much of the prompt KoboldCpp can reuse from the previous prompt on this backend.
+        Returns True when the whole static template prefix of the mode is reused.
+        """
+        template = PROMPT_TEMPLATES.get(mode)
+        with self._stats_lock:
+            previous = backend.last_prompt or ""
+            backend.last_prompt = prompt
+            reused = len(os.path.commonprefix([previous, prompt]))
+            hit = template is not None and prompt.startswith(template.static_prefix) and reused >= len(template.static_prefix)
+            stats = self.prompt_stats[mode]
+            stats["requests"] += 1
+            stats["prompt_chars"] += len(prompt)
+            stats["reused_chars"] += reused
+            if hit:
+                stats["prefix_hits"] += 1
+        return hit
+
+    def _record_prefill(self, mode: str, prefix_hit: bool, seconds: float):
+        suffix = "hit" if prefix_hit else "miss"
+        with self._stats_lock:
+            stats = self.prompt_stats[mode]
+            stats[f"prefill_ms_total_{suffix}"] += seconds * 1000
+            stats[f"prefill_samples_{suffix}"] += 1
+
+    def get_prompt_cache_stats(self) -> dict:
+        """Returns per-mode static-prefix reuse hits, reused prompt share and average prefill time."""
+        result = {}
+        with self._stats_lock:
+            for mode, stats in self.prompt_stats.items():
+                result[mode] = {
+                    "requests": stats["requests"],
+                    "prefix_hits": stats["prefix_hits"],
+                    "reused_prompt_ratio": round(stats["reused_chars"] / stats["prompt_chars"], 3) if stats["prompt_chars"] else 0.0,
+                    "avg_prefill_ms_hit": round(stats["prefill_ms_total_hit"] / stats["prefill_samples_hit"], 1) if stats["prefill_samples_hit"] else None,
+                    "avg_prefill_ms_miss": round(stats["prefill_ms_total_miss"] / stats["prefill_samples_miss"], 1) if stats["prefill_samples_miss"] else None,
+                }
+        return result
+
+    def get_generation_stats(self) -> dict:
+        """Returns cumulative streaming/early-stop counters."""
+        with self._stats_lock:
+            return dict(self.generation_stats)
+
+    def get_coalescing_stats(self) -> dict:
+        """Returns how many generate_response calls were served by another caller's in-flight generation."""
+        return self._inflight.snapshot()
+
+    def get_completion_cache_stats(self) -> dict:
+        """Returns persistent completion cache hits, misses, size and evictions."""
+        if self.completion_cache is None:
+            return {"enabled": False}
+        return self.completion_cache.snapshot()
+
+    def get_admission_stats(self) -> dict:
+        """Returns per-mode queue depth, active generations, wait times and shed counts."""
+        return {mode: queue.snapshot() for mode, queue in self.admission.items()}
+
+    def get_backend_stats(self) -> dict:
+        """Returns per-mode backend health, outstanding requests (queue depth) and latency."""
+        return {mode: pool.snapshot() for mode, pool in self.pools.items()}
+
 # Singleton instance
 _instance = None
 
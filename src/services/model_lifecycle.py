@@ -0,0 +1,245 @@
+import gc
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+from loguru import logger
+
+# Resident models (Whisper, Kokoro, the embedder, the WinRT OCR engine) are unloaded after
+# MODEL_IDLE_TTL_SECONDS without use, or least-recently-used first while their combined memory exceeds
+# MODEL_MEMORY_BUDGET_MB, and reloaded by the next request that needs them. 0 disables either limit.
+MODEL_IDLE_TTL_SECONDS = float(os.getenv("MODEL_IDLE_TTL_SECONDS", "0"))
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+MODEL_LIFECYCLE_INTERVAL_SECONDS = float(os.getenv("MODEL_LIFECYCLE_INTERVAL_SECONDS", "30"))
+
+MB = 1024 * 1024
+
+
+def process_rss_bytes() -> int | None:
+    """Resident set size of this process (psutil if installed, else /proc); None where neither works."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def module_bytes(module) -> int:
+    """Parameter and buffer bytes of a torch module (on any device); 0 for anything else."""
+    try:
+        tensors = list(module.parameters()) + list(module.buffers())
+    except AttributeError:
+        return 0
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class ManagedModel:
+    """
+    One model's load state, last use and memory. Callers wrap each use in `with model.use():`, which
+    reloads the model if it was unloaded and keeps it from being unloaded until the block exits.
+    Memory is the larger of the RSS growth measured around load() and `measure()` (e.g. module_bytes).
+    RSS is process-wide, so the growth is only kept when no other model loaded or unloaded meanwhile.
+    """
+
+    def __init__(self, manager: "ModelManager", name: str, load: Callable[[], None], unload: Callable[[], None],
+                 measure: Callable[[], int] = None):
+        self.manager = manager
+        self.name = name
+        self._load = load
+        self._unload = unload
+        self._measure = measure
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.loaded = False
+        self.in_use = 0
+        self.last_used = time.monotonic()
+        self.loads = 0
+        self.unloads = 0
+        self.rss_bytes = None
+        self.measured_bytes = 0
+        self.load_seconds = None
+
+    @property
+    def memory_bytes(self) -> int:
+        return max(self.rss_bytes or 0, self.measured_bytes) if self.loaded else 0
+
+    @contextmanager
+    def use(self):
+        with self._lock:
+            self.in_use += 1
+        try:
+            self.ensure_loaded()
+            yield
+        finally:
+            with self._lock:
+                self.in_use -= 1
+                self.last_used = time.monotonic()
+
+    def ensure_loaded(self):
+        with self._load_lock:
+            if self.loaded:
+                return
+            logger.info(f"Loading model '{self.name}'" + (" (reload)" if self.loads else ""))
+            window = self.manager._begin_load()
+            before = process_rss_bytes()
+            started = time.monotonic()
+            try:
+                self._load()
+            finally:
+                alone = self.manager._end_load(window)
+            self.load_seconds = round(time.monotonic() - started, 2)
+            after = process_rss_bytes()
+            measurable = alone and before is not None and after is not None
+            self.rss_bytes = max(0, after - before) if measurable else None
+            self.measured_bytes = self._measure() if self._measure else 0
+            with self._lock:
+                self.loaded = True
+                self.loads += 1
+                self.last_used = time.monotonic()
+            logger.info(f"Model '{self.name}' loaded in {self.load_seconds}s (~{self.memory_bytes / MB:.0f} MB)")
+        self.manager.enforce_budget(keep=self)
+
+    def try_unload(self, reason: str) -> bool:
+        with self._load_lock:
+            with self._lock:
+                if not self.loaded or self.in_use:
+                    return False
+                self.loaded = False
+            freed = max(self.rss_bytes or 0, self.measured_bytes)
+            self.manager._memory_changed()
+            self._unload()
+            self.unloads += 1
+        _release_memory()
+        logger.info(f"Unloaded model '{self.name}' ({reason}, ~{freed / MB:.0f} MB)")
+        return True
+
+    def snapshot(self, now: float) -> dict:
+        with self._lock:
+            return {
+                "loaded": self.loaded,
+                "in_use": self.in_use,
+                "idle_s": round(now - self.last_used, 1),
+                "memory_mb": round(self.memory_bytes / MB, 1),
+                "rss_delta_mb": round(self.rss_bytes / MB, 1) if self.rss_bytes is not None else None,
+                "weights_mb": round(self.measured_bytes / MB, 1),
+                "loads": self.loads,
+                "unloads": self.unloads,
+                "last_load_s": self.load_seconds,
+            }
+
+
+def _release_memory():
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
+
+
+class ModelManager:
+    """Registry of ManagedModels with a background thread applying the idle TTL and memory budget."""
+
+    def __init__(self, idle_ttl: float = MODEL_IDLE_TTL_SECONDS, budget_mb: float = MODEL_MEMORY_BUDGET_MB,
+                 interval: float = MODEL_LIFECYCLE_INTERVAL_SECONDS):
+        self.idle_ttl = idle_ttl
+        self.budget_bytes = int(budget_mb * MB)
+        self._models: dict[str, ManagedModel] = {}
+        self._lock = threading.Lock()
+        self._loads_in_flight = 0
+        self._memory_events = 0
+        self._closed = threading.Event()
+        if interval > 0 and (idle_ttl > 0 or self.budget_bytes > 0):
+            threading.Thread(target=self._run, args=(interval,), name="model-lifecycle", daemon=True).start()
+
+    def register(self, name: str, load: Callable[[], None], unload: Callable[[], None],
+                 measure: Callable[[], int] = None) -> ManagedModel:
+        model = ManagedModel(self, name, load, unload, measure)
+        with self._lock:
+            self._models[name] = model
+        return model
+
+    def get(self, name: str) -> ManagedModel | None:
+        with self._lock:
+            return self._models.get(name)
+
+    def _begin_load(self) -> tuple[int, bool]:
+        with self._lock:
+            self._loads_in_flight += 1
+            self._memory_events += 1
+            return self._memory_events, self._loads_in_flight == 1
+
+    def _end_load(self, window: tuple[int, bool]) -> bool:
+        """True when no other load or unload overlapped this one, i.e. its RSS delta is its own."""
+        events, alone = window
+        with self._lock:
+            self._loads_in_flight -= 1
+            return alone and self._memory_events == events
+
+    def _memory_changed(self):
+        with self._lock:
+            self._memory_events += 1
+
+    def evict_idle(self, now: float = None) -> list[str]:
+        if self.idle_ttl <= 0:
+            return []
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            models = list(self._models.values())
+        return [
+            m.name for m in models
+            if m.loaded and now - m.last_used >= self.idle_ttl and m.try_unload(f"idle for {now - m.last_used:.0f}s")
+        ]
+
+    def enforce_budget(self, keep: ManagedModel = None) -> list[str]:
+        if self.budget_bytes <= 0:
+            return []
+        with self._lock:
+            models = list(self._models.values())
+        evicted = []
+        for model in sorted(models, key=lambda m: m.last_used):
+            if sum(m.memory_bytes for m in models) <= self.budget_bytes:
+                break
+            if model is not keep and model.loaded and model.try_unload("over memory budget"):
+                evicted.append(model.name)
+        return evicted
+
+    def _run(self, interval: float):
+        while not self._closed.wait(interval):
+            self.evict_idle()
+            self.enforce_budget()
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            models = {name: model.snapshot(now) for name, model in self._models.items()}
+        rss = process_rss_bytes()
+        return {
+            "models": models,
+            "resident_mb": round(sum(m["memory_mb"] for m in models.values()), 1),
+            "process_rss_mb": round(rss / MB, 1) if rss is not None else None,
+            "budget_mb": round(self.budget_bytes / MB, 1) if self.budget_bytes else None,
+            "idle_ttl_s": self.idle_ttl or None,
+        }
+
+    def close(self):
+        self._closed.set()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_model_manager() -> ModelManager:
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ModelManager()
+        return _manager
@@ -0,0 +1,376 @@
+import os
+import queue
+import threading
+import uuid
+import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Iterator
+import numpy as np
+from loguru import logger
+from src.services.sentence_segmenter import split_sentences
+
+# Out-of-process model workers. With N > 0, STT/TTS requests are dispatched to N worker processes
+# that each hold their own Whisper/Kokoro instance, so one API process can run N of them in
+# parallel; 0 keeps the in-process singletons.
+STT_WORKER_PROCESSES = int(os.getenv("STT_WORKER_PROCESSES", "0"))
+TTS_WORKER_PROCESSES = int(os.getenv("TTS_WORKER_PROCESSES", "0"))
+MODEL_WORKER_START_TIMEOUT_SECONDS = float(os.getenv("MODEL_WORKER_START_TIMEOUT_SECONDS", "300"))
+MODEL_WORKER_REQUEST_TIMEOUT_SECONDS = float(os.getenv("MODEL_WORKER_REQUEST_TIMEOUT_SECONDS", "120"))
+MODEL_WORKER_HEALTH_INTERVAL_SECONDS = float(os.getenv("MODEL_WORKER_HEALTH_INTERVAL_SECONDS", "10"))
+PING_TIMEOUT_SECONDS = 5.0
+
+
+class ModelWorkerError(RuntimeError):
+    pass
+
+
+# --- Shared memory transport -----------------------------------------------------------------------
+# Audio crosses the process boundary as a shared memory block; only its name/shape/dtype is pickled.
+# The receiving side copies the samples out and unlinks the block.
+
+def _share_array(array: np.ndarray, name: str = None) -> dict:
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(name=name, create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    descriptor = {"shm": block.name, "shape": array.shape, "dtype": array.dtype.str}
+    block.close()
+    return descriptor
+
+
+def _take_array(descriptor: dict) -> np.ndarray:
+    block = shared_memory.SharedMemory(name=descriptor["shm"])
+    try:
+        return np.ndarray(descriptor["shape"], dtype=descriptor["dtype"], buffer=block.buf).copy()
+    finally:
+        block.close()
+        block.unlink()
+
+
+def _discard_array(descriptor: dict):
+    # Only the name is needed, so this also frees reply blocks the parent never received a descriptor for.
+    try:
+        block = shared_memory.SharedMemory(name=descriptor["shm"])
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()
+
+
+def _reply_block_name() -> str:
+    return f"vv_{uuid.uuid4().hex[:16]}"
+
+
+# --- Worker process --------------------------------------------------------------------------------
+
+# "module:attribute" paths, imported inside the worker process.
+SERVICE_FACTORIES = {
+    "stt": "src.services.stt_service:STTService",
+    "tts": "src.services.tts_service:TTSService",
+}
+
+
+def _load_service(factory: str):
+    import importlib
+
+    module_name, _, attribute = factory.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)()
+
+
+def _handle(service, op: str, payload: dict):
+    if op == "ping":
+        return "pong"
+    if op == "warm_up":
+        return service.warm_up()
+    if op == "stats":
+        return {"model": service.model_label, "batching": service.get_batching_stats()}
+    if op == "transcribe":
+        audio = payload["audio"]
+        if isinstance(audio, dict):
+            audio = _take_array(audio)
+        if payload.get("array"):
+            return service.transcribe_array(audio, payload.get("language"), payload.get("partial", False))
+        return service.transcribe_with_language(audio, payload.get("language"))
+    if op == "synthesize":
+        audio = service.synthesize(payload["text"], payload.get("voice"), payload.get("language"))
+        return _share_array(audio, name=payload.get("reply_shm"))
+    raise ValueError(f"Unsupported operation '{op}'")
+
+
+def _worker_main(factory: str, conn):
+    try:
+        service = _load_service(factory)
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            op, payload = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if op == "stop":
+            return
+        try:
+            conn.send(("ok", _handle(service, op, payload)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+# --- Parent side -----------------------------------------------------------------------------------
+
+class _Worker:
+    def __init__(self, kind: str, factory: str, index: int):
+        self.kind = kind
+        self.factory = factory
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.ready = False
+        self.pid = None
+        self.restarts = -1
+        self.requests = 0
+        self.last_error = None
+        self.start()
+
+    def start(self):
+        context = mp.get_context("spawn")  # fresh interpreter: safe with CUDA and threads in the parent
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(self.factory, child_conn), name=f"{self.kind}-worker-{self.index}", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.restarts += 1
+
+    def restart(self, reason: str):
+        logger.warning(f"Restarting {self.kind} worker {self.index} (pid {self.pid}): {reason}")
+        self.last_error = reason
+        self.stop(timeout=1)
+        self.start()
+
+    def stop(self, timeout: float = 5):
+        try:
+            self.conn.send(("stop", None))
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout)
+        self.conn.close()
+
+    def _wait_ready(self, timeout: float):
+        if self.ready:
+            return
+        if not self.conn.poll(timeout):
+            raise ModelWorkerError(f"{self.kind} worker {self.index} did not load its model within {timeout:.0f}s")
+        status, value = self.conn.recv()
+        if status != "ready":
+            raise ModelWorkerError(f"{self.kind} worker {self.index} failed to start: {value}")
+        self.ready = True
+        self.pid = value
+        logger.info(f"{self.kind} worker {self.index} ready (pid {value})")
+
+    def call(self, op: str, payload: dict, timeout: float):
+        """
+        Runs one request on this worker. A payload "reply_shm" names the shared memory block the reply
+        is written to; if no reply is received, that block is unlinked once the worker has stopped.
+        """
+        try:
+            self._wait_ready(MODEL_WORKER_START_TIMEOUT_SECONDS)
+            self.conn.send((op, payload))
+            if not self.conn.poll(timeout):
+                raise TimeoutError(f"{self.kind} worker {self.index} did not answer '{op}' within {timeout:.0f}s")
+            status, value = self.conn.recv()
+        except (EOFError, OSError, TimeoutError, ModelWorkerError) as e:
+            # Crashed, hung or failed to load: replace the process so the next request gets a fresh one.
+            self.restart(str(e) or type(e).__name__)
+            if payload.get("reply_shm"):
+                _discard_array({"shm": payload["reply_shm"]})  # a late reply's block, written before the stop
+            raise ModelWorkerError(f"{self.kind} worker {self.index} failed: {e}") from e
+        self.requests += 1
+        if status == "error":
+            raise ModelWorkerError(value)
+        return value
+
+    def snapshot(self) -> dict:
+        return {
+            "pid": self.pid,
+            "alive": self.process.is_alive(),
+            "ready": self.ready,
+            "requests": self.requests,
+            "restarts": self.restarts,
+            "last_error": self.last_error,
+        }
+
+
+class ModelWorkerPool:
+    """
+    Fixed pool of model worker processes of one kind ("stt" or "tts"), each running `factory()`.
+    Each worker serves one request at a time; callers wait for an idle worker. A background thread
+    pings idle workers and restarts any that died or stopped answering.
+    """
+
+    def __init__(self, kind: str, processes: int, factory: str = None,
+                 health_interval: float = MODEL_WORKER_HEALTH_INTERVAL_SECONDS):
+        self.kind = kind
+        factory = factory or SERVICE_FACTORIES[kind]
+        self._workers = [_Worker(kind, factory, i) for i in range(max(1, processes))]
+        self._idle: queue.Queue = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._closed = threading.Event()
+        self._health_thread = None
+        if health_interval > 0:
+            self._health_thread = threading.Thread(
+                target=self._health_loop, args=(health_interval,), name=f"{kind}-worker-health", daemon=True
+            )
+            self._health_thread.start()
+
+    def call(self, op: str, payload: dict, timeout: float = MODEL_WORKER_REQUEST_TIMEOUT_SECONDS):
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise ModelWorkerError(f"No idle {self.kind} worker within {timeout:.0f}s")
+        try:
+            return worker.call(op, payload, timeout)
+        finally:
+            self._idle.put(worker)
+
+    def call_each(self, op: str, payload: dict, timeout: float = MODEL_WORKER_REQUEST_TIMEOUT_SECONDS) -> list:
+        """
+        Sends one request per worker at once (e.g. warm-up). Each request takes an idle worker, so every
+        worker gets one as long as no other traffic is competing for them.
+        """
+        with ThreadPoolExecutor(max_workers=len(self._workers)) as executor:
+            futures = [executor.submit(self.call, op, payload, timeout) for _ in self._workers]
+            return [future.result() for future in futures]
+
+    def _health_loop(self, interval: float):
+        while not self._closed.wait(interval):
+            for _ in range(len(self._workers)):
+                try:
+                    worker = self._idle.get_nowait()
+                except queue.Empty:
+                    break  # the rest are busy; a crash there surfaces (and restarts) in call()
+                try:
+                    if not worker.process.is_alive():
+                        worker.restart(f"process exited with code {worker.process.exitcode}")
+                    elif worker.ready:
+                        worker.call("ping", {}, PING_TIMEOUT_SECONDS)
+                except ModelWorkerError as e:
+                    logger.warning(f"{self.kind} worker health check failed: {e}")
+                finally:
+                    self._idle.put(worker)
+
+    @property
+    def ready(self) -> bool:
+        """True once every worker has loaded its model."""
+        return all(worker.ready for worker in self._workers)
+
+    def snapshot(self) -> dict:
+        return {
+            "processes": len(self._workers),
+            "idle": self._idle.qsize(),
+            "workers": [worker.snapshot() for worker in self._workers],
+        }
+
+    def close(self):
+        self._closed.set()
+        for worker in self._workers:
+            worker.stop()
+
+
+class STTWorkerClient:
+    """Drop-in for STTService that transcribes in the worker pool; arrays travel via shared memory."""
+
+    def __init__(self, pool: ModelWorkerPool):
+        self.pool = pool
+        self._model_label = None
+
+    @property
+    def model_label(self) -> str:
+        if self._model_label is None:
+            self._model_label = self.pool.call("stats", {}, PING_TIMEOUT_SECONDS)["model"]
+        return self._model_label
+
+    def get_batching_stats(self) -> dict:
+        """Each worker's batcher counters; every worker batches only the clips it is handed."""
+        stats = self.pool.call_each("stats", {}, PING_TIMEOUT_SECONDS)
+        self._model_label = stats[0]["model"]
+        return {"workers": [s["batching"] for s in stats]}
+
+    def _transcribe(self, audio, language, partial, array: bool):
+        shared = _share_array(np.asarray(audio, dtype=np.float32)) if isinstance(audio, np.ndarray) else None
+        try:
+            return self.pool.call("transcribe", {
+                "audio": shared or audio, "language": language, "partial": partial, "array": array,
+            })
+        except ModelWorkerError:
+            if shared is not None:
+                _discard_array(shared)  # the worker never took it
+            raise
+
+    def transcribe_audio(self, audio: str | np.ndarray, language: str = None) -> str:
+        return self.transcribe_with_language(audio, language)[0]
+
+    def transcribe_with_language(self, audio: str | np.ndarray, language: str = None) -> tuple[str, str]:
+        return tuple(self._transcribe(audio, language, False, array=False))
+
+    def transcribe_array(self, audio: np.ndarray, language: str = None, partial: bool = False) -> str:
+        return self._transcribe(audio, language, partial, array=True)
+
+    def warm_up(self):
+        self.pool.call_each("warm_up", {})
+
+
+class TTSWorkerClient:
+    """Drop-in for TTSService that synthesizes in the worker pool; audio comes back via shared memory."""
+
+    def __init__(self, pool: ModelWorkerPool):
+        self.pool = pool
+
+    def warm_up(self):
+        self.pool.call_each("warm_up", {})
+
+    def synthesize(self, text: str, voice: str = None, language: str = None) -> np.ndarray:
+        return _take_array(self.pool.call(
+            "synthesize", {"text": text, "voice": voice, "language": language, "reply_shm": _reply_block_name()}
+        ))
+
+    def synthesize_stream(self, text: str, voice: str = None, language: str = None) -> Iterator[np.ndarray]:
+        # One request per sentence segment, so the first one plays while later ones are synthesized.
+        for segment in split_sentences(text):
+            yield self.synthesize(segment, voice, language)
+
+
+_pools: dict[str, ModelWorkerPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_worker_pool(kind: str, processes: int) -> ModelWorkerPool:
+    with _pools_lock:
+        if kind not in _pools:
+            _pools[kind] = ModelWorkerPool(kind, processes)
+            logger.info(f"Started {processes} {kind} worker processes")
+        return _pools[kind]
+
+
+def get_running_pool(kind: str) -> ModelWorkerPool | None:
+    """The pool of this kind if it has been started; never starts one."""
+    with _pools_lock:
+        return _pools.get(kind)
+
+
+def get_worker_stats() -> dict:
+    with _pools_lock:
+        return {kind: pool.snapshot() for kind, pool in _pools.items()}
+
+
+def close_worker_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
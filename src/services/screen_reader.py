@@ -1,9 +1,14 @@
+import io
 import os
 import sys
 import asyncio
+import subprocess
 import threading
+from typing import BinaryIO
 from loguru import logger
-from PIL import ImageGrab
+from contextlib import nullcontext
+from PIL import Image, ImageGrab
+from src.services.model_lifecycle import get_model_manager
 
 # Conditional imports based on OS platform
 PLATFORM = sys.platform
@@ -15,7 +20,6 @@ if PLATFORM == "win32":
     try:
         import winsdk.windows.media.ocr as ocr
         import winsdk.windows.graphics.imaging as imaging
-        import winsdk.windows.storage as storage
         import winsdk.windows.storage.streams as streams
         HAS_WINSDK = True
     except ImportError:
@@ -33,21 +37,44 @@ elif PLATFORM.startswith("linux"):
     except ImportError:
         logger.warning("Failed to load pytesseract on Linux. Linux OCR will be unavailable.")
 
-TEMP_IMAGE_DIR = ".data/temp_image"
-os.makedirs(TEMP_IMAGE_DIR, exist_ok=True)
+# Screenshots and uploads are OCR'd in memory: WinRT gets a SoftwareBitmap built from the pixels and
+# tesseract reads an uncompressed BMP on stdin, so nothing is encoded to PNG or written to disk.
+# (pytesseract.image_to_string would PNG-encode every screen grab into a temporary file.)
+TESSERACT_TIMEOUT_SECONDS = float(os.getenv("TESSERACT_TIMEOUT_SECONDS", "30"))
+
+
+class ImageDecodeError(ValueError):
+    pass
+
+
+def decode_image(stream: BinaryIO) -> Image.Image:
+    """Decodes an image straight from a binary stream (e.g. an upload's body)."""
+    try:
+        image = Image.open(stream)
+        image.load()
+    except Image.UnidentifiedImageError as e:
+        raise ImageDecodeError("Unrecognized or corrupt image data") from e
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise ImageDecodeError(f"Could not decode image: {e}") from e
+    return image
 
 class ScreenReaderService:
     _instance = None
-    
+    _instance_lock = threading.Lock()
+
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super(ScreenReaderService, cls).__new__(cls)
-            cls._instance._init_service()
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(ScreenReaderService, cls).__new__(cls)
+                    instance._init_service()
+                    cls._instance = instance
         return cls._instance
 
     def _init_service(self):
         self.engine = None
         self.engine_name = "none"
+        self.lifecycle = None  # only the WinRT engine is a resident model; pytesseract runs a process per call
         self.is_linux = PLATFORM.startswith("linux")
         self.is_windows = PLATFORM == "win32"
         
@@ -55,9 +82,11 @@ class ScreenReaderService:
             if HAS_WINSDK:
                 logger.info("Initializing Windows Native OCR Engine (winsdk)...")
                 try:
-                    self.engine = ocr.OcrEngine.try_create_from_user_profile_languages()
+                    lifecycle = get_model_manager().register("ocr", self._load_winsdk_engine, self._unload_winsdk_engine)
+                    lifecycle.ensure_loaded()
                     if self.engine:
                         self.engine_name = "winsdk"
+                        self.lifecycle = lifecycle
                         logger.info("Windows OCR Engine connected successfully")
                     else:
                         logger.error("Failed to initialize Windows OCR Engine. Ensure Windows language packs are installed.")
@@ -81,19 +110,25 @@ class ScreenReaderService:
         else:
             logger.error(f"Unsupported OS platform for Screen OCR: {PLATFORM}")
 
-    async def _extract_text_windows_async(self, file_path: str) -> str:
+    def _load_winsdk_engine(self):
+        self.engine = ocr.OcrEngine.try_create_from_user_profile_languages()
+
+    def _unload_winsdk_engine(self):
+        self.engine = None
+
+    async def _extract_text_windows_async(self, image: Image.Image) -> str:
         """
-        Asynchronously loads an image file via WinRT StorageFile and runs OcrEngine on it.
+        Runs OcrEngine on a SoftwareBitmap copied from the image's BGRA pixels.
         """
         if not self.engine:
             return ""
             
         try:
-            abs_path = os.path.abspath(file_path)
-            file = await storage.StorageFile.get_file_from_path_async(abs_path)
-            stream = await file.open_async(storage.FileAccessMode.READ)
-            decoder = await imaging.BitmapDecoder.create_async(stream)
-            software_bitmap = await decoder.get_software_bitmap_async()
+            writer = streams.DataWriter()
+            writer.write_bytes(image.convert("RGBA").tobytes("raw", "BGRA"))
+            software_bitmap = imaging.SoftwareBitmap.create_copy_from_buffer(
+                writer.detach_buffer(), imaging.BitmapPixelFormat.BGRA8, image.width, image.height
+            )
             ocr_result = await self.engine.recognize_async(software_bitmap)
             
             if ocr_result and ocr_result.text:
@@ -103,78 +138,73 @@ class ScreenReaderService:
             logger.error(f"Error during Windows OCR extraction: {str(e)}")
             return ""
 
-    def _extract_text_linux(self, file_path: str) -> str:
-        """
-        Runs Tesseract OCR on the saved image path for Linux systems.
-        """
-        try:
-            import pytesseract
-            # For pytesseract, we just pass the file path or PIL image
-            text = pytesseract.image_to_string(file_path)
-            return text.strip()
-        except Exception as e:
-            logger.error(f"Error during Linux Tesseract OCR extraction: {str(e)}. Ensure 'tesseract' is installed natively (e.g. pacman -S tesseract).")
-            return ""
-
-    def _extract_text_tesseract(self, file_path: str) -> str:
-        """Runs Tesseract OCR on any platform where pytesseract is available."""
+    def _extract_text_tesseract(self, image: Image.Image) -> str:
+        """Pipes the image to the tesseract CLI as an uncompressed BMP on stdin and reads the text from stdout."""
         try:
-            import pytesseract
-            text = pytesseract.image_to_string(file_path)
-            return text.strip()
+            buffer = io.BytesIO()
+            image.convert("RGB").save(buffer, format="BMP")
+            result = subprocess.run(
+                [pytesseract.pytesseract.tesseract_cmd, "stdin", "stdout"],
+                input=buffer.getvalue(),
+                capture_output=True,
+                timeout=TESSERACT_TIMEOUT_SECONDS,
+            )
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.decode("utf-8", errors="replace").strip() or f"exit code {result.returncode}")
+            return result.stdout.decode("utf-8", errors="replace").strip()
         except Exception as e:
-            logger.error(f"Error during Tesseract OCR extraction: {str(e)}")
+            logger.error(f"Error during Tesseract OCR extraction: {str(e)}. Ensure 'tesseract' is installed natively (e.g. pacman -S tesseract).")
             return ""
 
-    def _extract_text_windows_sync(self, file_path: str) -> str:
+    def _extract_text_windows_sync(self, image: Image.Image) -> str:
         """Runs WinSDK async OCR in a separate thread to avoid nested event-loop errors."""
         result = {"text": ""}
 
         def _runner():
             try:
-                result["text"] = asyncio.run(self._extract_text_windows_async(file_path))
+                result["text"] = asyncio.run(self._extract_text_windows_async(image))
             except Exception as e:
                 logger.error(f"Windows OCR thread failed: {e}")
 
-        worker = threading.Thread(target=_runner, daemon=True)
-        worker.start()
-        worker.join(timeout=20)
+        # Reloads the engine if it was unloaded while idle, and keeps it loaded until OCR is done.
+        with self.lifecycle.use() if self.lifecycle else nullcontext():
+            worker = threading.Thread(target=_runner, daemon=True)
+            worker.start()
+            worker.join(timeout=20)
         return (result.get("text") or "").strip()
 
     def get_engine_name(self) -> str:
         return self.engine_name
 
-    def read_image_file(self, file_path: str) -> str:
-        """Extract text from a provided image file using the active OCR engine."""
-        if not self.engine:
-            logger.error("Screen reader engine not initialized. Cannot OCR uploaded image.")
+    def read_image(self, image: Image.Image) -> str:
+        """Extract text from an in-memory image using the active OCR engine."""
+        if self.engine_name == "none":
+            logger.error("Screen reader engine not initialized. Cannot OCR image.")
             return ""
 
         try:
             if self.is_windows and self.engine_name == "winsdk":
-                text = self._extract_text_windows_sync(file_path)
+                text = self._extract_text_windows_sync(image)
             elif self.engine_name == "tesseract":
-                text = self._extract_text_tesseract(file_path)
+                text = self._extract_text_tesseract(image)
             else:
                 text = ""
 
             logger.info(f"Image OCR complete. Extracted {len(text)} characters.")
             return text.strip()
         except Exception as e:
-            logger.error(f"read_image_file failed: {e}")
+            logger.error(f"read_image failed: {e}")
             return ""
 
     def capture_and_read_screen(self) -> str:
         """
-        Synchronous wrapper: Grabs the current screen using Pillow, saves a temporary PNG, 
-        and extracts all visible text using the native OS OCR engine.
+        Synchronous wrapper: Grabs the current screen using Pillow and extracts all visible text
+        from the captured image in memory using the native OS OCR engine.
         """
-        if not self.engine:
+        if self.engine_name == "none":
             logger.error("Screen reader engine not initialized. Cannot capture screen.")
             return ""
             
-        temp_path = os.path.join(TEMP_IMAGE_DIR, "screen_capture.png")
-        
         try:
             logger.debug(f"Capturing full screen via Pillow ImageGrab on {PLATFORM}...")
             
@@ -184,30 +214,13 @@ class ScreenReaderService:
                 screenshot = ImageGrab.grab(all_screens=True)
             else:
                 screenshot = ImageGrab.grab()
-            screenshot.save(temp_path, format="PNG")
-            
-            logger.debug(f"Image saved to {temp_path}, running OCR...")
             
-            if self.is_windows and self.engine_name == "winsdk":
-                text = self._extract_text_windows_sync(temp_path)
-            elif self.engine_name == "tesseract":
-                text = self._extract_text_tesseract(temp_path)
-            else:
-                text = ""
-            
-            logger.info(f"Screen OCR complete. Extracted {len(text)} characters.")
-            return text.strip()
+            logger.debug(f"Captured {screenshot.width}x{screenshot.height} screenshot, running OCR...")
+            return self.read_image(screenshot)
             
         except Exception as e:
             logger.error(f"ScreenReaderService failed to read screen: {str(e)}")
             return ""
-        finally:
-            # Cleanup temp image
-            if os.path.exists(temp_path):
-                try:
-                    os.remove(temp_path)
-                except:
-                    pass
 
 def get_screen_reader_service() -> ScreenReaderService:
     return ScreenReaderService()
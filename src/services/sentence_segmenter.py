@@ -0,0 +1,102 @@
+import os
+import re
+
+# Text is synthesized one segment at a time so the first sentence can play while the rest is generated.
+# Sentences longer than TTS_MAX_SEGMENT_CHARS are split at clause boundaries, then at word boundaries.
+TTS_MAX_SEGMENT_CHARS = int(os.getenv("TTS_MAX_SEGMENT_CHARS", "220"))
+
+# Sentence end: terminal punctuation (optionally followed by closing quotes/brackets) and whitespace,
+# or a line break.
+_SENTENCE_END = re.compile(r"""(?<=[.!?…。！？])["')\]]*\s+|\n+""")
+_CLAUSE_END = re.compile(r"(?<=[,;:—–])\s+")
+# Periods that usually do not end a sentence.
+_ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "fig", "no", "approx"}
+
+
+def _ends_with_abbreviation(text: str) -> bool:
+    words = text.rstrip().rsplit(None, 1)
+    last = words[-1].lower().rstrip(".") if words else ""
+    return last in _ABBREVIATIONS or (len(last) == 1 and last.isalpha())
+
+
+def _split_long(sentence: str, max_chars: int) -> list[str]:
+    if len(sentence) <= max_chars:
+        return [sentence]
+    # Pack whole clauses while they fit; only clauses that are too long on their own are cut between words.
+    pieces = []
+    for clause in _CLAUSE_END.split(sentence):
+        pieces.extend(clause.split(" ") if len(clause) > max_chars else [clause])
+    parts, current = [], ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > max_chars:
+            parts.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _sentence_boundaries(text: str) -> list[tuple[int, int]]:
+    """(end of sentence, start of next) offsets for each sentence break in text."""
+    boundaries = []
+    for match in _SENTENCE_END.finditer(text):
+        end = match.start() + len(match.group().rstrip())
+        if "\n" not in match.group() and _ends_with_abbreviation(text[:end]):
+            continue
+        boundaries.append((end, match.end()))
+    return boundaries
+
+
+def split_sentences(text: str, max_chars: int = TTS_MAX_SEGMENT_CHARS) -> list[str]:
+    """Splits text into sentence segments of at most max_chars (single words longer than that are kept whole)."""
+    sentences, start = [], 0
+    for end, next_start in _sentence_boundaries(text):
+        sentences.append(text[start:end])
+        start = next_start
+    sentences.append(text[start:])
+
+    segments = []
+    for sentence in sentences:
+        sentence = " ".join(sentence.split())
+        if sentence:
+            segments.extend(_split_long(sentence, max_chars))
+    return segments
+
+
+class SentenceAccumulator:
+    """
+    Collects streamed LLM tokens and releases each sentence as soon as it is complete (i.e. once the
+    text after its final punctuation has started), so it can be synthesized while generation continues.
+    Text that runs past max_chars without a sentence break is released at a clause or word boundary.
+    """
+
+    def __init__(self, max_chars: int = TTS_MAX_SEGMENT_CHARS):
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> list[str]:
+        self._buffer += text
+        segments = []
+        boundaries = _sentence_boundaries(self._buffer)
+        if boundaries:
+            complete_until = boundaries[-1][1]
+            segments = split_sentences(self._buffer[:complete_until], self.max_chars)
+            self._buffer = self._buffer[complete_until:]
+
+        while len(self._buffer) > self.max_chars:
+            window = self._buffer[: self.max_chars + 1]
+            clause_ends = [m.start() for m in _CLAUSE_END.finditer(window)]
+            cut = clause_ends[-1] if clause_ends else window.rfind(" ")
+            if cut <= 0:
+                break  # a single very long word; wait for more text
+            segments.append(" ".join(window[:cut].split()))
+            self._buffer = self._buffer[cut:].lstrip()
+        return segments
+
+    def flush(self) -> list[str]:
+        """Releases whatever is left once the stream has ended."""
+        segments = split_sentences(self._buffer, self.max_chars)
+        self._buffer = ""
+        return segments
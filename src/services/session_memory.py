@@ -0,0 +1,226 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from loguru import logger
+
+# Per-session history budget (in estimated tokens) injected into each prompt. Part of it is reserved
+# for the rolling summary of older turns; the rest holds the most recent turns verbatim.
+SESSION_HISTORY_TOKEN_BUDGET = int(os.getenv("SESSION_HISTORY_TOKEN_BUDGET", "512"))
+SESSION_SUMMARY_MAX_TOKENS = int(os.getenv("SESSION_SUMMARY_MAX_TOKENS", "160"))
+SESSION_IDLE_TTL_SECONDS = float(os.getenv("SESSION_IDLE_TTL_SECONDS", "3600"))
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "256"))
+
+CHARS_PER_TOKEN = 4
+
+Turn = tuple[str, str]
+
+
+class UnknownSessionError(LookupError):
+    """Raised for a session id that was never created, or was deleted or expired."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token); no tokenizer is available on the API side."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _clip(text: str, max_tokens: int, keep_tail: bool = False) -> str:
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[-limit:] if keep_tail else text[:limit]
+
+
+def format_turns(turns: list[Turn]) -> str:
+    return "\n".join(f"User: {user}\nAssistant: {assistant}" for user, assistant in turns)
+
+
+class ConversationSession:
+    """
+    History of one conversation: a rolling summary of older turns plus the latest turns verbatim.
+    Turns pushed out of the verbatim window wait in `pending` until the background summariser
+    folds them into the summary; meanwhile they stay in the history, clipped to the summary's share
+    of the budget, so the rendered history never exceeds the token budget nor drops a turn.
+    """
+
+    def __init__(self, session_id: str, token_budget: int, summary_max_tokens: int):
+        self.session_id = session_id
+        self.token_budget = token_budget
+        self.summary_max_tokens = min(summary_max_tokens, token_budget // 2)
+        self.recent_budget = token_budget - self.summary_max_tokens
+        self.summary = ""
+        self.turns: list[Turn] = []
+        self.pending: list[Turn] = []
+        self.summarizing = False
+        self.total_turns = 0
+        self.summarized_turns = 0
+        self.created_at = time.time()
+        self.last_used_at = self.created_at
+        self.lock = threading.Lock()
+
+    def history_text(self) -> str:
+        with self.lock:
+            self.last_used_at = time.time()
+            parts = []
+            if self.summary:
+                parts.append(f"Summary of earlier conversation: {self.summary}")
+            if self.pending:
+                # Not summarised yet (or the summariser is slow): keep the latest of them in the prompt.
+                parts.append(_clip(format_turns(self.pending), self.summary_max_tokens, keep_tail=True))
+            if self.turns:
+                parts.append(format_turns(self.turns))
+            return _clip("\n".join(parts), self.token_budget, keep_tail=True)
+
+    def add_turn(self, user: str, assistant: str) -> bool:
+        """Appends a turn and returns True if older turns now need summarising."""
+        per_turn = self.recent_budget // 2
+        turn = (_clip(user, per_turn), _clip(assistant, per_turn))
+        with self.lock:
+            self.last_used_at = time.time()
+            self.total_turns += 1
+            self.turns.append(turn)
+            while len(self.turns) > 1 and estimate_tokens(format_turns(self.turns)) > self.recent_budget:
+                self.pending.append(self.turns.pop(0))
+            if self.pending and not self.summarizing:
+                self.summarizing = True
+                return True
+            return False
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            summary_tokens = estimate_tokens(self.summary)
+            recent_tokens = estimate_tokens(format_turns(self.turns))
+            return {
+                "session_id": self.session_id,
+                "turns": self.total_turns,
+                "verbatim_turns": len(self.turns),
+                "pending_turns": len(self.pending),
+                "summarized_turns": self.summarized_turns,
+                "summary": self.summary,
+                "summary_tokens": summary_tokens,
+                "recent_tokens": recent_tokens,
+                "history_tokens": min(summary_tokens + recent_tokens, self.token_budget),
+                "token_budget": self.token_budget,
+                "idle_s": round(time.time() - self.last_used_at, 1),
+            }
+
+
+class SessionStore:
+    """
+    Server-side conversation sessions, bounded in count (LRU) and idle time.
+    Summaries are produced on a single background thread by `summarize(summary, turns) -> str`,
+    so answering a turn never waits for summarisation.
+    """
+
+    def __init__(
+        self,
+        summarize: Callable[[str, list[Turn]], str],
+        token_budget: int = SESSION_HISTORY_TOKEN_BUDGET,
+        summary_max_tokens: int = SESSION_SUMMARY_MAX_TOKENS,
+        idle_ttl_s: float = SESSION_IDLE_TTL_SECONDS,
+        max_sessions: int = SESSION_MAX_SESSIONS,
+    ):
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.summary_max_tokens = summary_max_tokens
+        self.idle_ttl_s = idle_ttl_s
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions: OrderedDict[str, ConversationSession] = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-summarizer")
+        self.stats = {"created": 0, "expired": 0, "summary_runs": 0, "summary_failures": 0, "summary_ms_total": 0.0}
+
+    def create(self, session_id: str | None = None) -> ConversationSession:
+        """Starts a new session (with a random id unless one is given), evicting the least recently used."""
+        session_id = session_id or uuid.uuid4().hex
+        with self._lock:
+            self._expire()
+            session = ConversationSession(session_id, self.token_budget, self.summary_max_tokens)
+            self._sessions[session_id] = session
+            self.stats["created"] += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.stats["expired"] += 1
+            return session
+
+    def get(self, session_id: str) -> ConversationSession:
+        """Returns a live session; raises UnknownSessionError instead of creating one."""
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise UnknownSessionError(f"Unknown session: {session_id}")
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def find(self, session_id: str) -> ConversationSession | None:
+        with self._lock:
+            self._expire()
+            return self._sessions.get(session_id)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self):
+        cutoff = time.time() - self.idle_ttl_s
+        for session_id in [sid for sid, s in self._sessions.items() if s.last_used_at < cutoff]:
+            del self._sessions[session_id]
+            self.stats["expired"] += 1
+
+    def record_turn(self, session: ConversationSession, user: str, assistant: str):
+        if session.add_turn(user, assistant):
+            self._executor.submit(self._summarize_pending, session)
+
+    def _summarize_pending(self, session: ConversationSession):
+        with session.lock:
+            summary, batch = session.summary, list(session.pending)
+        started = time.perf_counter()
+        try:
+            new_summary = self.summarize(summary, batch).strip()
+            failed = not new_summary
+        except Exception as e:
+            logger.warning(f"Summarising session {session.session_id} failed, keeping an extractive summary: {e}")
+            failed = True
+        if failed:
+            # Never let pending turns pile up: fall back to appending the turns, answers shortened.
+            new_summary = " ".join(
+                [summary] + [f"User asked: {user} Answer: {_clip(assistant, 16)}" for user, assistant in batch]
+            ).strip()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with session.lock:
+            session.summary = _clip(new_summary, session.summary_max_tokens, keep_tail=failed)
+            del session.pending[: len(batch)]
+            session.summarized_turns += len(batch)
+            resubmit = bool(session.pending)
+            session.summarizing = resubmit
+        with self._lock:
+            self.stats["summary_runs"] += 1
+            self.stats["summary_failures"] += int(failed)
+            self.stats["summary_ms_total"] += elapsed_ms
+        if resubmit:
+            self._executor.submit(self._summarize_pending, session)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            stats = dict(self.stats)
+        history = [s.snapshot()["history_tokens"] for s in sessions]
+        summary_ms = stats.pop("summary_ms_total")
+        return {
+            **stats,
+            "active_sessions": len(sessions),
+            "token_budget": self.token_budget,
+            "summary_max_tokens": self.summary_max_tokens,
+            "avg_history_tokens": round(sum(history) / len(history), 1) if history else 0.0,
+            "max_history_tokens": max(history, default=0),
+            "avg_summary_ms": round(summary_ms / stats["summary_runs"], 1) if stats["summary_runs"] else None,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=True)
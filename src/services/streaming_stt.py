@@ -0,0 +1,137 @@
+import os
+import numpy as np
+
+SAMPLE_RATE = 16000  # Whisper's native rate
+
+# Utterance segmentation: an utterance ends after STT_VAD_END_SILENCE_MS of non-speech, and a
+# partial hypothesis is requested every STT_PARTIAL_INTERVAL_MS of new speech.
+STT_VAD_FRAME_MS = 30
+STT_VAD_END_SILENCE_MS = int(os.getenv("STT_VAD_END_SILENCE_MS", "300"))
+STT_VAD_MIN_SPEECH_MS = int(os.getenv("STT_VAD_MIN_SPEECH_MS", "90"))
+STT_VAD_THRESHOLD_DB = float(os.getenv("STT_VAD_THRESHOLD_DB", "10"))
+STT_PARTIAL_INTERVAL_MS = int(os.getenv("STT_PARTIAL_INTERVAL_MS", "700"))
+STT_MAX_UTTERANCE_S = float(os.getenv("STT_MAX_UTTERANCE_S", "30"))
+PRE_ROLL_MS = 200
+MIN_SPEECH_DBFS = -50.0
+
+
+def pcm16_to_float32(data: bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Converts little-endian mono PCM16 bytes to float32 samples in [-1, 1] at 16 kHz."""
+    samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+    if sample_rate != SAMPLE_RATE and len(samples):
+        n_out = int(round(len(samples) * SAMPLE_RATE / sample_rate))
+        positions = np.linspace(0, len(samples) - 1, n_out)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    return samples
+
+
+class EnergyVAD:
+    """
+    Frame-level voice activity detector based on signal energy relative to an adaptive noise floor.
+    Cheap enough to run on every frame in the event loop; Whisper only sees detected speech.
+    """
+
+    def __init__(self, threshold_db: float = STT_VAD_THRESHOLD_DB, min_speech_dbfs: float = MIN_SPEECH_DBFS):
+        self.threshold_db = threshold_db
+        self.min_speech_dbfs = min_speech_dbfs
+        self.noise_floor_db = None
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        rms = float(np.sqrt(np.mean(np.square(frame)))) if len(frame) else 0.0
+        level_db = 20 * np.log10(max(rms, 1e-10))
+        if self.noise_floor_db is None:
+            self.noise_floor_db = min(level_db, self.min_speech_dbfs)
+        speech = level_db > max(self.noise_floor_db + self.threshold_db, self.min_speech_dbfs)
+        if not speech:
+            # Track the noise floor only on non-speech frames; drop quickly, rise slowly.
+            alpha = 0.3 if level_db < self.noise_floor_db else 0.05
+            self.noise_floor_db += alpha * (level_db - self.noise_floor_db)
+        return speech
+
+
+class UtteranceSegmenter:
+    """
+    Splits a stream of 16 kHz float32 audio into utterances.
+    feed() returns events in order:
+      ("start", None)         speech began (after STT_VAD_MIN_SPEECH_MS of speech)
+      ("partial", audio)      the utterance so far, every STT_PARTIAL_INTERVAL_MS of new audio
+      ("end", audio)          the complete utterance, after STT_VAD_END_SILENCE_MS of silence
+    """
+
+    def __init__(
+        self,
+        vad: EnergyVAD | None = None,
+        end_silence_ms: int = STT_VAD_END_SILENCE_MS,
+        min_speech_ms: int = STT_VAD_MIN_SPEECH_MS,
+        partial_interval_ms: int = STT_PARTIAL_INTERVAL_MS,
+        max_utterance_s: float = STT_MAX_UTTERANCE_S,
+    ):
+        self.vad = vad or EnergyVAD()
+        self.frame_len = SAMPLE_RATE * STT_VAD_FRAME_MS // 1000
+        self.end_silence_frames = max(1, end_silence_ms // STT_VAD_FRAME_MS)
+        self.end_silence_ms = self.end_silence_frames * STT_VAD_FRAME_MS
+        self.min_speech_frames = max(1, min_speech_ms // STT_VAD_FRAME_MS)
+        self.partial_interval = SAMPLE_RATE * partial_interval_ms // 1000
+        self.max_utterance = int(SAMPLE_RATE * max_utterance_s)
+        self.pre_roll_frames = PRE_ROLL_MS // STT_VAD_FRAME_MS
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._recent: list[np.ndarray] = []  # frames before speech start (pre-roll / start candidates)
+        self._speech_run = 0
+        self._silence_run = 0
+        self._utterance: list[np.ndarray] | None = None
+        self._utterance_len = 0
+        self._last_partial_len = 0
+
+    @property
+    def in_speech(self) -> bool:
+        return self._utterance is not None
+
+    def feed(self, samples: np.ndarray) -> list[tuple[str, np.ndarray | None]]:
+        events = []
+        self._pending = np.concatenate([self._pending, samples.astype(np.float32, copy=False)])
+        n_frames = len(self._pending) // self.frame_len
+        for i in range(n_frames):
+            frame = self._pending[i * self.frame_len:(i + 1) * self.frame_len]
+            events.extend(self._process_frame(frame, self.vad.is_speech(frame)))
+        self._pending = self._pending[n_frames * self.frame_len:]
+        return events
+
+    def flush(self) -> list[tuple[str, np.ndarray | None]]:
+        """Ends the current utterance (if any), e.g. when the client stops streaming."""
+        if self._utterance is None:
+            return []
+        return [self._end_utterance()]
+
+    def _process_frame(self, frame: np.ndarray, speech: bool) -> list[tuple[str, np.ndarray | None]]:
+        if self._utterance is None:
+            self._recent.append(frame)
+            self._speech_run = self._speech_run + 1 if speech else 0
+            if self._speech_run < self.min_speech_frames:
+                del self._recent[: max(0, len(self._recent) - self.pre_roll_frames - self.min_speech_frames)]
+                return []
+            self._utterance = list(self._recent)
+            self._utterance_len = sum(len(f) for f in self._utterance)
+            self._recent = []
+            self._silence_run = 0
+            self._last_partial_len = 0
+            return [("start", None)]
+
+        self._utterance.append(frame)
+        self._utterance_len += len(frame)
+        self._silence_run = 0 if speech else self._silence_run + 1
+        if self._silence_run >= self.end_silence_frames or self._utterance_len >= self.max_utterance:
+            return [self._end_utterance()]
+        if self._utterance_len - self._last_partial_len >= self.partial_interval:
+            self._last_partial_len = self._utterance_len
+            return [("partial", np.concatenate(self._utterance))]
+        return []
+
+    def _end_utterance(self) -> tuple[str, np.ndarray]:
+        # Trailing silence only slows Whisper down (and invites hallucinations); keep ~90 ms of it.
+        trailing = max(0, self._silence_run - 3)
+        audio = np.concatenate(self._utterance[: len(self._utterance) - trailing])
+        self._utterance = None
+        self._utterance_len = 0
+        self._speech_run = 0
+        self._silence_run = 0
+        return "end", audio
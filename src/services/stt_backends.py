@@ -0,0 +1,136 @@
+import os
+import numpy as np
+from loguru import logger
+
+# Which Whisper implementation STTService runs:
+#   openai-whisper  PyTorch reference implementation (default)
+#   faster-whisper  CTranslate2 port; int8 weights on CPU are several times faster at similar WER
+STT_BACKEND = os.getenv("STT_BACKEND", "openai-whisper").strip().lower()
+STT_MODEL_SIZE = os.getenv("STT_MODEL_SIZE", "base")
+# CTranslate2 compute type for faster-whisper; empty = int8 on CPU, float16 on CUDA.
+STT_COMPUTE_TYPE = os.getenv("STT_COMPUTE_TYPE", "").strip()
+STT_CPU_THREADS = int(os.getenv("STT_CPU_THREADS", "0"))  # 0 = CTranslate2 default
+
+# Whisper's own transcribe() thresholds, reused to vet batched greedy decodes.
+NO_SPEECH_THRESHOLD = 0.6
+LOGPROB_THRESHOLD = -1.0
+COMPRESSION_RATIO_THRESHOLD = 2.4
+# Clips up to one mel window can be batched; longer audio goes through transcribe().
+BATCH_MAX_SAMPLES = 30 * 16000
+
+
+class OpenAIWhisperBackend:
+    """The reference `whisper` package. Accepts file paths (decoded via ffmpeg) or 16 kHz float32 arrays."""
+
+    name = "openai-whisper"
+
+    def __init__(self, model_size: str, device: str):
+        import whisper
+
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = "float16" if device == "cuda" else "float32"
+        self.model = whisper.load_model(model_size, device=device)
+
+    def transcribe(self, audio: str | np.ndarray, language: str = None, partial: bool = False,
+                   condition_on_previous_text: bool = True) -> tuple[str, str]:
+        # We use half precision strictly on GPU
+        options = {"fp16": self.device == "cuda", "condition_on_previous_text": condition_on_previous_text}
+        if language:
+            options["language"] = language
+        if partial:
+            options.update(temperature=0.0, without_timestamps=True)
+        result = self.model.transcribe(audio, **options)
+        return result.get("text", "").strip(), result.get("language", "unknown")
+
+    def transcribe_batch(self, audios: list[np.ndarray], language: str = None,
+                         partial: bool = False) -> list[tuple[str, str]]:
+        """
+        Decodes up to 30 s clips in one batched encoder/decoder pass (each clip padded to a 30 s mel window)
+        and returns (text, language) per clip.
+        Finals get transcribe()'s quality checks: silence is dropped, and clips whose greedy decode looks
+        degenerate are re-run individually with temperature fallback.
+        """
+        import torch
+        import whisper
+
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), self.model.dims.n_mels, device=self.model.device)
+            for audio in audios
+        ])
+        options = whisper.DecodingOptions(
+            language=language, temperature=0.0, without_timestamps=True, fp16=self.device == "cuda"
+        )
+        results = whisper.decode(self.model, mels, options)
+
+        transcripts = []
+        for audio, result in zip(audios, results):
+            if partial:
+                transcripts.append((result.text.strip(), result.language))
+            elif result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+                transcripts.append(("", result.language))
+            elif result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD:
+                transcripts.append(self.transcribe(audio, language, condition_on_previous_text=False))
+            else:
+                transcripts.append((result.text.strip(), result.language))
+        return transcripts
+
+
+class FasterWhisperBackend:
+    """
+    CTranslate2 Whisper (`faster-whisper`). Decoding settings mirror openai-whisper's defaults
+    (greedy search with temperature fallback) so both backends produce comparable transcripts.
+    """
+
+    name = "faster-whisper"
+
+    def __init__(self, model_size: str, device: str, compute_type: str = STT_COMPUTE_TYPE):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise RuntimeError(
+                "STT_BACKEND=faster-whisper needs the optional faster-whisper package, which is not installed. "
+                "Install it with `pip install faster-whisper`, or unset STT_BACKEND to use openai-whisper."
+            ) from e
+
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type or ("float16" if device == "cuda" else "int8")
+        self.model = WhisperModel(
+            model_size, device=device, compute_type=self.compute_type, cpu_threads=STT_CPU_THREADS
+        )
+
+    def transcribe(self, audio: str | np.ndarray, language: str = None, partial: bool = False,
+                   condition_on_previous_text: bool = True) -> tuple[str, str]:
+        options = {
+            "language": language or None,
+            "beam_size": 1,
+            "condition_on_previous_text": condition_on_previous_text,
+            "vad_filter": False,
+        }
+        if partial:
+            options.update(temperature=0.0, without_timestamps=True)
+        segments, info = self.model.transcribe(audio, **options)
+        # Segments are generated lazily; decoding happens while joining them.
+        text = "".join(segment.text for segment in segments).strip()
+        return text, info.language or "unknown"
+
+    def transcribe_batch(self, audios: list[np.ndarray], language: str = None,
+                         partial: bool = False) -> list[tuple[str, str]]:
+        # faster-whisper has no multi-clip batch API; CTranslate2 already spreads each decode over
+        # its CPU threads, so clips are decoded back to back.
+        return [self.transcribe(audio, language, partial, condition_on_previous_text=False) for audio in audios]
+
+
+STT_BACKENDS = {
+    OpenAIWhisperBackend.name: OpenAIWhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+
+def create_stt_backend(name: str = STT_BACKEND, model_size: str = STT_MODEL_SIZE, device: str = "cpu"):
+    backend_cls = STT_BACKENDS.get(name)
+    if backend_cls is None:
+        raise ValueError(f"Unknown STT_BACKEND '{name}'. Choose one of: {', '.join(STT_BACKENDS)}")
+    logger.info(f"Loading STT backend {name} (model: {model_size}, device: {device})...")
+    return backend_cls(model_size, device)
@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Callable
+import numpy as np
+from loguru import logger
+
+# Concurrent transcriptions are queued and decoded together, up to STT_BATCH_MAX_SIZE clips per
+# model pass. The worker waits at most STT_BATCH_MAX_WAIT_MS after the oldest request for the batch
+# to fill; under load, requests that arrive while a batch is decoding form the next batch anyway.
+STT_BATCH_MAX_SIZE = int(os.getenv("STT_BATCH_MAX_SIZE", "8"))
+STT_BATCH_MAX_WAIT_MS = float(os.getenv("STT_BATCH_MAX_WAIT_MS", "10"))
+
+EWMA_ALPHA = 0.3
+
+
+class _Request:
+    def __init__(self, audio: np.ndarray, language: str | None, partial: bool):
+        self.audio = audio
+        self.key = (language, partial)
+        self.enqueued_at = time.monotonic()
+        self.future: Future = Future()
+
+
+class TranscriptionBatcher:
+    """
+    Single worker thread in front of the Whisper model.
+    Callers block in submit() until their clip's (transcript, language) is ready. Requests are batched by
+    (language, partial) because a batch shares one set of decoding options; oldest requests go first.
+    """
+
+    def __init__(
+        self,
+        transcribe_batch: Callable[[list[np.ndarray], str | None, bool], list[tuple[str, str]]],
+        max_batch_size: int = STT_BATCH_MAX_SIZE,
+        max_wait_ms: float = STT_BATCH_MAX_WAIT_MS,
+    ):
+        self.transcribe_batch = transcribe_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000
+        self._cond = threading.Condition()
+        self._queue: list[_Request] = []
+        self._closed = False
+        self.stats = {"requests": 0, "batches": 0, "errors": 0, "max_wait_ms": 0.0}
+        self.batch_sizes: Counter = Counter()
+        self.ewma_wait_s = None
+        self.ewma_batch_s = None
+        self._thread = threading.Thread(target=self._run, name="stt-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, audio: np.ndarray, language: str | None = None, partial: bool = False) -> tuple[str, str]:
+        request = _Request(audio, language, partial)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("STT batcher is closed")
+            self._queue.append(request)
+            self.stats["requests"] += 1
+            self._cond.notify_all()
+        return request.future.result()
+
+    def _next_batch(self) -> list[_Request] | None:
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return None
+            key = self._queue[0].key
+            deadline = self._queue[0].enqueued_at + self.max_wait_s
+            while not self._closed:
+                matching = sum(1 for r in self._queue if r.key == key)
+                remaining = deadline - time.monotonic()
+                if matching >= self.max_batch_size or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = [r for r in self._queue if r.key == key][: self.max_batch_size]
+            taken = set(map(id, batch))
+            self._queue = [r for r in self._queue if id(r) not in taken]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            started = time.monotonic()
+            language, partial = batch[0].key
+            try:
+                texts = list(self.transcribe_batch([r.audio for r in batch], language, partial))
+                if len(texts) != len(batch):
+                    raise RuntimeError(f"STT backend returned {len(texts)} transcripts for {len(batch)} clips")
+            except Exception as e:
+                logger.error(f"Batched transcription of {len(batch)} clips failed: {e}")
+                with self._cond:
+                    self.stats["errors"] += len(batch)
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            elapsed = time.monotonic() - started
+            with self._cond:
+                self._record(batch, started, elapsed)
+            for request, text in zip(batch, texts):
+                request.future.set_result(text)
+
+    def _record(self, batch: list[_Request], started: float, elapsed: float):
+        self.stats["batches"] += 1
+        self.batch_sizes[len(batch)] += 1
+        for request in batch:
+            wait_s = started - request.enqueued_at
+            self.stats["max_wait_ms"] = max(self.stats["max_wait_ms"], wait_s * 1000)
+            self.ewma_wait_s = wait_s if self.ewma_wait_s is None else (
+                EWMA_ALPHA * wait_s + (1 - EWMA_ALPHA) * self.ewma_wait_s
+            )
+        self.ewma_batch_s = elapsed if self.ewma_batch_s is None else (
+            EWMA_ALPHA * elapsed + (1 - EWMA_ALPHA) * self.ewma_batch_s
+        )
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            stats = dict(self.stats)
+            batched = sum(size * count for size, count in self.batch_sizes.items())
+            stats.update({
+                "max_wait_ms": round(stats["max_wait_ms"], 1),
+                "queued": len(self._queue),
+                "max_batch_size": self.max_batch_size,
+                "avg_batch_size": round(batched / stats["batches"], 2) if stats["batches"] else None,
+                "batch_sizes": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+                "avg_queue_wait_ms": round(self.ewma_wait_s * 1000, 1) if self.ewma_wait_s is not None else None,
+                "avg_batch_ms": round(self.ewma_batch_s * 1000, 1) if self.ewma_batch_s is not None else None,
+            })
+            return stats
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=5)
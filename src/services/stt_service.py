@@ -1,21 +1,44 @@
 import os
-import whisper
+import threading
+import numpy as np
 from loguru import logger
 import torch
+from src.services.stt_backends import BATCH_MAX_SAMPLES, STT_BACKEND, STT_MODEL_SIZE, create_stt_backend
+from src.services.stt_batcher import TranscriptionBatcher
+from src.services.model_lifecycle import get_model_manager, module_bytes
 
 class STTService:
     _instance = None
-    
-    def __new__(cls, model_size="base"):
+    _instance_lock = threading.Lock()
+
+    def __new__(cls, model_size=STT_MODEL_SIZE, backend=STT_BACKEND):
+        # Warm-up threads may build the service while requests arrive: only one thread initialises it,
+        # and it is published once fully initialised.
         if cls._instance is None:
-            cls._instance = super(STTService, cls).__new__(cls)
-            cls._instance._init_service(model_size)
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(STTService, cls).__new__(cls)
+                    instance._init_service(model_size, backend)
+                    cls._instance = instance
         return cls._instance
 
-    def _init_service(self, model_size):
+    def _init_service(self, model_size, backend):
         self.model_size = model_size
+        self.backend_name = backend
+        self.backend = None
         self.model = None
-        self._load_model()
+        self.batcher = None
+        # Loaded now; may be unloaded when idle (see model_lifecycle) and is reloaded by the next request.
+        self.lifecycle = get_model_manager().register(
+            "stt", self._load_model, self._unload_model, measure=lambda: module_bytes(self.model)
+        )
+        self.lifecycle.ensure_loaded()
+        # Concurrent clips (uploads, streaming partials and finals) share batched model passes.
+        self.batcher = TranscriptionBatcher(self._transcribe_batch)
+
+    @property
+    def model_label(self) -> str:
+        return f"{self.backend_name}/whisper-{self.model_size}"
 
     def _load_model(self):
         logger.info(f"Loading Whisper model '{self.model_size}'...")
@@ -25,47 +48,83 @@ class STTService:
         logger.debug(f"Whisper device selected: {device}")
         
         try:
-            # Setting in_memory=True if running on small models to reduce disk io, 
             # whisper base model is ~74M parameters, perfectly fits in 4GB VRAM
-            self.model = whisper.load_model(self.model_size, device=device)
-            logger.info("Whisper model loaded successfully.")
+            self.backend = create_stt_backend(self.backend_name, self.model_size, device)
+            self.model = self.backend.model
+            logger.info(f"Whisper model loaded successfully ({self.backend.name}, {self.backend.compute_type}).")
         except Exception as e:
             logger.error(f"Failed to load Whisper model: {str(e)}")
             raise
 
-    def transcribe_audio(self, file_path: str, language: str = None) -> str:
+    def _unload_model(self):
+        self.backend = None
+        self.model = None
+
+    def _transcribe_batch(self, audios: list[np.ndarray], language: str = None, partial: bool = False):
+        # Submitters hold the model in use, so it stays loaded until their batch is decoded.
+        return self.backend.transcribe_batch(audios, language, partial)
+
+    def transcribe_audio(self, audio: str | np.ndarray, language: str = None) -> str:
         """
-        Transcribes the audio file to text.
+        Transcribes an audio file path, or 16 kHz mono float32 samples (see audio_decode.decode_audio), to text.
         If language is provided, it forces transcription in that language.
         If not, the model auto-detects.
         """
-        if not self.model:
-            raise RuntimeError("Whisper model is not loaded.")
-        
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"Audio file not found: {file_path}")
+        return self.transcribe_with_language(audio, language)[0]
+
+    def transcribe_with_language(self, audio: str | np.ndarray, language: str = None) -> tuple[str, str]:
+        """Like transcribe_audio, but also returns the language code Whisper detected (or was forced to)."""
+        with self.lifecycle.use():
+            return self._transcribe_with_language(audio, language)
 
-        logger.debug(f"Transcribing {file_path}")
+    def _transcribe_with_language(self, audio: str | np.ndarray, language: str = None) -> tuple[str, str]:
+        if isinstance(audio, np.ndarray):
+            audio = audio.astype(np.float32, copy=False)
+            logger.debug(f"Transcribing {len(audio) / 16000:.1f}s of in-memory audio")
+            if len(audio) <= BATCH_MAX_SAMPLES:
+                return self.batcher.submit(audio, language)
+        elif not os.path.exists(audio):
+            raise FileNotFoundError(f"Audio file not found: {audio}")
+        else:
+            logger.debug(f"Transcribing {audio}")
         
         try:
-            # We use half precision strictly on GPU
-            fp16 = torch.cuda.is_available()
-            
-            # Additional args like language can go here
-            options = {"fp16": fp16}
-            if language:
-                options["language"] = language
-                
-            result = self.model.transcribe(file_path, **options)
-            transcription = result.get("text", "").strip()
-            
-            detected_lang = result.get("language", "unknown")
+            transcription, detected_lang = self.backend.transcribe(audio, language=language)
             logger.debug(f"Transcription complete. Detected language: {detected_lang}")
             
-            return transcription
+            return transcription, detected_lang
         except Exception as e:
             logger.error(f"Error during transcription: {str(e)}")
             raise
 
+    def transcribe_array(self, audio: np.ndarray, language: str = None, partial: bool = False) -> str:
+        """
+        Transcribes 16 kHz mono float32 samples (no file or ffmpeg round trip).
+        partial=True uses greedy decoding without temperature fallback, for fast interim hypotheses.
+        """
+        audio = audio.astype(np.float32, copy=False)
+        with self.lifecycle.use():
+            if len(audio) <= BATCH_MAX_SAMPLES:
+                return self.batcher.submit(audio, language, partial)[0]
+            try:
+                text, _ = self.backend.transcribe(
+                    audio, language=language, partial=partial, condition_on_previous_text=False,
+                )
+                return text
+            except Exception as e:
+                logger.error(f"Error during transcription: {str(e)}")
+                raise
+
+    def warm_up(self):
+        """Decodes one second of silence so first-request allocation and kernel selection costs are paid now."""
+        self.transcribe_array(np.zeros(16000, dtype=np.float32), language="en")
+
+    def get_batching_stats(self) -> dict:
+        return self.batcher.snapshot() if self.batcher else {}
+
 def get_stt_service() -> STTService:
+    """The in-process STTService, or a client for the STT worker processes when STT_WORKER_PROCESSES > 0."""
+    from src.services.model_workers import STT_WORKER_PROCESSES, STTWorkerClient, get_worker_pool
+    if STT_WORKER_PROCESSES > 0:
+        return STTWorkerClient(get_worker_pool("stt", STT_WORKER_PROCESSES))
     return STTService()
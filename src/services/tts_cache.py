@@ -0,0 +1,113 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+import numpy as np
+from loguru import logger
+
+# Synthesized sentence audio, keyed by (normalized text, voice, speed, lang_code). Empty path disables.
+TTS_CACHE_PATH = os.getenv("TTS_CACHE_PATH", ".data/cache/tts_phrases.sqlite3")
+TTS_CACHE_MAX_MB = float(os.getenv("TTS_CACHE_MAX_MB", "256"))
+
+
+def normalize_phrase(text: str) -> str:
+    # Whitespace and Unicode forms only: case and punctuation change the prosody (and "US" is not "us").
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def phrase_key(text: str, voice: str, speed: float, lang_code: str) -> str:
+    raw = "\x1f".join([normalize_phrase(text), voice, f"{speed:g}", lang_code])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTSPhraseCache:
+    """
+    On-disk cache of synthesized float32 audio in SQLite, one entry per sentence segment.
+    Entries are evicted least-recently-used once the stored audio exceeds max_bytes. Safe to share
+    between TTS worker processes (WAL mode).
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS phrases (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                voice TEXT NOT NULL,
+                audio BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_phrases_last_used ON phrases(last_used_at)")
+        self._conn.commit()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def get(self, key: str) -> np.ndarray | None:
+        with self._lock:
+            row = self._conn.execute("SELECT audio FROM phrases WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE phrases SET last_used_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.stats["hits"] += 1
+            return np.frombuffer(row[0], dtype="<f4").copy()
+
+    def put(self, key: str, text: str, voice: str, audio: np.ndarray):
+        blob = np.asarray(audio, dtype="<f4").tobytes()
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO phrases (key, text, voice, audio, size, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, normalize_phrase(text), voice, blob, len(blob), now, now),
+            )
+            self.stats["stores"] += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM phrases").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self._conn.execute("SELECT key, size FROM phrases ORDER BY last_used_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM phrases WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        self.stats["evictions"] += evicted
+        logger.debug(f"TTS phrase cache evicted {evicted} entries to stay under {self.max_bytes} bytes")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM phrases").fetchone()
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "enabled": True,
+                "path": self.path,
+                "entries": entries,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable
+from loguru import logger
+from src.services.model_lifecycle import MB, ManagedModel, ModelManager
+
+# Kokoro language code and default voice for each Whisper language code Kokoro can speak.
+# Languages without a Kokoro voice (e.g. Bengali) fall back to the default language.
+KOKORO_LANGUAGES = {
+    "en": ("a", "af_bella"),
+    "es": ("e", "ef_dora"),
+    "fr": ("f", "ff_siwis"),
+    "hi": ("h", "hf_alpha"),
+    "it": ("i", "if_sara"),
+    "ja": ("j", "jf_alpha"),
+    "pt": ("p", "pf_dora"),
+    "zh": ("z", "zf_xiaobei"),
+}
+# Pipelines other than the default language are loaded on first use. All languages share one Kokoro
+# model, so each extra pipeline only adds its text-to-phoneme front end; that memory is counted in the
+# MODEL_MEMORY_BUDGET_MB budget, which can unload them. Beyond TTS_MAX_PIPELINES the least recently
+# used one is unloaded too, and any left unused for TTS_PIPELINE_IDLE_SECONDS (0 = never).
+TTS_MAX_PIPELINES = int(os.getenv("TTS_MAX_PIPELINES", "3"))
+TTS_PIPELINE_IDLE_SECONDS = float(os.getenv("TTS_PIPELINE_IDLE_SECONDS", "900"))
+
+
+def resolve_language(language: str | None, default: tuple[str, str]) -> tuple[str, str]:
+    """(Kokoro lang_code, default voice) for a Whisper language code; unknown or missing -> default."""
+    if not language:
+        return default
+    return KOKORO_LANGUAGES.get(language.lower().split("-")[0], default)
+
+
+class PipelinePool:
+    """
+    Kokoro pipelines keyed by lang_code, created by `create(lang_code)` on first use.
+    The pinned language is created up front and kept for the pool's lifetime (its memory is part of the
+    "tts" model). Every other language is a ManagedModel "tts-<lang_code>" in `manager`, so the memory
+    its load added counts towards the manager's budget and is reported with the other models. Requests
+    for one new language share a single load, and a pipeline is never unloaded while a request uses it.
+    """
+
+    def __init__(
+        self,
+        create: Callable[[str], Any],
+        pinned: str,
+        max_pipelines: int = TTS_MAX_PIPELINES,
+        idle_seconds: float = TTS_PIPELINE_IDLE_SECONDS,
+        manager: ModelManager = None,
+    ):
+        self.create = create
+        self.pinned = pinned
+        self.max_pipelines = max(1, max_pipelines)
+        self.idle_seconds = idle_seconds
+        self.manager = manager or ModelManager(interval=0)
+        self._lock = threading.Lock()
+        self._pipelines: dict[str, Any] = {pinned: create(pinned)}
+        self._models: dict[str, ManagedModel] = {}
+        self.stats = {"loads": 1, "evictions": 0, "idle_evictions": 0}
+        self._closed = threading.Event()
+        if idle_seconds > 0:
+            threading.Thread(
+                target=self._idle_loop, args=(min(60.0, idle_seconds / 2),), name="tts-pipeline-idle", daemon=True
+            ).start()
+
+    @property
+    def pinned_pipeline(self):
+        return self._pipelines[self.pinned]
+
+    @contextmanager
+    def use(self, lang_code: str):
+        """Yields the pipeline for lang_code, loading it if needed; it stays loaded until the block exits."""
+        if lang_code == self.pinned:
+            yield self.pinned_pipeline
+            return
+        model = self._model(lang_code)
+        with model.use():
+            with self._lock:
+                pipeline = self._pipelines[lang_code]
+            self._evict_over_capacity(keep=model)
+            yield pipeline
+
+    def _model(self, lang_code: str) -> ManagedModel:
+        with self._lock:
+            if lang_code not in self._models:
+                self._models[lang_code] = self.manager.register(
+                    f"tts-{lang_code}", partial(self._load, lang_code), partial(self._drop, lang_code)
+                )
+            return self._models[lang_code]
+
+    def _load(self, lang_code: str):
+        logger.info(f"Loading Kokoro pipeline for lang_code '{lang_code}'...")
+        pipeline = self.create(lang_code)
+        with self._lock:
+            self._pipelines[lang_code] = pipeline
+            self.stats["loads"] += 1
+
+    def _drop(self, lang_code: str):
+        with self._lock:
+            self._pipelines.pop(lang_code, None)
+
+    def _evict_over_capacity(self, keep: ManagedModel):
+        with self._lock:
+            loaded = [model for model in self._models.values() if model.loaded]
+        # The pinned pipeline counts towards max_pipelines too.
+        for model in sorted(loaded, key=lambda m: m.last_used):
+            if len(loaded) + 1 <= self.max_pipelines:
+                return
+            if model is not keep and model.try_unload(f"more than {self.max_pipelines} Kokoro pipelines loaded"):
+                loaded.remove(model)
+                with self._lock:
+                    self.stats["evictions"] += 1
+
+    def evict_idle(self, now: float = None) -> list[str]:
+        if self.idle_seconds <= 0:
+            return []
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            models = dict(self._models)
+        idle = [
+            code for code, model in models.items()
+            if model.loaded and now - model.last_used >= self.idle_seconds
+            and model.try_unload(f"idle for {now - model.last_used:.0f}s")
+        ]
+        with self._lock:
+            self.stats["idle_evictions"] += len(idle)
+        return idle
+
+    def _idle_loop(self, interval: float):
+        while not self._closed.wait(interval):
+            self.evict_idle()
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            models = {code: model for code, model in self._models.items() if model.loaded}
+            loaded = sorted(self._pipelines)
+            stats = dict(self.stats)
+        return {
+            **stats,
+            "loaded": loaded,
+            "idle_s": {code: round(now - model.last_used, 1) for code, model in models.items()},
+            "memory_mb": {code: round(model.memory_bytes / MB, 1) for code, model in models.items()},
+            "pinned": self.pinned,
+            "max_pipelines": self.max_pipelines,
+            "idle_seconds": self.idle_seconds,
+        }
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            models = list(self._models.values())
+        for model in models:
+            model.try_unload("TTS model unloaded")
@@ -1,86 +1,161 @@
-import os
-import soundfile as sf
+import threading
+from contextlib import ExitStack
 import numpy as np
+from typing import Iterator
 from loguru import logger
 from kokoro import KPipeline
+from src.services.sentence_segmenter import split_sentences
+from src.services.prompt_templates import INSUFFICIENT_CONTEXT_ANSWER, NO_CONTEXT_ANSWER
+from src.services.tts_cache import TTS_CACHE_MAX_MB, TTS_CACHE_PATH, TTSPhraseCache, phrase_key
+from src.services.tts_pipelines import PipelinePool, resolve_language
+from src.services.model_lifecycle import get_model_manager, module_bytes
 
-# Temporary directory for generated speech
-TTS_AUDIO_DIR = ".data/temp_audio"
-os.makedirs(TTS_AUDIO_DIR, exist_ok=True)
+TTS_SAMPLE_RATE = 24000
+TTS_SPEED = 1.0
+# Fixed responses that can be synthesized into the phrase cache at startup (see warmup).
+SYSTEM_PHRASES = [INSUFFICIENT_CONTEXT_ANSWER, NO_CONTEXT_ANSWER]
 
 class TTSService:
     _instance = None
-    
+    _instance_lock = threading.Lock()
+
     def __new__(cls, lang_code="a", default_voice="af_bella"):
+        # The warm-up/precompute thread and the first request may race to build Kokoro; one wins.
         if cls._instance is None:
-            cls._instance = super(TTSService, cls).__new__(cls)
-            cls._instance._init_service(lang_code, default_voice)
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(TTSService, cls).__new__(cls)
+                    instance._init_service(lang_code, default_voice)
+                    cls._instance = instance
         return cls._instance
 
     def _init_service(self, lang_code, default_voice):
         self.lang_code = lang_code
         self.default_voice = default_voice
+        self.model = None  # one Kokoro model, shared by every language's pipeline
         self.pipeline = None
-        self._load_model()
+        self.pipelines = None
+        self.cache = None
+        if TTS_CACHE_PATH:
+            self.cache = TTSPhraseCache(TTS_CACHE_PATH, max_bytes=int(TTS_CACHE_MAX_MB * 1024 * 1024))
+            logger.info(f"TTS phrase cache enabled at {TTS_CACHE_PATH}")
+        self.lifecycle = get_model_manager().register(
+            "tts", self._load_model, self._unload_model, measure=lambda: module_bytes(self.model)
+        )
+        self.lifecycle.ensure_loaded()
 
     def _load_model(self):
         logger.info(f"Loading Kokoro TTS model (lang: {self.lang_code})...")
         try:
-            # Load the kokoro pipeline.
-            # a=American English, b=British English. 
-            self.pipeline = KPipeline(lang_code=self.lang_code)
-            
-            # Move the underlying PyTorch model to GPU if available
-            import torch
-            if torch.cuda.is_available() and hasattr(self.pipeline, 'model'):
-                self.pipeline.model = self.pipeline.model.to("cuda")
-                logger.info("Kokoro TTS model moved to CUDA GPU.")
-            else:
-                logger.info("Kokoro TTS running on CPU (no CUDA or no model attribute).")
-            
+            # The default language is loaded now and kept; others load when a request first needs them.
+            self.pipelines = PipelinePool(self._create_pipeline, pinned=self.lang_code, manager=get_model_manager())
+            self.pipeline = self.pipelines.pinned_pipeline
             logger.info("Kokoro TTS pipeline loaded successfully.")
         except Exception as e:
             logger.error(f"Failed to load Kokoro TTS pipeline: {str(e)}")
             raise
 
-    def generate_audio(self, text: str, voice: str = None, output_filename: str = "output.wav") -> str:
+    def _unload_model(self):
+        self.pipelines.close()
+        self.pipelines = None
+        self.pipeline = None
+        self.model = None
+
+    def _create_pipeline(self, lang_code: str):
+        if self.model is not None:
+            # Later languages only add their own text-to-phoneme front end.
+            return KPipeline(lang_code=lang_code, model=self.model)
+
+        # Load the kokoro pipeline.
+        # a=American English, b=British English. 
+        pipeline = KPipeline(lang_code=lang_code)
+        
+        # Move the underlying PyTorch model to GPU if available
+        import torch
+        if torch.cuda.is_available() and hasattr(pipeline, 'model'):
+            pipeline.model = pipeline.model.to("cuda")
+            logger.info("Kokoro TTS model moved to CUDA GPU.")
+        else:
+            logger.info("Kokoro TTS running on CPU (no CUDA or no model attribute).")
+        self.model = getattr(pipeline, "model", None)
+        return pipeline
+
+    def synthesize_stream(self, text: str, voice: str = None, language: str = None) -> Iterator[np.ndarray]:
         """
-        Synthesizes the given text into speech and saves it as a .wav file.
-        Returns the absolute path to the generated audio file.
+        Synthesizes text one sentence segment at a time (see sentence_segmenter), yielding float32 samples
+        at TTS_SAMPLE_RATE as soon as each segment is ready.
+        language is a Whisper language code (e.g. the one detected in the user's question); it picks the
+        Kokoro pipeline and, unless voice is given, that language's default voice.
         """
-        if not self.pipeline:
-            raise RuntimeError("Kokoro pipeline is not loaded.")
-            
-        output_path = os.path.join(TTS_AUDIO_DIR, output_filename)
-        voice_to_use = voice if voice else self.default_voice
-        
-        logger.debug(f"Synthesizing speech. Text length: {len(text)}, Voice: {voice_to_use}")
-        
-        try:
-            # Generator yields (graphemes, phonemes, audio)
-            generator = self.pipeline(
-                text, voice=voice_to_use, speed=1.0, split_pattern=r'\n+'
-            )
-            
-            all_audio = []
-            sample_rate = 24000
-            
-            for i, (gs, ps, audio) in enumerate(generator):
-                all_audio.append(audio)
-            
-            if not all_audio:
-                raise ValueError("No audio was generated by the pipeline.")
-                
-            # Concatenate chunks if text was split
-            final_audio = np.concatenate(all_audio) if len(all_audio) > 1 else all_audio[0]
-            
-            sf.write(output_path, final_audio, sample_rate)
-            logger.debug(f"Saved synthesized audio to {output_path}")
-            
-            return output_path
-        except Exception as e:
-            logger.error(f"Error during TTS generation: {str(e)}")
-            raise
+        lang_code, language_voice = resolve_language(language, (self.lang_code, self.default_voice))
+        voice_to_use = voice if voice else language_voice
+        segments = split_sentences(text)
+        logger.debug(
+            f"Synthesizing speech. Text length: {len(text)}, Segments: {len(segments)}, "
+            f"Voice: {voice_to_use}, Lang: {lang_code}"
+        )
+
+        with ExitStack() as model_in_use:
+            pipeline = None
+            for segment in segments:
+                key = phrase_key(segment, voice_to_use, TTS_SPEED, lang_code) if self.cache else None
+                cached = self.cache.get(key) if key else None
+                if cached is not None:
+                    yield cached
+                    continue
+                if pipeline is None:
+                    # Only a cache miss needs Kokoro (and reloads it if it was unloaded while idle).
+                    model_in_use.enter_context(self.lifecycle.use())
+                    pipeline = model_in_use.enter_context(self.pipelines.use(lang_code))
+                # Generator yields (graphemes, phonemes, audio)
+                chunks = [
+                    np.asarray(audio, dtype=np.float32)
+                    for _, _, audio in pipeline(segment, voice=voice_to_use, speed=TTS_SPEED, split_pattern=None)
+                ]
+                if not chunks:
+                    continue
+                audio = np.concatenate(chunks) if len(chunks) > 1 else chunks[0]
+                if key:
+                    self.cache.put(key, segment, voice_to_use, audio)
+                yield audio
+
+    def synthesize(self, text: str, voice: str = None, language: str = None) -> np.ndarray:
+        """Synthesizes the given text into float32 samples at TTS_SAMPLE_RATE."""
+        all_audio = list(self.synthesize_stream(text, voice, language))
+        if not all_audio:
+            raise ValueError("No audio was generated by the pipeline.")
+
+        # Concatenate chunks if text was split
+        return np.concatenate(all_audio) if len(all_audio) > 1 else all_audio[0]
+
+    def warm_up(self, text: str = "Hello there."):
+        """Runs Kokoro once on a short phrase, bypassing the phrase cache, so first-call costs are paid now."""
+        with self.lifecycle.use(), self.pipelines.use(self.lang_code) as pipeline:
+            for _ in pipeline(text, voice=self.default_voice, speed=TTS_SPEED, split_pattern=None):
+                pass
+
+    def get_cache_stats(self) -> dict:
+        return self.cache.snapshot() if self.cache else {"enabled": False}
+
+    def get_pipeline_stats(self) -> dict:
+        pipelines = self.pipelines
+        return pipelines.snapshot() if pipelines else {}
 
 def get_tts_service() -> TTSService:
+    """The in-process TTSService, or a client for the TTS worker processes when TTS_WORKER_PROCESSES > 0."""
+    from src.services.model_workers import TTS_WORKER_PROCESSES, TTSWorkerClient, get_worker_pool
+    if TTS_WORKER_PROCESSES > 0:
+        return TTSWorkerClient(get_worker_pool("tts", TTS_WORKER_PROCESSES))
     return TTSService()
+
+def precompute_system_phrases():
+    """Synthesizes SYSTEM_PHRASES once so their sentences are served from the phrase cache."""
+    if not TTS_CACHE_PATH:
+        return
+    tts = get_tts_service()
+    for phrase in SYSTEM_PHRASES:
+        try:
+            tts.synthesize(phrase)
+        except Exception as e:
+            logger.warning(f"Could not precompute TTS phrase '{phrase[:40]}': {e}")
+    logger.info(f"Precomputed {len(SYSTEM_PHRASES)} system phrases into the TTS cache")
@@ -1,8 +1,10 @@
 import chromadb
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
 from chromadb.config import Settings
 from chromadb.utils import embedding_functions
 from loguru import logger
 import os
+from src.services.model_lifecycle import get_model_manager, module_bytes
 
 try:
     import torch
@@ -29,10 +31,37 @@ if torch is not None:
     except Exception:
         _embedding_device = "cpu"
 
-sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-    model_name="all-MiniLM-L6-v2",
-    device=_embedding_device
-)
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+class ManagedEmbeddingFunction(EmbeddingFunction):
+    """
+    Chroma embedding function around the sentence-transformer. Collections keep this object, while the
+    model inside it may be unloaded when idle (see model_lifecycle) and is reloaded by the next embed call.
+    """
+
+    def __init__(self):
+        self._ef = None
+        self.lifecycle = get_model_manager().register(
+            "embedder", self._load, self._unload, measure=lambda: module_bytes(getattr(self._ef, "_model", None))
+        )
+
+    def _load(self):
+        self._ef = embedding_functions.SentenceTransformerEmbeddingFunction(
+            model_name=EMBEDDING_MODEL_NAME,
+            device=_embedding_device
+        )
+
+    def _unload(self):
+        self._ef = None
+        # Chroma also caches loaded models on the class; drop ours so its memory can be freed.
+        getattr(embedding_functions.SentenceTransformerEmbeddingFunction, "models", {}).pop(EMBEDDING_MODEL_NAME, None)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        with self.lifecycle.use():
+            return self._ef(input)
+
+sentence_transformer_ef = ManagedEmbeddingFunction()
+sentence_transformer_ef.lifecycle.ensure_loaded()
 
 def get_collection() -> chromadb.Collection:
     """Gets or creates the main document collection."""
@@ -86,7 +115,7 @@ def query_collection(
     Filters out results that have an L2 distance greater than max_distance.
     
     Returns:
-        List of dictionaries containing 'text' and 'metadata'.
+        List of dictionaries containing 'text', 'metadata' and 'distance' (None if unavailable).
     """
     try:
         results = collection.query(
@@ -101,6 +130,7 @@ def query_collection(
             
         for i in range(len(results['documents'][0])):
             # Filter by matching distance
+            distance = None
             if 'distances' in results and results['distances']:
                 distance = results['distances'][0][i]
                 if distance > max_distance:
@@ -109,7 +139,8 @@ def query_collection(
                     
             formatted_results.append({
                 "text": results['documents'][0][i],
-                "metadata": results['metadatas'][0][i] or {}
+                "metadata": results['metadatas'][0][i] or {},
+                "distance": distance,
             })
 
         # If strict distance filtering removed everything, fall back to top-k so RAG still has context.
@@ -118,7 +149,8 @@ def query_collection(
             for i in range(min(2, len(results['documents'][0]))):
                 formatted_results.append({
                     "text": results['documents'][0][i],
-                    "metadata": (results.get('metadatas') or [[{}]])[0][i] or {}
+                    "metadata": (results.get('metadatas') or [[{}]])[0][i] or {},
+                    "distance": results['distances'][0][i] if results.get('distances') else None,
                 })
             
         return formatted_results
@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+from typing import Callable
+from loguru import logger
+
+# Models loaded and exercised with a dummy inference at startup, each in its own background thread.
+# GET /health/ready answers 503 until every one of them is warm. Empty (default) = no warm-up, ready at once.
+WARMUP_MODELS = [m.strip().lower() for m in os.getenv("WARMUP_MODELS", "").split(",") if m.strip()]
+# Canned TTS answers are synthesized into the phrase cache at startup when "tts" is warmed up, or on their
+# own with TTS_PRECOMPUTE_PHRASES=1; 0 never does. Either way it loads Kokoro, so it is not the default.
+TTS_PRECOMPUTE_PHRASES = os.getenv("TTS_PRECOMPUTE_PHRASES", "").strip()
+
+
+def _warm_stt():
+    from src.services.stt_service import get_stt_service
+    get_stt_service().warm_up()
+
+
+def _warm_tts():
+    from src.services.tts_service import get_tts_service
+    get_tts_service().warm_up()
+
+
+def _warm_embedder():
+    from src.services.vector_store import sentence_transformer_ef
+    sentence_transformer_ef(["warm-up probe"])
+
+
+def _warm_ocr():
+    from PIL import Image
+    from src.services.screen_reader import get_screen_reader_service
+    get_screen_reader_service().read_image(Image.new("RGB", (64, 32), "white"))
+
+
+WARMUP_TASKS: dict[str, Callable[[], None]] = {
+    "stt": _warm_stt,
+    "tts": _warm_tts,
+    "embedder": _warm_embedder,
+    "ocr": _warm_ocr,
+}
+
+
+class Warmup:
+    """Runs the selected warm-up tasks concurrently and tracks their state for the readiness probe."""
+
+    def __init__(self, models: list[str] = WARMUP_MODELS, tasks: dict[str, Callable[[], None]] = None):
+        self.tasks = tasks or WARMUP_TASKS
+        unknown = [name for name in models if name not in self.tasks]
+        if unknown:
+            raise ValueError(f"Unknown WARMUP_MODELS entries: {', '.join(unknown)}. Choose from: {', '.join(self.tasks)}")
+        self.models = list(dict.fromkeys(models))
+        self._lock = threading.Lock()
+        self._states = {name: {"state": "pending", "seconds": None, "error": None} for name in self.models}
+        self._threads: list[threading.Thread] = []
+
+    def start(self):
+        for name in self.models:
+            thread = threading.Thread(target=self._run, args=(name,), name=f"warmup-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.models:
+            logger.info(f"Warming up models in the background: {', '.join(self.models)}")
+
+    def _run(self, name: str):
+        self._set(name, state="warming")
+        started = time.monotonic()
+        try:
+            self.tasks[name]()
+        except Exception as e:
+            logger.error(f"Warm-up of '{name}' failed: {e}")
+            self._set(name, state="failed", seconds=round(time.monotonic() - started, 2), error=str(e))
+            return
+        seconds = round(time.monotonic() - started, 2)
+        logger.info(f"Model '{name}' warm after {seconds}s")
+        self._set(name, state="ready", seconds=seconds)
+
+    def _set(self, name: str, **fields):
+        with self._lock:
+            self._states[name].update(fields)
+
+    def wait(self, timeout: float = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return self.ready
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return all(state["state"] == "ready" for state in self._states.values())
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"ready": all(s["state"] == "ready" for s in self._states.values()),
+                    "models": {name: dict(state) for name, state in self._states.items()}}
+
+
+_warmup = None
+_warmup_lock = threading.Lock()
+
+
+def _precompute_phrases():
+    from src.services.tts_service import precompute_system_phrases
+    precompute_system_phrases()
+
+
+def should_precompute_phrases(models: list[str], setting: str = TTS_PRECOMPUTE_PHRASES) -> bool:
+    return setting == "1" or (setting != "0" and "tts" in models)
+
+
+def _precompute_when_warm(warmup: Warmup):
+    # Waits for the warm-ups so Kokoro is never loaded by two threads at once.
+    warmup.wait()
+    try:
+        _precompute_phrases()
+    except Exception as e:
+        logger.error(f"Precomputing TTS system phrases failed: {e}")
+
+
+def start_warmup() -> Warmup:
+    """Starts the WARMUP_MODELS warm-ups, then (if enabled) the TTS system-phrase precompute, in background threads."""
+    global _warmup
+    with _warmup_lock:
+        if _warmup is None:
+            _warmup = Warmup()
+            _warmup.start()
+            if should_precompute_phrases(_warmup.models):
+                threading.Thread(
+                    target=_precompute_when_warm, args=(_warmup,), name="tts-precompute", daemon=True
+                ).start()
+        return _warmup
+
+
+def get_warmup() -> Warmup | None:
+    return _warmup
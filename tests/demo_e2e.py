@@ -1,8 +1,7 @@
-import os
-import io
 from fastapi.testclient import TestClient
 from src.main import app
-from src.services.tts_service import get_tts_service
+from src.services.audio_encode import encode_audio
+from src.services.tts_service import TTS_SAMPLE_RATE, get_tts_service
 
 def run_demo():
     print("==================================================")
@@ -15,22 +14,18 @@ def run_demo():
     question_text = "What is a large language model?"
     print(f"      Question: '{question_text}'")
     
-    question_audio_path = tts_service.generate_audio(
-        text=question_text, 
-        output_filename="test_spoken_query.wav"
-    )
-    print(f"      Created mock audio input at: {question_audio_path}")
+    question_audio = encode_audio(tts_service.synthesize(question_text), TTS_SAMPLE_RATE, "audio/wav")
+    print(f"      Created mock audio input ({len(question_audio)} bytes of WAV)")
 
     # 2. Feed it into the new Voice RAG pipeline
     print("\n[2/3] Submitting audio to /ask_voice endpoint (Whisper STT -> ChromaDB -> Sarvam LLM -> Kokoro TTS)...")
     client = TestClient(app)
     
-    with open(question_audio_path, "rb") as f:
-        # Note: Depending on hardware, loading 3 ML models sequentially may take 15-30 seconds
-        response = client.post(
-            "/ask_voice",
-            files={"file": ("test_spoken_query.wav", f, "audio/wav")}
-        )
+    # Note: Depending on hardware, loading 3 ML models sequentially may take 15-30 seconds
+    response = client.post(
+        "/ask_voice",
+        files={"file": ("test_spoken_query.wav", question_audio, "audio/wav")}
+    )
         
     # 3. Print the results
     print("\n[3/3] Analyzing Pipeline Output...")
@@ -0,0 +1,263 @@
+"""
+Minimal stand-in for a KoboldCpp server, for tests and local development without a model.
+
+Implements the endpoints LLMService talks to:
+- GET  /api/extra/version, /api/v1/model, /api/v1/config/max_length (health probes)
+- POST /api/v1/generate (blocking completion)
+- POST /api/extra/generate/stream (Server-Sent Events, one {"token": ...} per event)
+- POST /api/extra/abort (stops the streamed generation with the matching genkey)
+
+Generation speed (token rate), prompt-processing latency (fixed, uniform or lognormal) and
+failures (HTTP errors, streams cut mid-generation) are configurable for load tests.
+
+Run standalone with:  python tests/fake_koboldcpp.py --port 5001 --tokens-per-second 30 --latency-ms 150
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = "VoxVeritas is an accessibility assistant. It answers questions about your documents."
+
+
+def _tokenize(text: str) -> list[str]:
+    # Word-level tokens that keep their leading whitespace, so "".join(tokens) == text.
+    return re.findall(r"\s*\S+", text)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_FakeHTTPServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b"{}"
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return {}
+
+    def do_GET(self):
+        fake = self.server.fake
+        if fake.down:
+            self._send_json(503, {"detail": "server down"})
+        elif self.path == "/api/extra/version":
+            self._send_json(200, {"result": "KoboldCpp", "version": "fake"})
+        elif self.path == "/api/v1/model":
+            self._send_json(200, {"result": fake.model_name})
+        elif self.path == "/api/v1/config/max_length":
+            self._send_json(200, {"value": 4096})
+        else:
+            self._send_json(404, {"detail": "not found"})
+
+    def do_POST(self):
+        fake = self.server.fake
+        payload = self._read_json()
+        fake.requests.append((self.path, payload))
+        if fake.down:
+            self._send_json(503, {"detail": "server down"})
+            return
+
+        if self.path == "/api/extra/abort":
+            fake.aborted.append(payload.get("genkey"))
+            self._send_json(200, {"success": "true"})
+            return
+
+        if self.path not in ("/api/v1/generate", "/api/extra/generate/stream"):
+            self._send_json(404, {"detail": "not found"})
+            return
+
+        fake.generations += 1
+        if fake.roll(fake.failure_rate):
+            fake.failures_injected += 1
+            self._send_json(fake.failure_status, {"detail": "injected failure"})
+            return
+
+        tokens = _tokenize(fake.reply)[: int(payload.get("max_length") or 512)]
+        time.sleep(fake.sample_latency())
+        if self.path == "/api/v1/generate":
+            time.sleep(fake.token_delay * len(tokens))
+            self._send_json(200, {"results": [{"text": "".join(tokens)}]})
+        else:
+            events = [f"event: message\ndata: {json.dumps({'token': token})}\n\n".encode("utf-8") for token in tokens]
+            cut_after = fake.sample_cut(len(tokens))
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            if cut_after is not None:
+                # Announce the full body, then stop early: the client sees a truncated response.
+                self.send_header("Content-Length", str(sum(len(event) for event in events)))
+            self.end_headers()
+            try:
+                genkey = payload.get("genkey")
+                for i, event in enumerate(events):
+                    if genkey and genkey in fake.aborted:
+                        break
+                    if i == cut_after:
+                        fake.failures_injected += 1
+                        self.close_connection = True
+                        break
+                    time.sleep(fake.token_delay)
+                    fake.tokens_streamed += 1
+                    self.wfile.write(event)
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # Client stopped reading; KoboldCpp would stop generating here too.
+                pass
+
+
+class _FakeHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fake: "FakeKoboldCpp"):
+        super().__init__(address, _Handler)
+        self.fake = fake
+
+
+class FakeKoboldCpp:
+    """
+    In-process fake KoboldCpp server running on a background thread.
+    token_delay (or tokens_per_second) sets generation speed; latency_ms/latency_jitter_ms add a
+    per-generation prompt-processing delay drawn from latency_distribution ("fixed", "uniform" or
+    "lognormal"); failure_rate answers generations with failure_status and stream_cut_rate drops
+    streams part-way through.
+    """
+
+    def __init__(
+        self,
+        reply: str = DEFAULT_REPLY,
+        token_delay: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        model_name: str = "fake/koboldcpp",
+        tokens_per_second: float | None = None,
+        latency_ms: float = 0.0,
+        latency_jitter_ms: float = 0.0,
+        latency_distribution: str = "fixed",
+        failure_rate: float = 0.0,
+        failure_status: int = 503,
+        stream_cut_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        if latency_distribution not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {latency_distribution}")
+        self.reply = reply
+        self.token_delay = 1.0 / tokens_per_second if tokens_per_second else token_delay
+        self.model_name = model_name
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.latency_distribution = latency_distribution
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.stream_cut_rate = stream_cut_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.requests: list[tuple[str, dict]] = []
+        self.aborted: list[str] = []
+        self.tokens_streamed = 0
+        self.generations = 0
+        self.failures_injected = 0
+        self.down = False  # when True every endpoint answers 503
+        self._server = _FakeHTTPServer((host, port), self)
+        self._thread = None
+
+    def roll(self, probability: float) -> bool:
+        if probability <= 0:
+            return False
+        with self._rng_lock:
+            return self._rng.random() < probability
+
+    def sample_cut(self, n_tokens: int) -> int | None:
+        """Index of the token before which a stream is dropped, or None to finish normally."""
+        if not self.roll(self.stream_cut_rate):
+            return None
+        with self._rng_lock:
+            return self._rng.randint(0, max(n_tokens - 1, 0))
+
+    def sample_latency(self) -> float:
+        """Seconds of simulated prompt processing before the first token."""
+        if self.latency_ms <= 0:
+            return 0.0
+        with self._rng_lock:
+            if self.latency_distribution == "uniform":
+                ms = self._rng.uniform(self.latency_ms - self.latency_jitter_ms, self.latency_ms + self.latency_jitter_ms)
+            elif self.latency_distribution == "lognormal":
+                # Median latency_ms with a long right tail, like real prefill under contention.
+                sigma = math.log1p(self.latency_jitter_ms / self.latency_ms) if self.latency_jitter_ms else 0.5
+                ms = self._rng.lognormvariate(math.log(self.latency_ms), sigma)
+            else:
+                ms = self.latency_ms
+        return max(ms, 0.0) / 1000
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeKoboldCpp":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "FakeKoboldCpp":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake KoboldCpp server for local testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--reply", default=DEFAULT_REPLY, help="Text returned for every generation.")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="Seconds between streamed tokens.")
+    parser.add_argument("--tokens-per-second", type=float, help="Generation speed; overrides --token-delay.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Prompt-processing delay per generation.")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--latency-distribution", choices=["fixed", "uniform", "lognormal"], default="fixed")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of generations answered with an error.")
+    parser.add_argument("--failure-status", type=int, default=503)
+    parser.add_argument("--stream-cut-rate", type=float, default=0.0, help="Share of streams dropped mid-generation.")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    fake = FakeKoboldCpp(
+        reply=args.reply,
+        token_delay=args.token_delay,
+        host=args.host,
+        port=args.port,
+        tokens_per_second=args.tokens_per_second,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        latency_distribution=args.latency_distribution,
+        failure_rate=args.failure_rate,
+        failure_status=args.failure_status,
+        stream_cut_rate=args.stream_cut_rate,
+        seed=args.seed,
+    )
+    print(f"Fake KoboldCpp listening on {fake.base_url}")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,248 @@
+"""
+Open-loop load generator for the VoxVeritas API.
+
+Sends requests at a fixed target rate (independent of how fast responses come back) to a mix of
+endpoints and reports throughput, p50/p95/p99 latency and error rates per endpoint. For streaming
+endpoints, time to first token is reported too. Latencies are measured from each request's scheduled
+send time, so time spent waiting for a free sender (when max-in-flight is reached) counts against the
+server instead of being silently omitted.
+
+Against a running server (e.g. one pointed at `python tests/fake_koboldcpp.py`):
+    python tests/load_test.py --url http://127.0.0.1:8000 --rps 10 --duration 30
+
+Fully in-process, with no GPU or model: starts the fake KoboldCpp and the FastAPI app itself:
+    python tests/load_test.py --in-process --rps 10 --duration 30 --endpoints chat,ask_stream \\
+        --fake-tokens-per-second 40 --fake-latency-ms 150 --fake-failure-rate 0.02
+"""
+import argparse
+import json
+import math
+import os
+import socket
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fake_koboldcpp import FakeKoboldCpp  # noqa: E402
+
+DEFAULT_QUERIES = [
+    "What is VoxVeritas?",
+    "Summarize the uploaded document.",
+    "What does the screen show?",
+    "Who is the intended user of this assistant?",
+]
+
+# name -> (method, path, body builder, streamed)
+ENDPOINTS = {
+    "ask": ("POST", "/ask", lambda q: {"query": q, "mode": "rag"}, False),
+    "ask_auto": ("POST", "/ask", lambda q: {"query": q, "mode": "auto"}, False),
+    "chat": ("POST", "/chat", lambda q: {"prompt": q}, False),
+    "ask_stream": ("POST", "/ask/stream", lambda q: {"query": q, "mode": "rag"}, True),
+    "chat_stream": ("POST", "/chat/stream", lambda q: {"prompt": q}, True),
+    "health_llm": ("GET", "/health/llm", None, False),
+}
+
+_local = threading.local()
+
+
+def _session() -> requests.Session:
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+
+def send(base_url: str, endpoint: str, query: str, timeout: float, scheduled_at: float = None) -> dict:
+    method, path, body, streamed = ENDPOINTS[endpoint]
+    started = time.perf_counter() if scheduled_at is None else scheduled_at
+    result = {"endpoint": endpoint, "status": None, "ok": False, "latency_ms": None, "ttft_ms": None}
+    try:
+        response = _session().request(
+            method, base_url + path, json=body(query) if body else None, timeout=timeout, stream=streamed
+        )
+        result["status"] = response.status_code
+        if streamed and response.ok:
+            event = None
+            for raw in response.iter_lines():
+                line = raw.decode("utf-8", errors="replace")
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:") and event == "token" and result["ttft_ms"] is None:
+                    result["ttft_ms"] = (time.perf_counter() - started) * 1000
+                elif line.startswith("data:") and event == "error":
+                    # Streaming endpoints report failures in-band after the 200 header.
+                    result["status"] = json.loads(line[len("data:"):]).get("status") or 500
+        else:
+            response.content  # read the whole body so latency covers the full response
+        result["ok"] = result["status"] is not None and result["status"] < 400
+    except requests.RequestException as e:
+        result["status"] = type(e).__name__
+    result["latency_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))  # nearest-rank
+    return ordered[rank - 1]
+
+
+def run_load(base_url: str, endpoints: list[str], queries: list[str], rps: float, duration: float,
+             max_in_flight: int, timeout: float, unique: bool) -> tuple[list[dict], float]:
+    total = int(rps * duration)
+    results = []
+    lock = threading.Lock()
+
+    def record(future):
+        with lock:
+            results.append(future.result())
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        for i in range(total):
+            scheduled_at = started + i / rps
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            query = queries[i % len(queries)]
+            if unique:
+                query = f"{query} (request {i})"  # defeats coalescing and completion caching
+            future = pool.submit(send, base_url, endpoints[i % len(endpoints)], query, timeout, scheduled_at)
+            future.add_done_callback(record)
+    return results, time.perf_counter() - started
+
+
+def summarize(results: list[dict], elapsed: float) -> dict:
+    by_endpoint = defaultdict(list)
+    for r in results:
+        by_endpoint[r["endpoint"]].append(r)
+    by_endpoint["ALL"] = results
+
+    report = {}
+    for endpoint, rows in by_endpoint.items():
+        ok = [r for r in rows if r["ok"]]
+        latencies = [r["latency_ms"] for r in ok]
+        ttfts = [r["ttft_ms"] for r in ok if r["ttft_ms"] is not None]
+        report[endpoint] = {
+            "requests": len(rows),
+            "ok": len(ok),
+            "error_rate": round(1 - len(ok) / len(rows), 4) if rows else 0.0,
+            "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "ttft_p50_ms": percentile(ttfts, 50),
+            "statuses": dict(Counter(str(r["status"]) for r in rows)),
+        }
+    return report
+
+
+def _fmt(value: float | None) -> str:
+    return "-" if value is None else f"{value:.0f}"
+
+
+def print_report(report: dict, elapsed: float):
+    print(f"\nElapsed: {elapsed:.1f}s")
+    print(f"{'endpoint':<12} {'reqs':>6} {'ok':>6} {'err%':>6} {'rps':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'ttft50':>7}  statuses")
+    for endpoint, row in report.items():
+        print(
+            f"{endpoint:<12} {row['requests']:>6} {row['ok']:>6} {row['error_rate'] * 100:>5.1f}% {row['throughput_rps']:>7.2f} "
+            f"{_fmt(row['p50_ms']):>7} {_fmt(row['p95_ms']):>7} {_fmt(row['p99_ms']):>7} {_fmt(row['ttft_p50_ms']):>7}  "
+            f"{row['statuses']}"
+        )
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_in_process_app(fake: FakeKoboldCpp) -> tuple[str, object]:
+    """Points the LLM service at the fake server, then serves the real FastAPI app on a local port."""
+    os.environ["KOBOLDCPP_BASE_URL"] = fake.base_url
+    import uvicorn
+    from src.main import app
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.monotonic() + 120
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("In-process API server did not start")
+        time.sleep(0.1)
+    return f"http://127.0.0.1:{port}", server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test the VoxVeritas API at a target request rate.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="API base URL (ignored with --in-process)")
+    parser.add_argument("--in-process", action="store_true", help="Start the fake KoboldCpp and the API in this process")
+    parser.add_argument("--rps", type=float, default=5.0, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to send requests for")
+    parser.add_argument("--endpoints", default="ask,chat", help=f"Comma-separated mix of: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--queries", type=Path, help="Text file with one query per line")
+    parser.add_argument("--unique", action="store_true", help="Make every query unique (no coalescing/caching)")
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", type=Path, help="Also write the report as JSON")
+    parser.add_argument("--fake-tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--fake-latency-ms", type=float, default=100.0)
+    parser.add_argument("--fake-latency-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--fake-latency-distribution", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--fake-failure-rate", type=float, default=0.0)
+    parser.add_argument("--fake-stream-cut-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = [e for e in endpoints if e not in ENDPOINTS]
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(unknown)}")
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        queries = [line.strip() for line in args.queries.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+    fake = server = None
+    base_url = args.url.rstrip("/")
+    if args.in_process:
+        fake = FakeKoboldCpp(
+            tokens_per_second=args.fake_tokens_per_second,
+            latency_ms=args.fake_latency_ms,
+            latency_jitter_ms=args.fake_latency_jitter_ms,
+            latency_distribution=args.fake_latency_distribution,
+            failure_rate=args.fake_failure_rate,
+            stream_cut_rate=args.fake_stream_cut_rate,
+        ).start()
+        base_url, server = start_in_process_app(fake)
+        print(f"Fake KoboldCpp at {fake.base_url}, API at {base_url}")
+
+    print(f"Sending {int(args.rps * args.duration)} requests at {args.rps} rps to {', '.join(endpoints)} ...")
+    try:
+        results, elapsed = run_load(
+            base_url, endpoints, queries, args.rps, args.duration, args.max_in_flight, args.timeout, args.unique
+        )
+    finally:
+        if server is not None:
+            server.should_exit = True
+        if fake is not None:
+            print(f"Fake KoboldCpp: {fake.generations} generations, {fake.failures_injected} injected failures")
+            fake.stop()
+
+    report = summarize(results, elapsed)
+    print_report(report, elapsed)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,59 @@
+import threading
+import time
+import pytest
+from src.services.admission import AdmissionQueue, LLMOverloadedError, PRIORITY_TEXT, PRIORITY_VOICE
+
+def _wait_until_queued(queue, n, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while queue.snapshot()["queued"] < n:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_voice_requests_are_served_before_queued_text():
+    queue = AdmissionQueue("rag", max_concurrency=1, max_queue=8)
+    order = []
+    holder = queue.acquire(PRIORITY_TEXT, deadline_s=10)
+
+    def worker(name, priority):
+        with queue.acquire(priority, deadline_s=10):
+            order.append(name)
+
+    threads = [threading.Thread(target=worker, args=("text", PRIORITY_TEXT))]
+    threads[0].start()
+    _wait_until_queued(queue, 1)
+    threads.append(threading.Thread(target=worker, args=("voice", PRIORITY_VOICE)))
+    threads[1].start()
+    _wait_until_queued(queue, 2)
+
+    with holder:
+        pass
+    for t in threads:
+        t.join(timeout=5)
+    assert order == ["voice", "text"]
+    assert queue.snapshot()["admitted"] == 3
+
+def test_rejects_when_queue_is_full():
+    queue = AdmissionQueue("chat", max_concurrency=1, max_queue=0)
+    with queue.acquire(PRIORITY_TEXT, deadline_s=10):
+        with pytest.raises(LLMOverloadedError) as excinfo:
+            queue.acquire(PRIORITY_TEXT, deadline_s=10)
+    assert excinfo.value.retry_after >= 1
+    assert queue.snapshot()["rejected_queue_full"] == 1
+
+def test_sheds_requests_that_would_miss_their_deadline():
+    queue = AdmissionQueue("chat", max_concurrency=1, max_queue=8)
+    queue.ewma_service_s = 5.0  # observed generations take ~5s
+    with queue.acquire(PRIORITY_TEXT, deadline_s=60):
+        with pytest.raises(LLMOverloadedError):
+            queue.acquire(PRIORITY_TEXT, deadline_s=2)
+    assert queue.snapshot()["shed_deadline"] == 1
+
+def test_queued_request_dropped_when_deadline_passes():
+    queue = AdmissionQueue("chat", max_concurrency=1, max_queue=8)
+    with queue.acquire(PRIORITY_TEXT, deadline_s=60):
+        started = time.monotonic()
+        with pytest.raises(LLMOverloadedError):
+            queue.acquire(PRIORITY_TEXT, deadline_s=0.1)
+        assert time.monotonic() - started < 2
+    snapshot = queue.snapshot()
+    assert snapshot["queued"] == 0 and snapshot["active"] == 0
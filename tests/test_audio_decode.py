@@ -0,0 +1,35 @@
+import io
+import shutil
+import numpy as np
+import pytest
+import soundfile as sf
+from src.services.audio_decode import AudioDecodeError, decode_audio
+
+def _encode(samples: np.ndarray, rate: int, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, rate, format=fmt)
+    return buffer.getvalue()
+
+def _tone(hz: float, rate: int, seconds: float = 1.0) -> np.ndarray:
+    t = np.arange(int(rate * seconds)) / rate
+    return (0.5 * np.sin(2 * np.pi * hz * t)).astype(np.float32)
+
+@pytest.mark.parametrize("fmt, filename", [("WAV", "clip.wav"), ("FLAC", "clip.flac"), ("OGG", "clip.ogg")])
+def test_decodes_in_memory_to_16khz_mono(fmt, filename):
+    stereo = np.stack([_tone(440, 44100), _tone(440, 44100)], axis=1)
+    audio = decode_audio(_encode(stereo, 44100, fmt), filename)
+    assert audio.dtype == np.float32 and audio.ndim == 1
+    assert abs(len(audio) - 16000) <= 1
+    assert 0.3 < np.abs(audio[1000:-1000]).max() < 0.6
+
+def test_downsampling_filters_out_frequencies_above_nyquist():
+    # 12 kHz cannot be represented at 16 kHz; without a low-pass it would alias down to 4 kHz.
+    audio = decode_audio(_encode(_tone(12000, 48000), 48000, "WAV"), "tone.wav")
+    assert np.sqrt(np.mean(audio[1000:-1000] ** 2)) < 0.05
+
+def test_undecodable_audio_raises():
+    with pytest.raises(AudioDecodeError):
+        decode_audio(b"", "empty.wav")
+    if shutil.which("ffmpeg") is None:
+        with pytest.raises(AudioDecodeError, match="ffmpeg"):
+            decode_audio(b"not really audio", "clip.m4a")
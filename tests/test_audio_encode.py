@@ -0,0 +1,21 @@
+import io
+import numpy as np
+import soundfile as sf
+from src.services.audio_encode import encode_audio, negotiate_audio_format
+
+def test_accept_header_negotiation():
+    assert negotiate_audio_format(None) == "audio/wav"
+    assert negotiate_audio_format("*/*") == "audio/wav"
+    assert negotiate_audio_format("audio/flac;q=0.5, audio/ogg;q=0.9") == "audio/ogg"
+    assert negotiate_audio_format("audio/webm, audio/opus;q=0.8") == "audio/ogg"
+    assert negotiate_audio_format("audio/ogg;q=0, audio/mpeg") == "audio/mpeg"
+
+def test_compressed_codecs_round_trip_and_are_smaller_than_wav():
+    audio = (0.3 * np.sin(2 * np.pi * 220 * np.arange(24000 * 2) / 24000)).astype(np.float32)
+    sizes = {}
+    for media_type in ("audio/wav", "audio/flac", "audio/ogg"):
+        data = encode_audio(audio, 24000, media_type)
+        decoded, rate = sf.read(io.BytesIO(data))
+        assert rate == 24000 and len(decoded) == len(audio)
+        sizes[media_type] = len(data)
+    assert sizes["audio/ogg"] < sizes["audio/flac"] < sizes["audio/wav"]
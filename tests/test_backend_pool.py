@@ -0,0 +1,158 @@
+import threading
+import pytest
+import requests
+from fake_koboldcpp import FakeKoboldCpp
+from src.services import backend_pool
+from src.services.backend_pool import Backend, BackendPool, LLMUnavailableError
+from src.services.llm_service import LLMService
+
+def _pool(*urls):
+    return BackendPool([Backend(url) for url in urls], threading.Lock())
+
+def test_routes_to_least_outstanding_backend():
+    pool = _pool("http://a", "http://b")
+    first = pool.acquire()
+    second = pool.acquire()
+    assert first.backend.url != second.backend.url
+
+    with second:
+        pass
+    assert pool.acquire().backend is second.backend
+
+def test_ejects_after_consecutive_failures_and_readmits(monkeypatch):
+    monkeypatch.setattr(backend_pool, "KOBOLDCPP_EJECT_AFTER_FAILURES", 2)
+    pool = _pool("http://a", "http://b")
+    bad = pool.backends[0]
+
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            with _Forced(pool, bad):
+                raise requests.ConnectionError("down")
+
+    snapshot = {s["url"]: s for s in pool.snapshot()}
+    assert snapshot["http://a"]["state"] == "open"
+    assert all(pool.acquire().backend.url == "http://b" for _ in range(3))
+
+    bad.open_until = 0.0  # cooldown elapsed
+    pool.backends[1].state = "open"
+    pool.backends[1].open_until = float("inf")
+    trial = pool.acquire()
+    assert trial.backend is bad and bad.state == "half_open"
+    with trial:
+        pass
+    assert pool.snapshot()[0]["healthy"]
+    assert bad.consecutive_failures == 0
+
+def test_fails_fast_while_all_circuits_open():
+    pool = _pool("http://a")
+    pool.record_probe(pool.backends[0], ok=False)
+    with pytest.raises(LLMUnavailableError) as excinfo:
+        pool.acquire()
+    assert excinfo.value.retry_after >= 1
+
+    pool.record_probe(pool.backends[0], ok=True)
+    assert pool.acquire().backend.url == "http://a"
+
+def test_failed_trial_reopens_circuit():
+    pool = _pool("http://a")
+    backend = pool.backends[0]
+    backend.state, backend.open_until = "open", 0.0
+    with pytest.raises(requests.ConnectionError):
+        with pool.acquire():
+            raise requests.ConnectionError("still down")
+    assert backend.state == "open"
+    with pytest.raises(LLMUnavailableError):
+        pool.acquire()
+
+def test_client_errors_do_not_count_against_backend():
+    pool = _pool("http://a")
+    response = requests.Response()
+    response.status_code = 400
+    with pytest.raises(requests.HTTPError):
+        with pool.acquire():
+            raise requests.HTTPError(response=response)
+    assert pool.backends[0].failures == 0
+
+def test_llm_service_spreads_load_across_mode_backends(monkeypatch):
+    with FakeKoboldCpp(reply="From A.") as a, FakeKoboldCpp(reply="From B.") as b:
+        from src.services import llm_service
+        monkeypatch.setitem(llm_service.MODEL_CONFIGS["rag"], "backends", [a.base_url, b.base_url])
+        service = LLMService(health_interval=0)
+
+        pool = service.pools["rag"]
+        # While one backend is busy, the next request goes to the other one.
+        with _Forced(pool, pool.backends[0]):
+            assert service.generate_response("Hi", mode="rag", max_tokens=8) == "From B."
+        with _Forced(pool, pool.backends[1]):
+            assert service.generate_response("Hi", mode="rag", max_tokens=8) == "From A."
+
+        stats = service.get_backend_stats()["rag"]
+        assert [s["outstanding"] for s in stats] == [0, 0]
+        assert all(s["ewma_latency_ms"] is not None for s in stats)
+
+class _Forced:
+    """Leases a specific backend, bypassing routing, to drive failures deterministically."""
+    def __init__(self, pool, backend):
+        backend.outstanding += 1
+        self.lease = backend_pool._Lease(pool, backend)
+
+    def __enter__(self):
+        return self.lease.__enter__()
+
+    def __exit__(self, *exc):
+        return self.lease.__exit__(*exc)
+
+def test_health_monitor_tracks_backend_without_request_path_probes():
+    with FakeKoboldCpp() as fake:
+        service = LLMService(base_url=fake.base_url, health_interval=0.05)
+        try:
+            assert service.connected
+            fake.down = True
+            _wait_for(lambda: not service.connected)
+            probes_before = len(fake.requests)
+            with pytest.raises(LLMUnavailableError):
+                service.generate_response("Hi", max_tokens=4)
+            assert len(fake.requests) == probes_before  # failed fast, nothing sent upstream
+
+            fake.down = False
+            _wait_for(lambda: service.connected)
+            assert service.generate_response("Hi", max_tokens=4)
+        finally:
+            service.close()
+
+def _wait_for(predicate, timeout=5.0):
+    import time
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.02)
+
+def test_injected_failures_and_cut_streams_open_the_circuit(monkeypatch):
+    monkeypatch.setattr(backend_pool, "KOBOLDCPP_EJECT_AFTER_FAILURES", 2)
+    with FakeKoboldCpp(failure_rate=1.0) as failing, FakeKoboldCpp(stream_cut_rate=1.0, seed=0) as cutting:
+        for fake, call in (
+            (failing, lambda s: s.generate_response("Hi", max_tokens=4)),
+            (cutting, lambda s: list(s.stream_response("Hi", max_tokens=16))),
+        ):
+            service = LLMService(base_url=fake.base_url, health_interval=0)
+            for _ in range(2):
+                with pytest.raises(requests.RequestException):
+                    call(service)
+            with pytest.raises(LLMUnavailableError):
+                call(service)
+            assert fake.failures_injected == 2
+
+def test_streams_stopped_by_the_consumer_release_without_a_latency_sample():
+    pool = _pool("http://a")
+
+    def stream():
+        with pool.acquire():
+            yield "token"
+            yield "token"
+
+    tokens = stream()
+    next(tokens)
+    tokens.close()  # GeneratorExit inside the lease
+    [backend] = pool.backends
+    assert backend.outstanding == 0 and backend.failures == 0
+    assert backend.ewma_latency_ms is None and backend.last_latency_ms is None
@@ -0,0 +1,26 @@
+from src.services.cascade_router import CascadeRouter, LARGE_MODE, SMALL_MODE
+
+def _items(distance: float, text: str = "The launch is on Monday.") -> list[dict]:
+    return [{"metadata": {"source_filename": "notes.pdf"}, "text": text, "distance": distance}]
+
+def test_grounded_simple_question_stays_on_small_model():
+    router = CascadeRouter(max_distance=1.0, max_context_chars=500, max_query_words=20)
+    features = router.features("When is the launch?", _items(0.4))
+    assert features["best_distance"] == 0.4
+    assert router.route(features) == (SMALL_MODE, "grounded_simple")
+
+def test_low_confidence_long_or_open_ended_queries_escalate():
+    router = CascadeRouter(max_distance=1.0, max_context_chars=500, max_query_words=20)
+    cases = {
+        "low_retrieval_confidence": router.features("When is the launch?", _items(1.6)),
+        "no_grounding": router.features("When is the launch?", []),
+        "long_context": router.features("When is the launch?", _items(0.4, "x" * 600)),
+        "open_ended": router.features("Why was the launch moved?", _items(0.4)),
+        "long_query": router.features(" ".join(["launch"] * 25), _items(0.4)),
+    }
+    for reason, features in cases.items():
+        assert router.route(features) == (LARGE_MODE, reason)
+
+    stats = router.snapshot()
+    assert stats["decisions"] == {LARGE_MODE: 5}
+    assert stats["thresholds"]["max_distance"] == 1.0
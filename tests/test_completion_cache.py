@@ -0,0 +1,44 @@
+from fake_koboldcpp import FakeKoboldCpp
+from src.services.completion_cache import CompletionCache
+from src.services.llm_service import LLMService
+
+def _generate_calls(fake: FakeKoboldCpp) -> int:
+    return sum(1 for path, _ in fake.requests if path == "/api/v1/generate")
+
+def test_completions_persist_across_services_and_are_keyed_by_model(tmp_path):
+    path = str(tmp_path / "completions.sqlite3")
+    with FakeKoboldCpp(reply="Monday.", model_name="koboldcpp/sarvam-1") as fake:
+        first = LLMService(base_url=fake.base_url, health_interval=0, completion_cache_path=path)
+        assert first.generate_response("When?", mode="rag", max_tokens=8, temperature=0.1) == "Monday."
+        first.close()
+
+        second = LLMService(base_url=fake.base_url, health_interval=0, completion_cache_path=path)
+        trace = {}
+        assert second.generate_response("When?", mode="rag", max_tokens=8, temperature=0.1, trace=trace) == "Monday."
+        assert trace["completion_cache_hit"] is True
+        assert _generate_calls(fake) == 1
+        assert second.get_completion_cache_stats()["hits"] == 1
+
+        # High-temperature generations are meant to vary, so they always go upstream.
+        second.generate_response("When?", mode="rag", max_tokens=8, temperature=0.7)
+        second.generate_response("When?", mode="rag", max_tokens=8, temperature=0.7)
+        assert _generate_calls(fake) == 3
+        second.close()
+
+    with FakeKoboldCpp(reply="Tuesday.", model_name="koboldcpp/qwen2.5-3b") as other_model:
+        third = LLMService(base_url=other_model.base_url, health_interval=0, completion_cache_path=path)
+        assert third.generate_response("When?", mode="rag", max_tokens=8, temperature=0.1) == "Tuesday."
+        third.close()
+
+def test_cache_evicts_least_recently_used_entries(tmp_path):
+    cache = CompletionCache(str(tmp_path / "c.sqlite3"), max_bytes=20)
+    cache.put("a", "m", "x" * 8)
+    cache.put("b", "m", "y" * 8)
+    assert cache.get("a") == "x" * 8  # a is now more recently used than b
+    cache.put("c", "m", "z" * 8)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 8 and cache.get("c") == "z" * 8
+    stats = cache.snapshot()
+    assert stats["evictions"] == 1 and stats["bytes"] <= 20
+    cache.close()
@@ -0,0 +1,76 @@
+import pytest
+from fake_koboldcpp import FakeKoboldCpp
+from src.services.llm_service import LLMService
+
+REPLY = "Paris is the capital of France. It is on the Seine."
+
+@pytest.fixture
+def fake_server():
+    with FakeKoboldCpp(reply=REPLY) as fake:
+        yield fake
+
+def test_stream_response_yields_tokens(fake_server):
+    service = LLMService(base_url=fake_server.base_url, health_interval=0)
+    tokens = list(service.stream_response("Say something", mode="chat", max_tokens=64))
+
+    assert len(tokens) > 1
+    assert "".join(tokens) == REPLY
+    assert fake_server.requests[-1][0] == "/api/extra/generate/stream"
+    assert service.current_mode == "chat"
+
+def test_generate_response_matches_stream(fake_server):
+    service = LLMService(base_url=fake_server.base_url, health_interval=0)
+    assert service.connected
+    assert service.generate_response("Say something", max_tokens=64) == REPLY
+
+def test_stream_response_respects_max_tokens(fake_server):
+    service = LLMService(base_url=fake_server.base_url, health_interval=0)
+    tokens = list(service.stream_response("Say something", max_tokens=3))
+    assert len(tokens) == 3
+
+def test_stop_condition_aborts_generation(fake_server):
+    fake_server.reply = "One. Two. Three. Four. Five. Six. Seven. Eight."
+    service = LLMService(base_url=fake_server.base_url, health_interval=0)
+    text = service.generate_response(
+        "Count", max_tokens=64, stop_condition=lambda t: t.count(".") >= 3
+    )
+
+    assert text == "One. Two. Three."
+    assert len(fake_server.aborted) == 1
+    stats = service.get_generation_stats()
+    assert stats["early_stopped"] == 1
+    assert stats["tokens_generated"] == 3
+    assert stats["tokens_saved"] == 61
+
+def test_abort_stream_counts_as_stopped_early(fake_server):
+    fake_server.reply = "word " * 200
+    fake_server.token_delay = 0.01
+    service = LLMService(base_url=fake_server.base_url, health_interval=0)
+    stream = service.stream_response("Tell a long story", max_tokens=200, genkey="VOXbargein")
+    next(stream)
+    assert service.abort_stream("VOXbargein")  # e.g. the caller barged in from another thread
+    tokens = 1 + sum(1 for _ in stream)  # the server ends the stream; the generator finishes normally
+
+    assert fake_server.aborted == ["VOXbargein"]
+    stats = service.get_generation_stats()
+    assert stats["early_stopped"] == 1
+    assert stats["tokens_saved"] == 200 - tokens > 0
+
+def test_identical_concurrent_generations_are_coalesced(fake_server):
+    from concurrent.futures import ThreadPoolExecutor
+    fake_server.token_delay = 0.05
+    service = LLMService(base_url=fake_server.base_url, health_interval=0)
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pool.map(lambda _: service.generate_response("Same question", max_tokens=64), range(5)))
+
+    assert results == [REPLY] * 5
+    assert sum(1 for path, _ in fake_server.requests if path == "/api/v1/generate") == 1
+    stats = service.get_coalescing_stats()
+    assert stats["executions"] == 1
+    assert stats["coalesced"] == 4
+    assert stats["in_flight"] == 0
+
+    # Different sampling parameters are never merged.
+    service.generate_response("Same question", max_tokens=64, temperature=0.1)
+    assert service.get_coalescing_stats()["executions"] == 2
@@ -0,0 +1,91 @@
+import threading
+import time
+from src.services.model_lifecycle import ModelManager
+
+class _FakeModel:
+    def __init__(self, manager, name, size_mb):
+        self.weights = None
+        self.size = int(size_mb * 1024 * 1024)
+        self.managed = manager.register(name, self.load, self.unload, measure=lambda: self.size)
+
+    def load(self):
+        self.weights = object()
+
+    def unload(self):
+        self.weights = None
+
+def test_idle_models_are_unloaded_and_reloaded_on_next_use():
+    manager = ModelManager(idle_ttl=60, interval=0)
+    stt = _FakeModel(manager, "stt", 10)
+    stt.managed.ensure_loaded()
+    assert manager.evict_idle(now=time.monotonic() + 30) == []
+    assert manager.evict_idle(now=time.monotonic() + 61) == ["stt"]
+    assert stt.weights is None and manager.snapshot()["models"]["stt"]["memory_mb"] == 0
+
+    with stt.managed.use():
+        assert stt.weights is not None
+    snapshot = manager.snapshot()["models"]["stt"]
+    assert (snapshot["loaded"], snapshot["loads"], snapshot["unloads"]) == (True, 2, 1)
+    assert snapshot["memory_mb"] >= 10
+
+def test_memory_budget_unloads_least_recently_used_models_first():
+    manager = ModelManager(budget_mb=25, interval=0)
+    stt, tts, embedder = (_FakeModel(manager, name, 10) for name in ("stt", "tts", "embedder"))
+    stt.managed.ensure_loaded()
+    tts.managed.ensure_loaded()
+    with stt.managed.use():
+        pass  # stt is now more recently used than tts
+    embedder.managed.ensure_loaded()
+
+    assert tts.weights is None and stt.weights is not None and embedder.weights is not None
+    assert manager.snapshot()["resident_mb"] <= 25
+
+def test_models_in_use_are_never_unloaded():
+    manager = ModelManager(idle_ttl=1, interval=0)
+    stt = _FakeModel(manager, "stt", 10)
+    entered, release = threading.Event(), threading.Event()
+
+    def transcribe():
+        with stt.managed.use():
+            entered.set()
+            release.wait(5)
+
+    worker = threading.Thread(target=transcribe)
+    worker.start()
+    entered.wait(5)
+    assert manager.evict_idle(now=time.monotonic() + 10) == []
+    release.set()
+    worker.join()
+    assert manager.evict_idle(now=time.monotonic() + 10) == ["stt"]
+
+def test_background_thread_unloads_least_recently_used_idle_model_over_budget():
+    manager = ModelManager(budget_mb=25, interval=0.05)
+    stt, tts, embedder = (_FakeModel(manager, name, 10) for name in ("stt", "tts", "embedder"))
+    with stt.managed.use(), tts.managed.use():
+        embedder.managed.ensure_loaded()  # 30 MB, but the other two are busy: nothing can go yet
+        assert manager.snapshot()["resident_mb"] == 30
+    # Once they are idle the lifecycle thread unloads the least recently used model (embedder).
+    deadline = time.monotonic() + 5
+    while embedder.weights is not None and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert embedder.weights is None and stt.weights is not None and tts.weights is not None
+    assert manager.snapshot()["resident_mb"] == 20
+    manager.close()
+
+def test_overlapping_loads_do_not_count_each_others_memory():
+    manager = ModelManager(interval=0)
+    both_loading, ballast = threading.Barrier(2), []
+
+    def load():
+        ballast.append(bytearray(32 * 1024 * 1024))  # each load grows the shared process RSS
+        both_loading.wait(5)
+
+    models = [manager.register(name, load, lambda: None, measure=lambda: 1024 * 1024) for name in ("stt", "tts")]
+    threads = [threading.Thread(target=m.ensure_loaded) for m in models]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    for name, snapshot in manager.snapshot()["models"].items():
+        assert snapshot["rss_delta_mb"] is None, name  # fall back to the measured weights
+        assert snapshot["memory_mb"] == 1.0
@@ -0,0 +1,88 @@
+import os
+import time
+from multiprocessing import shared_memory
+import numpy as np
+import pytest
+from src.services.model_workers import ModelWorkerError, ModelWorkerPool, STTWorkerClient, TTSWorkerClient
+
+class FakeModel:
+    """Loaded inside each worker process in place of Whisper/Kokoro."""
+
+    def transcribe_array(self, audio, language=None, partial=False):
+        return f"{os.getpid()} {language} {audio.dtype} {len(audio)} {float(audio.sum()):.1f}"
+
+    def transcribe_with_language(self, audio, language=None):
+        return f"path {audio}", language or "en"
+
+    model_label = "fake/whisper-test"
+
+    def get_batching_stats(self):
+        return {"pid": os.getpid()}
+
+    def warm_up(self):
+        return os.getpid()
+
+    def synthesize(self, text, voice=None, language=None):
+        if text == "crash":
+            os._exit(1)
+        if text == "slow":
+            time.sleep(0.5)
+        return np.full(len(text), 0.5, dtype=np.float32)
+
+@pytest.fixture
+def pool():
+    pool = ModelWorkerPool("stt", 2, factory="test_model_workers:FakeModel", health_interval=0)
+    yield pool
+    pool.close()
+
+def test_requests_run_in_worker_processes_with_audio_in_shared_memory(pool):
+    stt = STTWorkerClient(pool)
+    pid, language, dtype, length, total = stt.transcribe_array(np.ones(16000, dtype=np.float64), "en").split()
+    assert int(pid) != os.getpid()
+    assert (language, dtype, length, total) == ("en", "float32", "16000", "16000.0")
+    assert stt.transcribe_audio("clip.wav") == "path clip.wav"
+    assert stt.transcribe_with_language("clip.wav", "hi") == ("path clip.wav", "hi")
+
+    audio = TTSWorkerClient(pool).synthesize("hello")
+    assert audio.dtype == np.float32 and audio.tolist() == [0.5] * 5
+
+def test_crashed_worker_is_restarted(pool):
+    tts = TTSWorkerClient(pool)
+    with pytest.raises(ModelWorkerError):
+        tts.synthesize("crash")
+    # Both workers keep serving afterwards, including the replacement process.
+    assert [len(tts.synthesize("ok" * n)) for n in range(1, 5)] == [2, 4, 6, 8]
+    workers = pool.snapshot()["workers"]
+    assert sum(w["restarts"] for w in workers) == 1
+    assert all(w["alive"] for w in workers)
+
+def test_call_each_reaches_every_worker(pool):
+    pids = pool.call_each("warm_up", {})
+    assert len(set(pids)) == 2 and os.getpid() not in pids
+
+def test_stt_client_reports_model_and_per_worker_batching_stats(pool):
+    stt = STTWorkerClient(pool)
+    assert stt.model_label == "fake/whisper-test"
+    stats = stt.get_batching_stats()["workers"]
+    assert len(stats) == 2 and os.getpid() not in [s["pid"] for s in stats]
+
+def test_reply_written_after_a_timeout_is_unlinked(pool):
+    name = "vv_test_late_reply"
+    with pytest.raises(ModelWorkerError):
+        # The worker writes its reply after the parent gave up, then stops on the restart's request.
+        pool.call("synthesize", {"text": "slow", "reply_shm": name}, timeout=0.2)
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+def test_stt_health_reports_the_worker_pool(pool, monkeypatch):
+    import asyncio
+    from src.api import health
+    from src.services import model_workers
+    monkeypatch.setattr(model_workers, "STT_WORKER_PROCESSES", 2)
+
+    assert asyncio.run(health.stt_stats()).loaded is False  # no pool started yet; health never starts one
+    monkeypatch.setitem(model_workers._pools, "stt", pool)
+    pool.call_each("warm_up", {})
+    stats = asyncio.run(health.stt_stats())
+    assert (stats.model, stats.loaded) == ("fake/whisper-test", True)
+    assert len(stats.batching["workers"]) == 2
@@ -0,0 +1,30 @@
+from fake_koboldcpp import FakeKoboldCpp
+from src.services.llm_service import LLMService
+from src.services.prompt_templates import get_prompt_template
+
+ITEMS = [{"metadata": {"source_filename": "notes.pdf"}, "text": "The launch is on Monday."}]
+
+def test_static_prefix_is_identical_and_variable_material_is_last():
+    for mode in ("rag", "chat"):
+        template = get_prompt_template(mode)
+        first = template.render("When is the launch?", ITEMS, "Calendar window")
+        second = template.render("Who attends?", [], "")
+
+        assert first.startswith(template.static_prefix)
+        assert second.startswith(template.static_prefix)
+        assert "When is the launch?" not in template.static_prefix
+        # Documents, then screen, then the question.
+        assert first.index("notes.pdf") < first.index("Calendar window") < first.index("When is the launch?")
+
+def test_repeated_turns_reuse_the_static_prefix():
+    with FakeKoboldCpp(reply="Monday.") as fake:
+        service = LLMService(base_url=fake.base_url, health_interval=0)
+        template = get_prompt_template("rag")
+        for query in ("When is the launch?", "Who attends?"):
+            list(service.stream_response(template.render(query, ITEMS), mode="rag", max_tokens=8))
+
+        stats = service.get_prompt_cache_stats()["rag"]
+        assert stats["requests"] == 2
+        assert stats["prefix_hits"] == 1  # the first turn has nothing cached yet
+        assert stats["reused_prompt_ratio"] > 0.3
+        assert stats["avg_prefill_ms_hit"] is not None and stats["avg_prefill_ms_miss"] is not None
@@ -0,0 +1,161 @@
+import json
+from contextlib import contextmanager
+from fastapi.testclient import TestClient
+from unittest.mock import MagicMock
+
+from src.main import create_app
+from src.services.rag_service import RAGResponse, get_rag_service
+
+app = create_app()
+client = TestClient(app)
+
+def _parse_sse(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def _fake_service():
+    service = MagicMock()
+    service.stream_question.return_value = (event for event in [  # a generator, like stream_question
+        ("token", "Hello"),
+        ("token", " world."),
+        ("done", RAGResponse(answer="Hello world.", citations=["doc.txt"], model="fake")),
+    ])
+    return service
+
+def test_ask_stream_emits_tokens_then_done():
+    service = _fake_service()
+    app.dependency_overrides[get_rag_service] = lambda: service
+    try:
+        response = client.post("/ask/stream", json={"query": "Hi"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(response.text)
+    assert [e[0] for e in events] == ["token", "token", "done"]
+    assert events[-1][1] == {"answer": "Hello world.", "citations": ["doc.txt"], "model": "fake", "session_id": None}
+
+def test_chat_stream_reports_errors_as_events():
+    def failing_stream(**kwargs):
+        raise RuntimeError("backend down")
+        yield
+
+    service = MagicMock()
+    service.stream_question.side_effect = failing_stream
+    app.dependency_overrides[get_rag_service] = lambda: service
+    try:
+        response = client.post("/chat/stream", json={"prompt": "Hi"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert _parse_sse(response.text) == [("error", {"detail": "backend down"})]
+
+def test_unknown_session_ids_are_rejected_with_404():
+    from src.services.rag_service import RAGService
+    from src.services.session_memory import SessionStore
+
+    service = object.__new__(RAGService)
+    service.sessions = SessionStore(lambda summary, turns: summary)
+    app.dependency_overrides[get_rag_service] = lambda: service
+    try:
+        session_id = client.post("/sessions").json()["session_id"]
+        assert client.get(f"/sessions/{session_id}").status_code == 200
+        for path, body in [("/chat", {"prompt": "Hi"}), ("/ask", {"query": "Hi"}),
+                           ("/chat/stream", {"prompt": "Hi"}), ("/ask/stream", {"query": "Hi"})]:
+            response = client.post(path, json={**body, "session_id": "made-up"})
+            assert response.status_code == 404, path
+        assert client.get("/sessions/made-up").status_code == 404
+        assert service.sessions.snapshot()["active_sessions"] == 1  # nothing was created on the way
+    finally:
+        app.dependency_overrides.clear()
+        service.sessions.close()
+
+@contextmanager
+def _serve(monkeypatch, llm):
+    """Runs the app under uvicorn with a RAGService that has no documents and talks to `llm`."""
+    import socket
+    import threading
+    import time
+    import uvicorn
+    from src.services import llm_service, warmup
+    from src.services.cascade_router import CascadeRouter
+    from src.services.rag_service import RAGService
+    from src.services.session_memory import SessionStore
+
+    service = object.__new__(RAGService)
+    service.llm_service = llm
+    service.router = CascadeRouter()
+    service.sessions = SessionStore(lambda summary, turns: summary)
+    service._retrieve_context_items = lambda query: []
+    monkeypatch.setattr(llm_service, "_instance", llm)
+    monkeypatch.setattr(warmup, "_warmup", warmup.Warmup([]))
+
+    server_app = create_app()
+    server_app.dependency_overrides[get_rag_service] = lambda: service
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(server_app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+
+def test_queued_chat_does_not_block_other_endpoints(monkeypatch):
+    import threading
+    import time
+    import requests
+    from fake_koboldcpp import FakeKoboldCpp
+    from src.services import llm_service
+    from src.services.admission import PRIORITY_TEXT, AdmissionQueue
+
+    with FakeKoboldCpp(reply="Queued reply.") as fake:
+        llm = llm_service.LLMService(base_url=fake.base_url, health_interval=0)
+        llm.admission["chat"] = AdmissionQueue("chat", max_concurrency=1, max_queue=4)
+        with _serve(monkeypatch, llm) as base_url:
+            held = llm.admission["chat"].acquire(PRIORITY_TEXT, 30)  # the only chat slot is busy
+            result = {}
+            chat = threading.Thread(target=lambda: result.update(response=requests.post(
+                f"{base_url}/chat", json={"prompt": "Hi", "deadline_seconds": 20}, timeout=30)))
+            chat.start()
+            while not llm.admission["chat"]._waiting:
+                time.sleep(0.01)
+
+            started = time.monotonic()
+            health = requests.get(f"{base_url}/health/llm", timeout=5)
+            assert health.status_code == 200
+            assert time.monotonic() - started < 2
+
+            held.queue.release(held)
+            chat.join(timeout=10)
+            assert result["response"].status_code == 200
+            assert result["response"].json()["response"] == "Queued reply."
+
+def test_client_disconnect_aborts_the_streamed_generation(monkeypatch):
+    import time
+    import requests
+    from fake_koboldcpp import FakeKoboldCpp
+    from src.services import llm_service
+
+    with FakeKoboldCpp(reply="word " * 500, token_delay=0.01) as fake:
+        llm = llm_service.LLMService(base_url=fake.base_url, health_interval=0)
+        with _serve(monkeypatch, llm) as base_url:
+            response = requests.post(f"{base_url}/chat/stream", json={"prompt": "Hi"}, stream=True, timeout=10)
+            assert next(response.iter_lines()).startswith(b"event: token")
+            response.close()  # the client hangs up mid-answer
+
+            deadline = time.monotonic() + 5
+            while not fake.aborted and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert len(fake.aborted) == 1
+            while llm.get_generation_stats()["early_stopped"] == 0 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert llm.get_generation_stats()["early_stopped"] == 1
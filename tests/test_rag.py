@@ -18,3 +18,9 @@ def test_rag_service_singleton():
     s1 = get_rag_service()
     s2 = get_rag_service()
     assert s1 is s2
+
+def test_should_stop_generation_matches_clean_answer():
+    assert not RAGService._should_stop_generation("One. Two. Three.")
+    assert RAGService._should_stop_generation("One. Two. Three. Fo")
+    assert RAGService._should_stop_generation("An answer.\nContext: leaked")
+    assert RAGService._clean_answer("One. Two. Three. Fo") == "One. Two. Three."
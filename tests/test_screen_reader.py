@@ -16,3 +16,56 @@ def test_capture_and_read_screen():
     assert isinstance(text, str)
     # the screen will likely have *some* text on it, but we can't guarantee what it is to assert against.
     # At least assert the function completes.
+
+def _tesseract_service(monkeypatch, stdout=b"Hello screen\n"):
+    import subprocess
+    from types import SimpleNamespace
+    import src.services.screen_reader as screen_reader
+
+    piped = []
+
+    def fake_run(args, input, capture_output, timeout):
+        piped.append((args, input, timeout))
+        return subprocess.CompletedProcess(args, 0, stdout=stdout, stderr=b"")
+
+    monkeypatch.setattr(screen_reader.subprocess, "run", fake_run)
+    monkeypatch.setattr(screen_reader, "pytesseract", SimpleNamespace(pytesseract=SimpleNamespace(tesseract_cmd="tesseract")), raising=False)
+    service = object.__new__(screen_reader.ScreenReaderService)
+    service.engine, service.engine_name, service.is_windows, service.lifecycle = "tesseract", "tesseract", False, None
+    return service, piped
+
+def test_screenshots_are_piped_to_tesseract_without_png_or_temp_files(monkeypatch, tmp_path):
+    import tempfile
+    from PIL import Image
+    import src.services.screen_reader as screen_reader
+
+    service, piped = _tesseract_service(monkeypatch)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(screen_reader.ImageGrab, "grab", lambda **kwargs: Image.new("RGBA", (40, 20), "white"))
+    formats, save = [], Image.Image.save
+    monkeypatch.setattr(Image.Image, "save", lambda self, fp, format=None, **kw: formats.append(format) or save(self, fp, format, **kw))
+
+    def no_temp_files(*args, **kwargs):
+        raise AssertionError("OCR must not write a temporary file")
+
+    for name in ("NamedTemporaryFile", "mkstemp", "mktemp"):
+        monkeypatch.setattr(tempfile, name, no_temp_files)
+
+    assert service.capture_and_read_screen() == "Hello screen"
+    [(args, bmp, timeout)] = piped
+    assert args[1:] == ["stdin", "stdout"] and bmp[:2] == b"BM"
+    assert timeout == screen_reader.TESSERACT_TIMEOUT_SECONDS
+    assert formats == ["BMP"]  # encoded once, uncompressed; never PNG
+    assert list(tmp_path.iterdir()) == []
+
+def test_uploaded_images_decode_from_the_stream(monkeypatch):
+    import io
+    from PIL import Image
+    from src.services.screen_reader import ImageDecodeError, decode_image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 4), "black").save(buffer, format="PNG")
+    buffer.seek(0)
+    assert decode_image(buffer).size == (8, 4)
+    with pytest.raises(ImageDecodeError):
+        decode_image(io.BytesIO(b"not an image"))
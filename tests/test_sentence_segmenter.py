@@ -0,0 +1,32 @@
+from src.services.sentence_segmenter import split_sentences
+
+def test_splits_on_sentence_ends_but_not_abbreviations_or_decimals():
+    text = 'Hello there! Dr. Smith said "It works." It costs 3.5 dollars, e.g. per page?\nNext line'
+    assert split_sentences(text) == [
+        "Hello there!",
+        'Dr. Smith said "It works."',
+        "It costs 3.5 dollars, e.g. per page?",
+        "Next line",
+    ]
+
+def test_long_sentences_are_bounded_and_prefer_clause_breaks():
+    sentence = "First we open the file, then we read every line carefully, and finally we close it again."
+    segments = split_sentences(sentence, max_chars=40)
+    assert segments == ["First we open the file,", "then we read every line carefully,", "and finally we close it again."]
+    assert all(len(s) <= 40 for s in split_sentences("word " * 100, max_chars=40))
+    assert " ".join(split_sentences("word " * 100, max_chars=40)) == " ".join(["word"] * 100)
+
+def test_blank_text_has_no_segments():
+    assert split_sentences("  \n ") == []
+
+def test_accumulator_releases_sentences_as_tokens_arrive():
+    from src.services.sentence_segmenter import SentenceAccumulator
+
+    accumulator = SentenceAccumulator(max_chars=40)
+    released = []
+    for token in ["Hi", " Dr", ".", " Lee", ".", " It", " costs", " 3", ".", "5", ".", " Then"]:
+        released.append(accumulator.feed(token))
+    assert [s for batch in released for s in batch] == ["Hi Dr. Lee.", "It costs 3.5."]
+    assert released[5] == ["Hi Dr. Lee."]  # as soon as the next sentence starts
+    assert accumulator.flush() == ["Then"]
+    assert accumulator.feed("word " * 20)[0] == " ".join(["word"] * 8)
@@ -0,0 +1,80 @@
+import threading
+import pytest
+from src.services.session_memory import SessionStore, UnknownSessionError, estimate_tokens
+
+def _wait_idle(store: SessionStore):
+    # The summariser runs on a single worker thread; a no-op job queued behind it marks completion.
+    store._executor.submit(lambda: None).result(timeout=5)
+
+def test_history_stays_within_budget_and_older_turns_are_summarised():
+    calls = []
+
+    def summarize(summary, turns):
+        calls.append(turns)
+        return (summary + " " + " ".join(user for user, _ in turns)).strip()
+
+    store = SessionStore(summarize, token_budget=120, summary_max_tokens=40)
+    session = store.create("s1")
+    sizes = []
+    for i in range(20):
+        store.record_turn(session, f"Question number {i} about the launch?", f"Answer {i}: it is on Monday.")
+        _wait_idle(store)
+        sizes.append(estimate_tokens(session.history_text()))
+
+    assert max(sizes) <= 120
+    assert sizes[-1] == sizes[-2]  # constant prompt cost once the window is full
+    history = session.history_text()
+    assert "Summary of earlier conversation:" in history
+    assert "Question number 19" in history
+    stats = session.snapshot()
+    assert stats["pending_turns"] == 0
+    assert stats["summarized_turns"] + stats["verbatim_turns"] == 20
+    assert calls and store.snapshot()["summary_runs"] == len(calls)
+    store.close()
+
+def test_answering_does_not_wait_for_summarisation_and_failures_fall_back():
+    release = threading.Event()
+
+    def slow_failing_summarize(summary, turns):
+        release.wait(timeout=5)
+        raise RuntimeError("LLM unavailable")
+
+    store = SessionStore(slow_failing_summarize, token_budget=60, summary_max_tokens=20)
+    session = store.create("s1")
+    for i in range(6):
+        store.record_turn(session, f"Question {i} here?", f"Answer {i} there.")  # returns immediately
+    assert session.snapshot()["pending_turns"] > 0
+    # Turns waiting for the slow summariser still reach the prompt.
+    history = session.history_text()
+    assert session.pending[-1][0] in history  # the most recent pending turn, at least
+    assert estimate_tokens(history) <= 60
+
+    release.set()
+    _wait_idle(store)
+    _wait_idle(store)
+    stats = session.snapshot()
+    assert stats["pending_turns"] == 0
+    assert "User asked:" in session.summary
+    assert "Question 2 here? Answer: Answer 2 there." in session.history_text()  # not lost by the failure
+    assert store.snapshot()["summary_failures"] >= 1
+    store.close()
+
+def test_sessions_are_bounded():
+    store = SessionStore(lambda summary, turns: summary, max_sessions=2)
+    for sid in ("a", "b", "c"):
+        store.create(sid)
+    assert store.find("a") is None and store.find("c") is not None
+    assert store.snapshot()["active_sessions"] == 2
+    store.close()
+
+def test_unknown_sessions_are_not_created_on_lookup():
+    store = SessionStore(lambda summary, turns: summary, idle_ttl_s=60)
+    with pytest.raises(UnknownSessionError):
+        store.get("never-created")
+    session = store.create()
+    assert store.get(session.session_id) is session
+    assert store.delete(session.session_id)
+    with pytest.raises(UnknownSessionError):
+        store.get(session.session_id)
+    assert store.snapshot()["active_sessions"] == 0
+    store.close()
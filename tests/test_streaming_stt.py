@@ -0,0 +1,49 @@
+import numpy as np
+from src.services.streaming_stt import SAMPLE_RATE, UtteranceSegmenter, pcm16_to_float32
+
+def _tone(seconds: float, amplitude: float = 0.3) -> np.ndarray:
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+def _silence(seconds: float) -> np.ndarray:
+    return np.random.default_rng(0).normal(0, 1e-4, int(SAMPLE_RATE * seconds)).astype(np.float32)
+
+def _feed_in_chunks(segmenter, audio, chunk_ms=20):
+    chunk = SAMPLE_RATE * chunk_ms // 1000
+    events = []
+    for i in range(0, len(audio), chunk):
+        events.extend((kind, audio_i, i + chunk) for kind, audio_i in segmenter.feed(audio[i:i + chunk]))
+    return events
+
+def test_segments_utterances_with_partials_and_prompt_end():
+    segmenter = UtteranceSegmenter(end_silence_ms=300, partial_interval_ms=500)
+    speech_end = SAMPLE_RATE * 2  # 0.5 s silence + 1.5 s speech
+    audio = np.concatenate([_silence(0.5), _tone(1.5), _silence(1.0), _tone(0.6), _silence(0.5)])
+    events = _feed_in_chunks(segmenter, audio)
+
+    kinds = [kind for kind, _, _ in events]
+    assert kinds.count("start") == 2 and kinds.count("end") == 2
+    assert kinds[0] == "start" and "partial" in kinds[: kinds.index("end")]
+
+    _, first_utterance, emitted_at = next(e for e in events if e[0] == "end")
+    # The final is emitted within the VAD silence window (plus one chunk) after speech stops...
+    assert emitted_at - speech_end <= SAMPLE_RATE * (0.3 + 0.02 + 0.03)
+    # ...and carries the speech with pre-roll but without the trailing silence.
+    assert SAMPLE_RATE * 1.5 <= len(first_utterance) <= SAMPLE_RATE * 1.9
+
+def test_flush_ends_open_utterance_and_silence_yields_nothing():
+    segmenter = UtteranceSegmenter()
+    assert _feed_in_chunks(segmenter, _silence(2.0)) == []
+    assert segmenter.flush() == []
+
+    segmenter.feed(_tone(0.5))
+    assert segmenter.in_speech
+    [(kind, audio)] = segmenter.flush()
+    assert kind == "end" and len(audio) > 0
+
+def test_pcm16_conversion_and_resampling():
+    pcm = (np.array([0, 16384, -16384, 32767], dtype="<i2")).tobytes()
+    samples = pcm16_to_float32(pcm)
+    assert samples.dtype == np.float32
+    assert np.allclose(samples, [0, 0.5, -0.5, 32767 / 32768])
+    assert len(pcm16_to_float32(np.zeros(48000, dtype="<i2").tobytes(), sample_rate=48000)) == SAMPLE_RATE
@@ -30,3 +30,38 @@ def test_transcribe_audio(mock_audio_file):
         assert isinstance(response, str)
     except Exception as e:
         pytest.fail(f"transcribe_audio raised an exception: {e}")
+
+def test_unknown_stt_backend_is_rejected():
+    from src.services.stt_backends import create_stt_backend
+    with pytest.raises(ValueError, match="faster-whisper"):
+        create_stt_backend("whisper-cpp", "base")
+
+def test_faster_whisper_backend_without_the_package_says_what_to_install(monkeypatch):
+    import sys
+    from src.services.stt_backends import create_stt_backend
+    monkeypatch.setitem(sys.modules, "faster_whisper", None)  # makes the import fail
+    with pytest.raises(RuntimeError, match="pip install faster-whisper"):
+        create_stt_backend("faster-whisper", "base")
+
+def test_concurrent_first_calls_build_one_fully_initialised_service(monkeypatch):
+    import threading
+    import time
+    from src.services.stt_service import STTService
+
+    inits = []
+
+    def slow_init(self, model_size, backend):
+        inits.append(self)
+        time.sleep(0.2)  # e.g. loading Whisper in the warm-up thread
+        self.batcher = "ready"
+
+    monkeypatch.setattr(STTService, "_instance", None)
+    monkeypatch.setattr(STTService, "_init_service", slow_init)
+    services = []
+    threads = [threading.Thread(target=lambda: services.append(STTService())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(inits) == 1
+    assert all(service is inits[0] and service.batcher == "ready" for service in services)
@@ -0,0 +1,54 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+from src.services.stt_batcher import TranscriptionBatcher
+
+class _SlowModel:
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def __call__(self, audios, language, partial):
+        self.calls.append((len(audios), language, partial))
+        self.release.wait(5)
+        if language == "xx":
+            raise RuntimeError("unsupported language")
+        return [f"{language}:{len(a)}" for a in audios]
+
+def test_concurrent_requests_share_batches_and_get_their_own_transcripts():
+    model = _SlowModel()
+    batcher = TranscriptionBatcher(model, max_batch_size=4, max_wait_ms=0)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        first = pool.submit(batcher.submit, np.zeros(1), "en")
+        while not model.calls:  # the first clip is being decoded; the rest queue up behind it
+            threading.Event().wait(0.01)
+        rest = [pool.submit(batcher.submit, np.zeros(n), "en") for n in range(2, 8)]
+        while batcher.snapshot()["queued"] < 6:
+            threading.Event().wait(0.01)
+        model.release.set()
+        assert first.result() == "en:1"
+        assert [f.result() for f in rest] == [f"en:{n}" for n in range(2, 8)]
+
+    stats = batcher.snapshot()
+    assert [size for size, _, _ in model.calls] == [1, 4, 2]
+    assert stats["requests"] == 7 and stats["batches"] == 3
+    assert stats["batch_sizes"] == {"1": 1, "2": 1, "4": 1} and stats["avg_batch_size"] == pytest.approx(7 / 3, 0.01)
+    assert stats["avg_queue_wait_ms"] is not None
+    batcher.close()
+
+def test_batches_do_not_mix_decoding_options_and_errors_reach_callers():
+    model = _SlowModel()
+    model.release.set()
+    batcher = TranscriptionBatcher(model, max_batch_size=8, max_wait_ms=50)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        en = pool.submit(batcher.submit, np.zeros(3), "en")
+        de = pool.submit(batcher.submit, np.zeros(3), "de", True)
+        bad = pool.submit(batcher.submit, np.zeros(3), "xx")
+        assert en.result() == "en:3" and de.result() == "de:3"
+        with pytest.raises(RuntimeError, match="unsupported"):
+            bad.result()
+
+    assert sorted(model.calls) == [(1, "de", True), (1, "en", False), (1, "xx", False)]
+    assert batcher.snapshot()["errors"] == 1
+    batcher.close()
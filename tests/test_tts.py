@@ -1,6 +1,6 @@
 import pytest
-import os
-from src.services.tts_service import get_tts_service
+import numpy as np
+from src.services.tts_service import TTS_SAMPLE_RATE, get_tts_service
 
 def test_tts_service_singleton():
     s1 = get_tts_service()
@@ -8,17 +8,11 @@ def test_tts_service_singleton():
     assert s1 is s2
     assert s1.pipeline is not None
 
-def test_generate_audio():
+def test_synthesize():
     service = get_tts_service()
     text = "Hello world, this is a test of the text to speech engine."
-    
-    # We use a custom test output file to avoid overwriting production temp files
-    output_filename = "test_output.wav"
-    output_path = service.generate_audio(text, output_filename=output_filename)
-    
-    assert os.path.exists(output_path)
-    assert output_path.endswith(output_filename)
-    
-    # Cleanup
-    if os.path.exists(output_path):
-        os.remove(output_path)
+
+    audio = service.synthesize(text)
+
+    assert audio.dtype == np.float32
+    assert len(audio) > TTS_SAMPLE_RATE / 2  # at least half a second of speech
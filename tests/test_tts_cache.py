@@ -0,0 +1,71 @@
+import numpy as np
+from src.services.tts_cache import TTSPhraseCache, phrase_key
+
+def test_phrase_key_normalizes_whitespace_but_not_case():
+    assert phrase_key("Hello   world.\n", "af_bella", 1.0, "a") == phrase_key(" Hello world.", "af_bella", 1.0, "a")
+    assert phrase_key("Hello world.", "af_bella", 1.0, "a") != phrase_key("HELLO world.", "af_bella", 1.0, "a")
+    assert phrase_key("Hello world.", "af_bella", 1.0, "a") != phrase_key("Hello world.", "af_sky", 1.0, "a")
+    assert phrase_key("Hello world.", "af_bella", 1.0, "a") != phrase_key("Hello world.", "af_bella", 1.2, "a")
+    assert phrase_key("Hello world.", "af_bella", 1.0, "a") != phrase_key("Hello world.", "af_bella", 1.0, "b")
+
+def test_audio_round_trips_and_persists(tmp_path):
+    path = str(tmp_path / "tts.sqlite3")
+    audio = np.linspace(-1, 1, 480, dtype=np.float32)
+    cache = TTSPhraseCache(path, max_bytes=1 << 20)
+    cache.put("k", "Hello.", "af_bella", audio)
+    cache.close()
+
+    reopened = TTSPhraseCache(path, max_bytes=1 << 20)
+    np.testing.assert_array_equal(reopened.get("k"), audio)
+    assert reopened.get("missing") is None
+    stats = reopened.snapshot()
+    assert (stats["hits"], stats["misses"], stats["entries"], stats["bytes"]) == (1, 1, 1, audio.nbytes)
+    reopened.close()
+
+def test_cache_evicts_least_recently_used_phrases(tmp_path):
+    clip = np.zeros(100, dtype=np.float32)  # 400 bytes
+    cache = TTSPhraseCache(str(tmp_path / "tts.sqlite3"), max_bytes=1000)
+    cache.put("a", "A.", "v", clip)
+    cache.put("b", "B.", "v", clip)
+    assert cache.get("a") is not None  # a is now more recently used than b
+    cache.put("c", "C.", "v", clip)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.snapshot()["evictions"] == 1
+
+    cache.put("huge", "Too long.", "v", np.zeros(1000, dtype=np.float32))
+    assert cache.get("huge") is None  # larger than the whole budget; never stored
+    cache.close()
+
+def test_synthesize_stream_reuses_cached_sentences(tmp_path):
+    from src.services.model_lifecycle import ModelManager
+    from src.services.tts_pipelines import PipelinePool
+    from src.services.tts_service import TTSService
+
+    calls = []
+
+    def pipeline(text, voice, speed, split_pattern):
+        calls.append(text)
+        yield text, "", np.full(len(text), 0.5, dtype=np.float32)
+
+    service = object.__new__(TTSService)
+    service.lang_code = "a"
+    service.default_voice = "af_bella"
+    service.pipelines = PipelinePool(lambda lang_code: pipeline, pinned="a", idle_seconds=0)
+    service.lifecycle = ModelManager(interval=0).register("tts", lambda: None, lambda: None)
+    service.cache = TTSPhraseCache(str(tmp_path / "tts.sqlite3"), max_bytes=1 << 20)
+
+    first = service.synthesize("No results found. Try again.")
+    second = service.synthesize("Please wait. No results found.")
+
+    assert calls == ["No results found.", "Try again.", "Please wait."]
+    assert len(first) == len("No results found.") + len("Try again.")
+    assert len(second) == len("Please wait.") + len("No results found.")
+    assert service.get_cache_stats()["hits"] == 1
+
+    # Fully cached text is spoken without reloading an unloaded model.
+    assert service.lifecycle.try_unload("test")
+    service.synthesize("Try again.")
+    assert not service.lifecycle.loaded and service.lifecycle.loads == 1
+    service.cache.close()
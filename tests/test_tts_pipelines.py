@@ -0,0 +1,78 @@
+import threading
+import time
+from src.services.model_lifecycle import ModelManager
+from src.services.tts_pipelines import PipelinePool, resolve_language
+
+def _get(pool: PipelinePool, lang_code: str):
+    with pool.use(lang_code) as pipeline:
+        return pipeline
+
+def test_whisper_languages_map_to_kokoro_pipelines_and_voices():
+    default = ("a", "af_bella")
+    assert resolve_language("hi", default) == ("h", "hf_alpha")
+    assert resolve_language("pt-BR", default) == ("p", "pf_dora")
+    assert resolve_language("bn", default) == default  # no Kokoro voice for Bengali
+    assert resolve_language(None, default) == default
+
+def test_pipelines_load_on_first_use_and_least_recently_used_is_evicted():
+    created = []
+    pool = PipelinePool(lambda code: created.append(code) or f"pipeline-{code}", pinned="a",
+                        max_pipelines=2, idle_seconds=0)
+    assert created == ["a"]
+    assert _get(pool, "h") == "pipeline-h" and _get(pool, "h") == "pipeline-h"
+    assert created == ["a", "h"]
+
+    _get(pool, "e")  # over capacity: "h" goes, the pinned default language stays
+    assert pool.snapshot()["loaded"] == ["a", "e"]
+    _get(pool, "h")
+    assert created == ["a", "h", "e", "h"]
+    assert pool.snapshot()["evictions"] == 2
+
+def test_pipelines_in_use_are_not_evicted():
+    pool = PipelinePool(lambda code: code, pinned="a", max_pipelines=2, idle_seconds=60)
+    with pool.use("h"):
+        assert _get(pool, "e") == "e"  # "h" is busy, so "e" is over capacity but nothing can go yet
+        assert pool.snapshot()["loaded"] == ["a", "e", "h"]
+        assert pool.evict_idle(now=time.monotonic() + 61) == ["e"]
+    assert pool.snapshot()["loaded"] == ["a", "h"]
+    pool.close()
+
+def test_idle_pipelines_are_evicted_except_the_pinned_one():
+    pool = PipelinePool(lambda code: code, pinned="a", max_pipelines=4, idle_seconds=60)
+    _get(pool, "h")
+    _get(pool, "j")
+    assert pool.evict_idle(now=time.monotonic() + 30) == []
+    assert sorted(pool.evict_idle(now=time.monotonic() + 61)) == ["h", "j"]
+    assert pool.snapshot()["loaded"] == ["a"] and pool.snapshot()["idle_evictions"] == 2
+    pool.close()
+
+def test_pipeline_memory_counts_towards_the_model_budget():
+    manager = ModelManager(budget_mb=100, interval=0)
+    pool = PipelinePool(lambda code: b"x" * (64 << 20), pinned="a", max_pipelines=8, idle_seconds=0, manager=manager)
+    _get(pool, "h")
+    assert manager.snapshot()["models"]["tts-h"]["memory_mb"] >= 60
+    assert pool.snapshot()["memory_mb"]["h"] >= 60
+
+    _get(pool, "e")  # 128 MB of front ends > 100 MB budget: the least recently used language is unloaded
+    assert pool.snapshot()["loaded"] == ["a", "e"]
+    assert manager.get("tts-h").unloads == 1
+
+def test_concurrent_requests_for_a_new_language_share_one_load():
+    loads = []
+    release = threading.Event()
+
+    def create(code):
+        if code != "a":
+            release.wait(5)
+        loads.append(code)
+        return code
+
+    pool = PipelinePool(create, pinned="a", idle_seconds=0)
+    threads = [threading.Thread(target=_get, args=(pool, "f")) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    assert _get(pool, "a") == "a"  # loaded languages are not held up by the load in progress
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert loads == ["a", "f"]
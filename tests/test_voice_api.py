@@ -1,3 +1,4 @@
+import json
 import pytest
 import wave
 import os
@@ -69,3 +70,273 @@ def test_ask_voice_endpoint_with_screen(mock_audio_fixture):
     # Due to dynamic screen content we can't assert the exact contents of the answer
     # but we can assert the pipeline ran without exploding the context window or throwing a 500
     assert response.status_code == 200
+
+def test_transcribe_stream_websocket_sends_partials_and_finals(monkeypatch):
+    import numpy as np
+    import src.api.voice as voice_api
+
+    class _FakeSTT:
+        def transcribe_array(self, audio, language=None, partial=False):
+            return f"{'partial' if partial else 'final'} {len(audio) / 16000:.1f}s"
+
+    monkeypatch.setattr(voice_api, "get_stt_service", lambda: _FakeSTT())
+    t = np.arange(16000 * 2) / 16000
+    speech = (0.3 * np.sin(2 * np.pi * 220 * t) * 32767).astype("<i2").tobytes()
+    silence = np.zeros(16000, dtype="<i2").tobytes()
+
+    with client.websocket_connect("/ws/transcribe?language=en") as ws:
+        for audio in (silence, speech, silence):
+            for i in range(0, len(audio), 640):  # 20 ms frames
+                ws.send_bytes(audio[i:i + 640])
+        ws.send_text('{"type": "end"}')
+        messages = []
+        while not messages or messages[-1]["type"] != "done":
+            messages.append(ws.receive_json())
+
+    types = [m["type"] for m in messages]
+    assert types[0] == "speech_start"
+    assert types.count("final") == 1
+    final = next(m for m in messages if m["type"] == "final")
+    assert final["text"].startswith("final") and final["latency_ms"] >= 300
+
+def test_transcribe_decodes_uploads_in_memory(monkeypatch, mock_audio_fixture):
+    import numpy as np
+    import src.api.voice as voice_api
+
+    received = []
+
+    class _FakeSTT:
+        def transcribe_audio(self, audio, language=None):
+            received.append(audio)
+            return "hello"
+
+    monkeypatch.setattr(voice_api, "get_stt_service", lambda: _FakeSTT())
+    with open(mock_audio_fixture, "rb") as audio:
+        response = client.post("/transcribe", files={"file": ("fixture.wav", audio, "audio/wav")})
+
+    assert response.status_code == 200 and response.json()["transcription"] == "hello"
+    [samples] = received
+    assert isinstance(samples, np.ndarray) and samples.dtype == np.float32 and len(samples) == 16000
+
+    response = client.post("/transcribe", files={"file": ("broken.wav", b"", "audio/wav")})
+    assert response.status_code == 400
+
+def test_synthesize_stream_sends_audio_per_sentence(monkeypatch):
+    import numpy as np
+    import src.api.voice as voice_api
+
+    class _FakeTTS:
+        def synthesize_stream(self, text, voice=None, language=None):
+            for sentence in text.split(". "):
+                yield np.full(240 * len(sentence.split()), 0.25, dtype=np.float32)
+
+    monkeypatch.setattr(voice_api, "get_tts_service", lambda: _FakeTTS())
+    with client.stream("POST", "/synthesize/stream", json={"text": "One two. Three four five"}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "audio/wav"
+        body = b"".join(response.iter_bytes())
+
+    assert body[:4] == b"RIFF" and body[8:12] == b"WAVE"
+    samples = np.frombuffer(body[44:], dtype="<i2")
+    assert len(samples) == 240 * 5 and samples[0] == int(0.25 * 32767)
+    assert client.post("/synthesize/stream", json={"text": " "}).status_code == 400
+
+def test_voice_websocket_pipelines_llm_tokens_into_sentence_audio(monkeypatch):
+    import time
+    import numpy as np
+    from types import SimpleNamespace
+    import src.api.voice as voice_api
+
+    spoken_languages = []
+
+    class _FakeSTT:
+        def transcribe_with_language(self, audio, language=None):
+            return "what is new", "hi"
+
+    class _FakeTTS:
+        def synthesize(self, text, voice=None, language=None):
+            spoken_languages.append(language)
+            return np.full(100, 0.1, dtype=np.float32)
+
+    class _FakeRAG:
+        def stream_question(self, query, **kwargs):
+            for token in ["Hello", " there.", " It", " is", " sunny", " today.", " Bye"]:
+                time.sleep(0.02)  # a generating LLM
+                yield "token", token
+            yield "done", SimpleNamespace(answer="Hello there. It is sunny today. Bye", citations=[], model="fake", session_id=None)
+
+    monkeypatch.setattr(voice_api, "get_stt_service", lambda: _FakeSTT())
+    monkeypatch.setattr(voice_api, "get_tts_service", lambda: _FakeTTS())
+    monkeypatch.setattr(voice_api, "get_rag_service", lambda: _FakeRAG())
+    t = np.arange(16000) / 16000
+    speech = (0.3 * np.sin(2 * np.pi * 220 * t) * 32767).astype("<i2").tobytes()
+    silence = np.zeros(8000, dtype="<i2").tobytes()
+
+    with client.websocket_connect("/ws/voice") as ws:
+        for audio in (silence, speech, silence):
+            for i in range(0, len(audio), 640):
+                ws.send_bytes(audio[i:i + 640])
+        ws.send_text('{"type": "end"}')
+        messages, audio_frames = [], []
+        while not messages or messages[-1]["type"] != "done":
+            message = ws.receive()
+            if message.get("bytes") is not None:
+                audio_frames.append(message["bytes"])
+            else:
+                messages.append(json.loads(message["text"]))
+
+    types = [m["type"] for m in messages]
+    assert types[:2] == ["speech_start", "transcript"] and types[-2:] == ["turn_done", "done"]
+    # The language Whisper detected picks the TTS pipeline for the answer.
+    assert messages[1]["language"] == "hi" and spoken_languages == ["hi", "hi", "hi"]
+    assert [m["text"] for m in messages if m["type"] == "audio"] == ["Hello there.", "It is sunny today.", "Bye"]
+    assert len(audio_frames) == 3 and all(len(frame) == 200 for frame in audio_frames)
+    # The first sentence is spoken before the LLM has finished streaming the rest of the answer.
+    assert types.index("audio") < len(types) - 1 - types[::-1].index("token")
+    metrics = messages[-2]["metrics"]
+    assert metrics["segments"] == 3 and metrics["time_to_first_audio_ms"] >= metrics["time_to_first_token_ms"]
+
+class _ToneTTS:
+    def synthesize(self, text, voice=None, language=None):
+        import numpy as np
+        return (0.3 * np.sin(2 * np.pi * 220 * np.arange(24000) / 24000)).astype(np.float32)
+
+def test_synthesize_encodes_in_memory_in_the_accepted_codec(monkeypatch):
+    import io
+    import soundfile as sf
+    import src.api.voice as voice_api
+
+    monkeypatch.setattr(voice_api, "get_tts_service", lambda: _ToneTTS())
+    response = client.post("/synthesize", json={"text": "Hi"}, headers={"Accept": "audio/ogg, audio/wav;q=0.5"})
+    assert response.status_code == 200 and response.headers["content-type"] == "audio/ogg"
+    assert 'filename="response.ogg"' in response.headers["content-disposition"]
+    audio, rate = sf.read(io.BytesIO(response.content))
+    assert rate == 24000 and len(audio) == 24000
+
+def test_ask_voice_returns_multipart_audio_when_accepted(monkeypatch, mock_audio_fixture):
+    from email.parser import BytesParser
+    from types import SimpleNamespace
+    import src.api.voice as voice_api
+
+    class _FakeSTT:
+        def transcribe_with_language(self, audio, language=None):
+            return "hello", "en"
+
+    class _FakeRAG:
+        def ask_question(self, query, **kwargs):
+            return SimpleNamespace(answer="Hi there.", citations=["a.pdf"], model="fake", session_id=None)
+
+    monkeypatch.setattr(voice_api, "get_stt_service", lambda: _FakeSTT())
+    monkeypatch.setattr(voice_api, "get_rag_service", lambda: _FakeRAG())
+    monkeypatch.setattr(voice_api, "get_tts_service", lambda: _ToneTTS())
+    with open(mock_audio_fixture, "rb") as audio:
+        response = client.post(
+            "/ask_voice",
+            files={"file": ("fixture.wav", audio, "audio/wav")},
+            headers={"Accept": "multipart/mixed, audio/flac"},
+        )
+
+    assert response.status_code == 200
+    message = BytesParser().parsebytes(
+        b"Content-Type: " + response.headers["content-type"].encode() + b"\r\n\r\n" + response.content
+    )
+    metadata, audio_part = message.get_payload()
+    metadata = json.loads(metadata.get_payload(decode=True))
+    assert metadata["answer"] == "Hi there." and metadata["language"] == "en"
+    assert audio_part.get_content_type() == "audio/flac"
+    assert audio_part.get_payload(decode=True)[:4] == b"fLaC"
+
+def _streaming_rag_service(fake):
+    from src.services.llm_service import LLMService
+    from src.services.rag_service import RAGService
+    from src.services.session_memory import SessionStore
+
+    service = object.__new__(RAGService)
+    service.llm_service = LLMService(base_url=fake.base_url, health_interval=0)
+    service.sessions = SessionStore(lambda summary, turns: summary)
+    service._retrieve_context_items = lambda query: []
+    return service
+
+def _send_utterance(ws, speech: bool = True):
+    import numpy as np
+    t = np.arange(16000) / 16000
+    voice = (0.3 * np.sin(2 * np.pi * 220 * t) * 32767).astype("<i2").tobytes()
+    silence = np.zeros(8000, dtype="<i2").tobytes()
+    for audio in ((silence, voice, silence) if speech else (silence,)):
+        for i in range(0, len(audio), 640):
+            ws.send_bytes(audio[i:i + 640])
+
+def test_voice_barge_in_aborts_the_generation_on_the_backend(monkeypatch):
+    import numpy as np
+    import src.api.voice as voice_api
+    from fake_koboldcpp import FakeKoboldCpp
+
+    transcripts = iter(["tell me a long story", ""])
+
+    class _FakeSTT:
+        def transcribe_with_language(self, audio, language=None):
+            return next(transcripts), "en"
+
+    class _FakeTTS:
+        def synthesize(self, text, voice=None, language=None):
+            return np.zeros(10, dtype=np.float32)
+
+    with FakeKoboldCpp(reply="Once upon a time " * 100, token_delay=0.02) as fake:
+        monkeypatch.setattr(voice_api, "get_stt_service", lambda: _FakeSTT())
+        monkeypatch.setattr(voice_api, "get_tts_service", lambda: _FakeTTS())
+        monkeypatch.setattr(voice_api, "get_rag_service", lambda: _streaming_rag_service(fake))
+
+        with client.websocket_connect("/ws/voice?chat_mode=true") as ws:
+            _send_utterance(ws)
+            messages = []
+            while not messages or messages[-1]["type"] != "token":
+                message = ws.receive()
+                if message.get("text"):
+                    messages.append(json.loads(message["text"]))
+            _send_utterance(ws)  # the user talks over the answer
+            ws.send_text('{"type": "end"}')
+            while messages[-1]["type"] != "done":
+                message = ws.receive()
+                if message.get("text"):
+                    messages.append(json.loads(message["text"]))
+
+        assert {"type": "turn_cancelled", "turn": 1} in messages
+        assert len(fake.aborted) == 1 and fake.aborted[0].startswith("VOX")  # aborted once, not again on close
+        assert fake.tokens_streamed < 400  # stopped well before the end of the answer
+
+def test_voice_disconnect_mid_answer_aborts_and_closes_the_stream(monkeypatch):
+    import threading
+    from types import SimpleNamespace
+    import src.api.voice as voice_api
+
+    aborted, unblock, closed = [], threading.Event(), threading.Event()
+
+    class _FakeSTT:
+        def transcribe_with_language(self, audio, language=None):
+            return "tell me a long story", "en"
+
+    class _BlockingRAG:
+        llm_service = SimpleNamespace(abort_stream=lambda genkey: aborted.append(genkey) or unblock.set())
+
+        def stream_question(self, query, genkey=None, **kwargs):
+            try:
+                yield "token", "Once"
+                unblock.wait(10)  # waiting for the next token when the client goes away
+                yield "token", " upon"
+            finally:
+                closed.set()
+
+    monkeypatch.setattr(voice_api, "get_stt_service", lambda: _FakeSTT())
+    monkeypatch.setattr(voice_api, "get_tts_service", lambda: _ToneTTS())
+    monkeypatch.setattr(voice_api, "get_rag_service", lambda: _BlockingRAG())
+
+    with client.websocket_connect("/ws/voice?chat_mode=true") as ws:
+        _send_utterance(ws)
+        while True:
+            message = ws.receive()
+            if message.get("text") and json.loads(message["text"])["type"] == "token":
+                break
+        ws.send({"type": "websocket.disconnect", "code": 1001})  # the client goes away mid-answer
+        # The cancelled turn aborts the generation, which ends the in-flight next(); close() waits for it.
+        assert closed.wait(5)
+    assert len(aborted) == 1 and aborted[0].startswith("VOX")
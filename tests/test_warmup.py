@@ -0,0 +1,52 @@
+import threading
+import pytest
+from src.services.warmup import Warmup
+
+def test_ready_only_once_every_selected_model_is_warm():
+    release = threading.Event()
+    calls = []
+    tasks = {
+        "stt": lambda: calls.append("stt"),
+        "tts": lambda: release.wait(5) and calls.append("tts"),
+        "ocr": lambda: calls.append("ocr"),
+    }
+    warmup = Warmup(["stt", "tts"], tasks=tasks)
+    warmup.start()
+    assert not warmup.wait(timeout=0.2)
+    assert warmup.snapshot()["models"]["stt"]["state"] == "ready"
+    assert warmup.snapshot()["models"]["tts"]["state"] == "warming"
+
+    release.set()
+    assert warmup.wait(timeout=5)
+    assert sorted(calls) == ["stt", "tts"]  # unselected models are left cold
+
+def test_failed_warm_up_keeps_the_node_unready():
+    def broken():
+        raise RuntimeError("no model file")
+
+    warmup = Warmup(["stt"], tasks={"stt": broken})
+    warmup.start()
+    assert not warmup.wait(timeout=5)
+    assert warmup.snapshot()["models"]["stt"] == {"state": "failed", "seconds": pytest.approx(0, abs=1), "error": "no model file"}
+
+def test_no_selected_models_is_ready_at_once_and_unknown_names_are_rejected():
+    assert Warmup([], tasks={}).ready
+    with pytest.raises(ValueError, match="gpu"):
+        Warmup(["stt", "gpu"], tasks={"stt": lambda: None})
+
+def test_tts_phrases_are_precomputed_only_with_the_tts_warm_up_or_when_asked():
+    from src.services.warmup import should_precompute_phrases
+    assert not should_precompute_phrases([], "")  # a default node loads nothing at startup
+    assert should_precompute_phrases(["stt", "tts"], "")
+    assert should_precompute_phrases([], "1")
+    assert not should_precompute_phrases(["tts"], "0")
+
+def test_precompute_runs_after_the_warm_ups(monkeypatch):
+    from src.services import warmup
+    order, precomputed = [], threading.Event()
+    monkeypatch.setattr(warmup, "_warmup", None)
+    monkeypatch.setattr(warmup, "WARMUP_TASKS", {"tts": lambda: order.append("warm")})
+    monkeypatch.setattr(warmup.Warmup.__init__, "__defaults__", (["tts"], None))
+    monkeypatch.setattr(warmup, "_precompute_phrases", lambda: order.append("precompute") or precomputed.set())
+    warmup.start_warmup()
+    assert precomputed.wait(5) and order == ["warm", "precompute"]